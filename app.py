@@ -1,14 +1,1855 @@
 import pandas as pd
+import numpy as np
 import random
+import bisect
+import contextlib
+import csv
+import functools
+import itertools
 import json
+import mmap
 import os
 import re
 import shutil
+import zipfile
 from datetime import datetime, time
+from io import BytesIO
 from openpyxl import load_workbook
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-from collections import defaultdict
+from tkinter import ttk, messagebox, filedialog, simpledialog
+from collections import Counter, OrderedDict, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from time import perf_counter
+
+MINUTES_PER_DAY = 24 * 60
+JAM_SEPARATOR = re.compile(r'\s*-\s*')
+WEEKDAYS = ('Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu')
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_time_string(time_str):
+    """Parse "HH:MM", "HH.MM" atau "HH:MM (online)" menjadi (time, is_online).
+
+    Format HH:MM/HH.MM ditangani langsung tanpa regex/strptime; format lain
+    memakai aturan lama. Input yang tidak valid menghasilkan (None, False).
+    """
+    is_online = "(online)" in time_str.lower()
+    paren = time_str.find('(')
+    time_part = (time_str[:paren] if paren >= 0 else time_str).strip()
+    if len(time_part) == 5 and time_part[2] in ':.' and time_part[:2].isdigit() and time_part[3:].isdigit():
+        hours, minutes = int(time_part[:2]), int(time_part[3:])
+        if hours < 24 and minutes < 60:
+            return time(hours, minutes), is_online
+        return None, False
+    try:
+        time_part = re.sub(r'\(.*\)', '', time_str).strip().replace('.', ':')
+        if ':' in time_part:
+            hours, minutes = time_part.split(':')
+            time_part = f"{hours}:{minutes[:2]}"
+        return datetime.strptime(time_part, "%H:%M").time(), is_online
+    except ValueError:
+        return None, False
+
+
+def is_online_marker(jam):
+    """True bila kolom jam hanya berisi penanda "online" tanpa rentang waktu"""
+    return str(jam).strip().lower() == 'online'
+
+
+@functools.lru_cache(maxsize=4096)
+def parse_jam(jam):
+    """Parse "mulai - selesai" menjadi (menit_mulai, menit_selesai, is_online) atau None"""
+    parts = str(jam).split(' - ')
+    if len(parts) != 2:
+        return None
+    start_time, start_online = parse_time_string(parts[0].strip())
+    end_time, end_online = parse_time_string(parts[1].strip())
+    if not start_time or not end_time:
+        return None
+    start = start_time.hour * 60 + start_time.minute
+    end = end_time.hour * 60 + end_time.minute
+    if start >= end:
+        return None
+    return start, end, start_online or end_online
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize_jam(jam):
+    """Bentuk kanonik kolom jam: "HH:MM - HH:MM" atau "HH:MM (online) - HH:MM (online)".
+
+    Variasi seperti "08.00-09.40" atau "8:00 - 9:40 (online)" disatukan; nilai yang
+    tidak bisa diparse dikembalikan apa adanya (tanpa spasi di tepi).
+    """
+    text = str(jam).strip()
+    parts = JAM_SEPARATOR.split(text)
+    if len(parts) != 2:
+        return text
+    start_time, start_online = parse_time_string(parts[0])
+    end_time, end_online = parse_time_string(parts[1])
+    if not start_time or not end_time:
+        return text
+    suffix = " (online)" if start_online or end_online else ""
+    return f"{start_time:%H:%M}{suffix} - {end_time:%H:%M}{suffix}"
+
+
+def interval_mask(start_minute, end_minute):
+    """Bitmask resolusi menit untuk rentang [start, end) dalam satu hari"""
+    if end_minute <= start_minute:
+        return 0
+    return ((1 << (end_minute - start_minute)) - 1) << start_minute
+
+
+class TimeGrid:
+    """Grid waktu kuliah: hari, slot per program dan waktu istirahat, dari konfigurasi.
+
+    Setiap program (mis. reguler, malam, sabtu) memiliki daftar slot dengan flag
+    online sebagai data dan boleh memakai hari sendiri; kelas dipetakan ke program
+    lewat pola regex `class_programs`. Semua slot (gabungan seluruh program) diparse
+    sekali, lalu matriks overlap slot x slot dan slot x istirahat dihitung di muka
+    sehingga cek berbasis slot cukup lookup tabel.
+    """
+
+    DEFAULT_CONFIG = {
+        'days': ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat'],
+        'breaks': [['12:00', '13:00'], ['18:00', '19:00']],
+        'default_program': 'reguler',
+        'programs': {
+            'reguler': {'slots': [
+                {'start': '08:00', 'end': '09:40'},
+                {'start': '10:00', 'end': '11:40'},
+                {'start': '13:00', 'end': '14:40'},
+                {'start': '15:00', 'end': '16:40'},
+                {'start': '19:00', 'end': '20:40'},
+                {'start': '17:40', 'end': '19:20', 'online': True},
+                {'start': '15:30', 'end': '17:10', 'online': True},
+            ]},
+        },
+        'class_programs': [],
+    }
+
+    def __init__(self, config=None):
+        self.config = config or self.DEFAULT_CONFIG
+        self.days = list(self.config.get('days', self.DEFAULT_CONFIG['days']))
+        self.breaks = [(self._minutes(start), self._minutes(end)) for start, end in self.config.get('breaks', [])]
+        self.slots = []  # (menit mulai, menit selesai, is_online) unik dari semua program
+        self.positions = {}
+        self.programs = {}  # nama -> {'days': [...], 'slots': [posisi slot]}
+        for name, program in self.config['programs'].items():
+            if not isinstance(program, dict):
+                program = {'slots': program}
+            positions = []
+            for slot in program['slots']:
+                key = (self._minutes(slot['start']), self._minutes(slot['end']), bool(slot.get('online', False)))
+                if key[0] >= key[1]:
+                    raise ValueError(f"Slot {slot['start']} - {slot['end']} pada program {name} tidak valid")
+                if key not in self.positions:
+                    self.positions[key] = len(self.slots)
+                    self.slots.append(key)
+                positions.append(self.positions[key])
+            self.programs[name] = {'days': list(program.get('days', self.days)), 'slots': positions}
+        self.default_program = self.config.get('default_program') or next(iter(self.programs))
+        if self.default_program not in self.programs:
+            raise ValueError(f"Program default '{self.default_program}' tidak ada di konfigurasi")
+        self.class_programs = [(re.compile(pattern), program)
+                               for pattern, program in self.config.get('class_programs', [])]
+        self.all_days = list(dict.fromkeys(self.days + [day for p in self.programs.values() for day in p['days']]))
+
+        starts = np.array([slot[0] for slot in self.slots], dtype=np.int32)
+        ends = np.array([slot[1] for slot in self.slots], dtype=np.int32)
+        break_starts = np.array([start for start, _ in self.breaks], dtype=np.int32)
+        break_ends = np.array([end for _, end in self.breaks], dtype=np.int32)
+        self.overlap = (starts[:, None] < ends[None, :]) & (ends[:, None] > starts[None, :])
+        self.break_overlap = (starts[:, None] < break_ends[None, :]) & (ends[:, None] > break_starts[None, :])
+        self.in_break = self.break_overlap.any(axis=1)
+        self.online = np.array([slot[2] for slot in self.slots], dtype=bool)
+        self.masks = [interval_mask(start, end) for start, end, _ in self.slots]
+        self.labels = [self._label(slot) for slot in self.slots]
+        self.by_label = {label: position for position, label in enumerate(self.labels)}
+
+    @staticmethod
+    def _minutes(text):
+        parsed, _ = parse_time_string(str(text).strip())
+        if parsed is None:
+            raise ValueError(f"Format waktu tidak valid: {text}")
+        return parsed.hour * 60 + parsed.minute
+
+    @staticmethod
+    def _label(slot):
+        start, end, is_online = slot
+        suffix = " (online)" if is_online else ""
+        return f"{start // 60:02d}:{start % 60:02d}{suffix}", f"{end // 60:02d}:{end % 60:02d}{suffix}"
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def program_of(self, kelas):
+        """Nama program untuk kelas (pola pertama yang cocok, atau program default)"""
+        for pattern, program in self.class_programs:
+            if pattern.search(str(kelas)):
+                return program
+        return self.default_program
+
+    def program_slots(self, program=None):
+        return self.programs[program or self.default_program]['slots']
+
+    def program_days(self, program=None):
+        return self.programs[program or self.default_program]['days']
+
+    def time_slots(self, program=None):
+        """Pasangan (mulai, selesai) gaya lama, dengan sufiks "(online)" untuk slot online"""
+        return [self.labels[position] for position in self.program_slots(program)]
+
+    def offline_slots(self, program=None):
+        return [self.labels[position] for position in self.program_slots(program) if not self.online[position]]
+
+    def break_times(self):
+        return [{"start": time(start // 60, start % 60), "end": time(end // 60, end % 60)}
+                for start, end in self.breaks]
+
+    def position(self, start_label, end_label):
+        """Posisi slot grid untuk pasangan label, atau None bila di luar grid"""
+        return self.by_label.get((start_label, end_label))
+
+
+class OccupancyIndex:
+    """Okupansi mingguan dosen, kelas, dan ruangan dalam bentuk bitmask.
+
+    Setiap (jenis, nama, hari) memiliki satu bitmask resolusi menit. Slot pada
+    grid `time_slots` memakai mask yang sudah dihitung sebelumnya, sedangkan
+    jadwal di luar grid memakai mask yang dibentuk dari menit mulai/selesai,
+    sehingga cek ketersediaan cukup satu operasi AND.
+    """
+
+    KINDS = ('dosen', 'kelas', 'ruangan')
+
+    def __init__(self):
+        self.masks = {}
+        self.members = defaultdict(dict)
+        self.entries = {}
+        self.days = defaultdict(set)  # (jenis, nama) -> hari yang terisi
+
+    @staticmethod
+    def keys_for(schedule):
+        hari = schedule.get('hari')
+        keys = [('dosen', schedule.get('dosen'), hari), ('kelas', schedule.get('kelas'), hari)]
+        ruangan = schedule.get('ruangan')
+        if ruangan and ruangan != 'Online':
+            keys.append(('ruangan', ruangan, hari))
+        return keys
+
+    def add(self, schedule, mask):
+        if not mask:
+            return
+        keys = self.keys_for(schedule)
+        self.entries[id(schedule)] = (keys, mask)
+        for key in keys:
+            self.members[key][id(schedule)] = (schedule, mask)
+            self.masks[key] = self.masks.get(key, 0) | mask
+            self.days[key[:2]].add(key[2])
+
+    def remove(self, schedule):
+        entry = self.entries.pop(id(schedule), None)
+        if entry is None:
+            return
+        keys, _ = entry
+        for key in keys:
+            members = self.members[key]
+            members.pop(id(schedule), None)
+            combined = 0
+            for _, other_mask in members.values():
+                combined |= other_mask
+            if combined:
+                self.masks[key] = combined
+            else:
+                self.masks.pop(key, None)
+                del self.members[key]
+                self.days[key[:2]].discard(key[2])
+
+    def contains(self, schedule):
+        """True jika jadwal ini (atau jadwal yang sama isinya) sudah tercatat di indeks"""
+        if id(schedule) in self.entries:
+            return True
+        members = self.members.get(('dosen', schedule.get('dosen'), schedule.get('hari')))
+        return bool(members) and any(other == schedule for other, _ in members.values())
+
+    def keys(self, kind, name=None, day=None):
+        """Key (jenis, nama, hari) yang terisi, bisa dipersempit per nama dan/atau hari"""
+        if name is not None:
+            days = self.days.get((kind, name), ())
+            if day is not None:
+                return [(kind, name, day)] if day in days else []
+            return [(kind, name, d) for d in days]
+        return [key for key in self.members if key[0] == kind and (day is None or key[2] == day)]
+
+    def mask_for(self, key):
+        return self.masks.get(key, 0)
+
+    def combined_mask(self, key, ignore=None, exclude=None):
+        """Gabungan mask key tanpa jadwal yang sama dengan `ignore` atau yang ada di `exclude`.
+
+        `combined_mask(key, ignore) & mask` setara dengan `overlaps(key, mask, ignore)`.
+        """
+        combined = self.masks.get(key, 0)
+        if not combined or (ignore is None and not exclude):
+            return combined
+        combined = 0
+        for other_id, (other, other_mask) in self.members[key].items():
+            if exclude and other_id in exclude:
+                continue
+            if ignore is None or other != ignore:
+                combined |= other_mask
+        return combined
+
+    def overlaps(self, key, mask, ignore=None, exclude=None):
+        """True jika ada jadwal lain pada key yang beririsan dengan mask.
+
+        `exclude` berisi id jadwal yang dianggap tidak ada (dipakai oleh skenario).
+        """
+        if not self.masks.get(key, 0) & mask:
+            return False
+        for other_id, (other, other_mask) in self.members[key].items():
+            if exclude and other_id in exclude:
+                continue
+            if other_mask & mask and (ignore is None or other != ignore):
+                return True
+        return False
+
+
+class FreeSlotIndex:
+    """Slot grid (hari x time_slots) yang terisi per dosen, kelas dan ruangan.
+
+    Setiap (jenis, nama) menyimpan bitset posisi grid: bit `hari * S + slot` menyala
+    bila slot itu beririsan dengan jadwal mana pun milik key tersebut. Satu baris
+    hari dihitung ulang dari OccupancyIndex setiap kali jadwal ditambah atau
+    dihapus, sehingga slot yang bebas untuk dosen, kelas dan ruangan sekaligus
+    cukup dicari dengan beberapa operasi bit. Baris untuk mask slot grid diambil
+    dari matriks overlap TimeGrid; mask lain dihitung sekali lalu di-cache.
+    """
+
+    def __init__(self, occupancy, days, grid):
+        self.occupancy = occupancy
+        self.days = list(days)
+        self.day_position = {day: i for i, day in enumerate(self.days)}
+        self.slots = [labels + (mask, bool(online))
+                      for labels, mask, online in zip(grid.labels, grid.masks, grid.online)]  # [(mulai, selesai, mask, is_online)]
+        self.width = len(self.slots)
+        self.row_bits = (1 << self.width) - 1
+        self.all_bits = (1 << (self.width * len(self.days))) - 1
+        self.rows = {0: 0}  # mask menit -> bit baris
+        for position, mask in enumerate(grid.masks):
+            self.rows[mask] = sum(1 << other for other in np.nonzero(grid.overlap[position])[0].tolist())
+        self.busy = {}
+        for key in list(occupancy.masks):
+            self.refresh(key)
+
+    def _row(self, mask):
+        bits = self.rows.get(mask)
+        if bits is None:
+            bits = 0
+            for position, (_, _, slot_mask, _) in enumerate(self.slots):
+                if mask & slot_mask:
+                    bits |= 1 << position
+            if len(self.rows) < 65536:
+                self.rows[mask] = bits
+        return bits
+
+    def bit(self, day, slot_position):
+        return 1 << (self.day_position[day] * self.width + slot_position)
+
+    def refresh(self, key):
+        """Hitung ulang baris hari untuk satu key (jenis, nama, hari)"""
+        kind, name, day = key
+        position = self.day_position.get(day)
+        if position is None:
+            return
+        shift = position * self.width
+        bits = self.busy.get((kind, name), 0) & ~(self.row_bits << shift)
+        bits |= self._row(self.occupancy.mask_for(key)) << shift
+        if bits:
+            self.busy[(kind, name)] = bits
+        else:
+            self.busy.pop((kind, name), None)
+
+    def refresh_schedule(self, schedule):
+        for key in OccupancyIndex.keys_for(schedule):
+            self.refresh(key)
+
+    def busy_bits(self, kind, name):
+        return self.busy.get((kind, name), 0)
+
+    def free_bits(self, kind, names):
+        """Posisi grid yang bebas untuk minimal satu nama (mis. salah satu ruangan)"""
+        bits = 0
+        for name in names:
+            bits |= ~self.busy.get((kind, name), 0) & self.all_bits
+            if bits == self.all_bits:
+                break
+        return bits
+
+    def mask_bits(self, day, mask):
+        """Bit grid pada satu hari yang beririsan dengan mask menit"""
+        position = self.day_position.get(day)
+        if position is None:
+            return 0
+        return self._row(mask) << (position * self.width)
+
+
+class ScheduleIndex:
+    """Indeks terbalik dan timetable per dosen, kelas, ruangan dan mata kuliah.
+
+    Setiap nilai field memiliki daftar jadwal yang selalu terurut menurut hari dan
+    jam mulai (diperbarui dengan bisect setiap kali jadwal ditambah/dihapus).
+    Pencarian substring memakai indeks trigram atas nilai-nilai yang berbeda,
+    sehingga tidak perlu memindai seluruh jadwal.
+    """
+
+    FIELDS = ('dosen', 'kelas', 'ruangan', 'mata_kuliah')
+
+    def __init__(self, jam_interval, schedules=()):
+        self.jam_interval = jam_interval
+        self.timetables = {field: {} for field in self.FIELDS}  # nilai -> [(urutan, jadwal)]
+        self.lowered = {field: {} for field in self.FIELDS}  # nilai -> teks kecil
+        self.grams = {field: defaultdict(set) for field in self.FIELDS}  # trigram -> nilai
+        self.order = {}  # id(jadwal) -> urutan (hari, menit mulai, nomor urut)
+        self.sequence = itertools.count()
+        for sched in schedules:
+            self.add(sched)
+
+    @staticmethod
+    def _trigrams(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    @staticmethod
+    def _valid(value):
+        return value is not None and value == value and value != ''
+
+    def _order_key(self, schedule):
+        day = schedule.get('hari')
+        day = WEEKDAYS.index(day) if day in WEEKDAYS else len(WEEKDAYS)
+        interval = self.jam_interval(schedule.get('jam')) if schedule.get('jam') else None
+        return day, interval[0] if interval else MINUTES_PER_DAY, next(self.sequence)
+
+    def add(self, schedule):
+        if id(schedule) in self.order:
+            return
+        key = self._order_key(schedule)
+        self.order[id(schedule)] = key
+        for field in self.FIELDS:
+            value = schedule.get(field)
+            if not self._valid(value):
+                continue
+            timetable = self.timetables[field].get(value)
+            if timetable is None:
+                timetable = self.timetables[field][value] = []
+                text = str(value).lower()
+                self.lowered[field][value] = text
+                for gram in self._trigrams(text):
+                    self.grams[field][gram].add(value)
+            bisect.insort(timetable, (key, schedule))
+
+    def remove(self, schedule):
+        key = self.order.pop(id(schedule), None)
+        if key is None:
+            return
+        for field in self.FIELDS:
+            value = schedule.get(field)
+            timetable = self.timetables[field].get(value) if self._valid(value) else None
+            if not timetable:
+                continue
+            position = bisect.bisect_left(timetable, (key,))
+            if position < len(timetable) and timetable[position][0] == key:
+                del timetable[position]
+            if not timetable:
+                del self.timetables[field][value]
+                for gram in self._trigrams(self.lowered[field].pop(value)):
+                    values = self.grams[field][gram]
+                    values.discard(value)
+                    if not values:
+                        del self.grams[field][gram]
+
+    def has(self, field, value):
+        return value in self.timetables[field]
+
+    def values(self, field):
+        return list(self.timetables[field])
+
+    def timetable(self, field, value):
+        """Jadwal satu dosen/kelas/ruangan/mata kuliah, terurut per hari dan jam"""
+        return [sched for _, sched in self.timetables[field].get(value, ())]
+
+    def matching_values(self, field, query):
+        """Nilai field yang mengandung `query` (tanpa membedakan huruf besar/kecil)"""
+        query = str(query).strip().lower()
+        lowered = self.lowered[field]
+        if not query:
+            return list(lowered)
+        if len(query) < 3:
+            return [value for value, text in lowered.items() if query in text]
+        grams = sorted((self.grams[field].get(gram, set()) for gram in self._trigrams(query)), key=len)
+        candidates = set.intersection(*grams) if grams else set()
+        return [value for value in candidates if query in lowered[value]]
+
+    def search(self, query, fields=None, limit=None):
+        """Jadwal yang salah satu field-nya mengandung `query`, terurut per hari dan jam"""
+        found = {}
+        for field in fields or self.FIELDS:
+            for value in self.matching_values(field, query):
+                for key, sched in self.timetables[field][value]:
+                    found[key] = sched
+        ordered = [found[key] for key in sorted(found)]
+        return ordered[:limit] if limit is not None else ordered
+
+
+class CommandJournal:
+    """Jurnal undo/redo yang menyimpan setiap perubahan sebagai delta yang bisa dibalik.
+
+    Satu perintah (mis. "Generate Ruangan") berisi daftar delta:
+    ('add', daftar, jadwal, posisi), ('remove', daftar, jadwal, posisi),
+    ('update', jadwal, {field: (lama, baru)}), ('break', key, nilai),
+    ('excel', excel_index, {kolom: (lama, baru)}, (hash lama, hash baru)) untuk
+    sel workbook yang ditulis edit, dan ('excel_sync', (hash lama, hash baru),
+    (mtime lama, mtime baru)) untuk status baris Excel yang dipakai reload_changes.
+    Undo/redo hanya menerapkan delta tersebut sehingga biayanya O(delta).
+    Total delta dibatasi `max_deltas`; perintah tertua dibuang bila melebihi batas.
+    """
+
+    MISSING = object()
+
+    def __init__(self, max_deltas=100000):
+        self.max_deltas = max_deltas
+        self.undo_stack = []
+        self.redo_stack = []
+        self.size = 0
+        self.current = None
+        self.depth = 0
+        self.replaying = False
+
+    @contextlib.contextmanager
+    def command(self, label):
+        """Kelompokkan semua delta di dalam blok menjadi satu perintah"""
+        if self.depth == 0:
+            self.current = (label, [])
+        self.depth += 1
+        try:
+            yield
+        finally:
+            self.depth -= 1
+            if self.depth == 0:
+                command, self.current = self.current, None
+                if command[1]:
+                    self._push(command)
+
+    def mark(self):
+        """Posisi delta pada perintah yang sedang berjalan, untuk rollback"""
+        return len(self.current[1]) if self.current is not None else 0
+
+    def rollback(self, generator, mark):
+        """Balikkan delta perintah berjalan sejak `mark` (perintah gagal di tengah jalan)"""
+        if self.current is None:
+            return
+        deltas = self.current[1][mark:]
+        del self.current[1][mark:]
+        self._replay(generator, reversed(deltas), inverse=True)
+
+    def record(self, delta):
+        if self.replaying:
+            return
+        if self.current is not None:
+            self.current[1].append(delta)
+        else:
+            self._push((delta[0], [delta]))
+
+    def _push(self, command):
+        self.undo_stack.append(command)
+        self.size += len(command[1])
+        for dropped in self.redo_stack:
+            self.size -= len(dropped[1])
+        self.redo_stack.clear()
+        while self.size > self.max_deltas and len(self.undo_stack) > 1:
+            self.size -= len(self.undo_stack.pop(0)[1])
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.size = 0
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self, generator):
+        if not self.undo_stack:
+            return None
+        command = self.undo_stack.pop()
+        self._replay(generator, reversed(command[1]), inverse=True)
+        self.redo_stack.append(command)
+        return command[0]
+
+    def redo(self, generator):
+        if not self.redo_stack:
+            return None
+        command = self.redo_stack.pop()
+        self._replay(generator, command[1], inverse=False)
+        self.undo_stack.append(command)
+        return command[0]
+
+    def _replay(self, generator, deltas, inverse):
+        self.replaying = True
+        try:
+            for delta in deltas:
+                kind = delta[0]
+                if kind in ('add', 'remove'):
+                    _, target, schedule, position = delta
+                    if (kind == 'add') == inverse:
+                        generator._raw_delete(target, schedule, position)
+                    else:
+                        generator._raw_insert(target, schedule, position)
+                elif kind == 'update':
+                    _, schedule, changes = delta
+                    index = 0 if inverse else 1
+                    generator._raw_update(schedule, {field: values[index] for field, values in changes.items()})
+                elif kind == 'break':
+                    _, key, value = delta
+                    if inverse:
+                        generator.lecturer_breaks[key].remove(value)
+                        if not generator.lecturer_breaks[key]:
+                            del generator.lecturer_breaks[key]
+                    else:
+                        generator.lecturer_breaks[key].append(value)
+                    generator.touch_lecturer_break(key)
+                elif kind == 'excel':
+                    _, excel_index, cells, hashes = delta
+                    index = 0 if inverse else 1
+                    generator._write_excel_cells({excel_index: {column: values[index] for column, values in cells.items()}})
+                    generator.excel_row_hashes[excel_index] = hashes[index]
+                elif kind == 'excel_sync':
+                    _, hashes, mtimes = delta
+                    index = 0 if inverse else 1
+                    generator.excel_row_hashes, generator.excel_mtime = hashes[index], mtimes[index]
+        finally:
+            self.replaying = False
+
+
+class ScheduleScenario:
+    """Skenario what-if copy-on-write di atas jadwal generator.
+
+    Skenario hanya mencatat jadwal yang ditambah, dihapus, dan dipindah; jadwal
+    dasar tidak disalin. Query konflik melihat jadwal dasar (minus yang dihapus)
+    ditambah overlay, dan commit/discard berbiaya sebanding jumlah perubahan.
+    """
+
+    def __init__(self, generator, name=None):
+        self.generator = generator
+        self.name = name
+        self.added = {}     # id -> jadwal baru
+        self.removed = {}   # id -> jadwal dasar yang dihapus atau dipindah
+        self.moved = {}     # id jadwal dasar -> jadwal pengganti
+        self.origins = {}   # id jadwal pengganti -> jadwal dasar
+        self.overlay = OccupancyIndex()
+
+    def _track(self, schedule):
+        self.overlay.add(schedule, self.generator.jam_mask(schedule.get('jam')))
+
+    def add(self, schedule):
+        self.added[id(schedule)] = schedule
+        self._track(schedule)
+        return schedule
+
+    def remove(self, schedule):
+        key = id(schedule)
+        if key in self.added:
+            del self.added[key]
+            self.overlay.remove(schedule)
+        elif key in self.origins:
+            original = self.origins.pop(key)
+            del self.moved[id(original)]
+            self.overlay.remove(schedule)
+        else:
+            self.removed[key] = schedule
+        return True
+
+    def move(self, schedule, **changes):
+        """Pindahkan jadwal (hari, jam, ruangan, ...) dan kembalikan jadwal penggantinya"""
+        key = id(schedule)
+        replacement = dict(schedule, **changes)
+        if key in self.added:
+            self.remove(schedule)
+            return self.add(replacement)
+        original = self.origins.get(key, schedule)
+        self.revert(original)
+        self.removed[id(original)] = original
+        self.moved[id(original)] = replacement
+        self.origins[id(replacement)] = original
+        self._track(replacement)
+        return replacement
+
+    def revert(self, schedule):
+        """Batalkan perubahan (hapus/pindah) pada satu jadwal dasar"""
+        original = self.origins.get(id(schedule), schedule)
+        replacement = self.moved.pop(id(original), None)
+        if replacement is not None:
+            del self.origins[id(replacement)]
+            self.overlay.remove(replacement)
+        self.removed.pop(id(original), None)
+
+    def is_changed(self, schedule):
+        return id(schedule) in self.removed
+
+    def overlaps(self, key, mask, ignore=None):
+        occupancy = self.generator.get_occupancy()
+        if occupancy.overlaps(key, mask, ignore=ignore, exclude=self.removed):
+            return True
+        return self.overlay.overlaps(key, mask, ignore=ignore)
+
+    def combined_mask(self, key, ignore=None):
+        occupancy = self.generator.get_occupancy()
+        return (occupancy.combined_mask(key, ignore=ignore, exclude=self.removed)
+                | self.overlay.combined_mask(key, ignore=ignore))
+
+    def is_conflict(self, schedule, check_room_capacity=True):
+        return self.generator.is_conflict(schedule, check_room_capacity, scenario=self)
+
+    def schedules(self):
+        """Semua jadwal sebagaimana terlihat di skenario ini"""
+        for sched in self.generator.fixed_schedules + self.generator.generated_schedules:
+            if id(sched) in self.moved:
+                yield self.moved[id(sched)]
+            elif id(sched) not in self.removed:
+                yield sched
+        yield from self.added.values()
+
+    def changes(self):
+        result = [('add', sched) for sched in self.added.values()]
+        for key, original in self.removed.items():
+            if key in self.moved:
+                result.append(('move', original, self.moved[key]))
+            else:
+                result.append(('remove', original))
+        return result
+
+    def evaluate(self):
+        """Ringkasan skenario: jumlah perubahan dan jadwal berubah yang masih bentrok"""
+        changed = list(self.added.values()) + list(self.moved.values())
+        return {
+            'name': self.name,
+            'changes': len(self.added) + len(self.removed),
+            'conflicts': sum(1 for sched in changed if self.is_conflict(sched)),
+        }
+
+    def compare(self, other):
+        """Bandingkan dua skenario atas jadwal dasar yang sama"""
+        def signature(change):
+            return (change[0],) + tuple(tuple(sorted((k, str(v)) for k, v in s.items())) for s in change[1:])
+        mine = {signature(c): c for c in self.changes()}
+        theirs = {signature(c): c for c in other.changes()}
+        return {
+            'self': self.evaluate(),
+            'other': other.evaluate(),
+            'only_self': [mine[k] for k in mine.keys() - theirs.keys()],
+            'only_other': [theirs[k] for k in theirs.keys() - mine.keys()],
+        }
+
+    def commit(self):
+        """Terapkan perubahan ke generator, kosongkan skenario, dan kembalikan jumlah yang berhasil"""
+        generator = self.generator
+        applied = 0
+        for change in self.changes():
+            if change[0] == 'remove':
+                applied += bool(generator.remove_schedule(change[1]))
+            elif change[0] == 'move':
+                applied += bool(generator.edit_schedule(change[1], change[2]))
+            elif change[1].get('source') == 'generated':
+                generator._insert_schedule(change[1])
+                applied += 1
+            else:
+                applied += bool(generator.add_manual_schedule(change[1]))
+        self.discard()
+        return applied
+
+    def discard(self):
+        self.added.clear()
+        self.removed.clear()
+        self.moved.clear()
+        self.origins.clear()
+        self.overlay = OccupancyIndex()
+
+
+class RoomRegistry:
+    """Ruangan yang dikelompokkan per lantai dan per departemen.
+
+    Dibangun sekali saat data ruangan dimuat. Setiap departemen memiliki daftar
+    kandidat (lantai preferensi) yang terurut menurut kapasitas sehingga ruangan
+    terkecil yang muat bisa dicari dengan bisect.
+    """
+
+    def __init__(self, rooms, department_preferences, default_capacity=30):
+        self.default_capacity = default_capacity
+        self.rooms = list(rooms)
+        self.by_name = {room['nama']: room for room in self.rooms}
+        self.by_floor = defaultdict(list)
+        for room in self.rooms:
+            self.by_floor[room.get('lantai')].append(room)
+
+        self.all_rooms = self._sorted_by_capacity(self.rooms)
+        self.by_department = {}
+        for department, floors in department_preferences.items():
+            rooms_on_floors = [room for floor in floors for room in self.by_floor.get(floor, [])]
+            self.by_department[department] = self._sorted_by_capacity(rooms_on_floors)
+        self.default_department = self.by_department.get('default', self.all_rooms)
+
+    def capacity(self, room):
+        capacity = room.get('kapasitas', self.default_capacity)
+        try:
+            capacity = float(capacity)
+        except (TypeError, ValueError):
+            return self.default_capacity
+        return self.default_capacity if capacity != capacity else capacity
+
+    def _sorted_by_capacity(self, rooms):
+        ordered = sorted(rooms, key=self.capacity)
+        return [self.capacity(room) for room in ordered], ordered
+
+    def candidate_groups(self, department, student_count=0, any_floor=False, rng=None):
+        """Yield kelompok ruangan berkapasitas sama, dari yang terkecil yang muat.
+
+        Urutan di dalam satu kelompok diacak dengan `rng` tanpa mengubah daftar asli.
+        """
+        if any_floor:
+            capacities, rooms = self.all_rooms
+        else:
+            capacities, rooms = self.by_department.get(department, self.default_department)
+        try:
+            position = bisect.bisect_left(capacities, float(student_count))
+        except (TypeError, ValueError):
+            position = 0
+        while position < len(rooms):
+            end = bisect.bisect_right(capacities, capacities[position], position)
+            group = rooms[position:end]
+            if rng is not None and len(group) > 1:
+                group = rng.sample(group, len(group))
+            yield group
+            position = end
+
+
+class SessionRow:
+    """View ringan satu baris SessionTable yang bisa dipakai seperti dict jadwal"""
+
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    def __getitem__(self, field):
+        value = self.table.value(field, self.index)
+        if value is SessionTable.MISSING:
+            raise KeyError(field)
+        return value
+
+    def get(self, field, default=None):
+        value = self.table.value(field, self.index)
+        return default if value is SessionTable.MISSING else value
+
+    def __contains__(self, field):
+        return field in self.table.fields
+
+    def keys(self):
+        return list(self.table.fields)
+
+    def to_dict(self):
+        return {field: self.table.value(field, self.index) for field in self.table.fields}
+
+    def copy(self):
+        return self.to_dict()
+
+    def __eq__(self, other):
+        if isinstance(other, SessionRow):
+            return self.table is other.table and self.index == other.index
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+
+class SessionTable:
+    """Tabel jadwal kolumnar untuk dataset skala kampus.
+
+    Kolom numerik (menit mulai/selesai, SKS, semester, jumlah mahasiswa) disimpan
+    sebagai array NumPy, sedangkan kolom teks (dosen, mata kuliah, kelas, ruangan,
+    hari, jam) disimpan sebagai kode kategori dengan tabel string bersama.
+    """
+
+    MISSING = object()
+    CATEGORICAL = ('source', 'dosen', 'mata_kuliah', 'kelas', 'hari', 'jam', 'ruangan')
+    NUMERIC = ('semester', 'sks', 'jumlah_mahasiswa')
+    FIELDS = ('source', 'excel_index', 'dosen', 'mata_kuliah', 'kelas', 'hari', 'jam',
+              'semester', 'sks', 'ruangan', 'jumlah_mahasiswa')
+
+    def __init__(self, size):
+        self.size = size
+        self.fields = self.FIELDS
+        self.codes = {}
+        self.categories = {}
+        self.lookup = {}
+        self.numeric = {}
+        self.excel_index = np.full(size, -1, dtype=np.int64)
+        self.start = np.full(size, -1, dtype=np.int16)
+        self.end = np.full(size, -1, dtype=np.int16)
+        self.online = np.zeros(size, dtype=bool)
+        self.rows = None  # Referensi ke dict asli, jika dibangun dari daftar jadwal
+
+    @classmethod
+    def from_schedules(cls, schedules, jam_interval, keep_rows=True):
+        schedules = list(schedules)
+        table = cls(len(schedules))
+        for field in cls.CATEGORICAL:
+            values = np.empty(len(schedules), dtype=object)
+            values[:] = [sched.get(field) for sched in schedules]
+            codes, uniques = pd.factorize(values)
+            table.codes[field] = codes.astype(np.int32)
+            table.categories[field] = list(uniques)
+            table.lookup[field] = {value: code for code, value in enumerate(uniques)}
+        for field in cls.NUMERIC:
+            values = pd.to_numeric(pd.Series([sched.get(field) for sched in schedules], dtype=object),
+                                   errors='coerce')
+            table.numeric[field] = values.to_numpy(dtype=np.float32)
+        table.excel_index[:] = [
+            sched['excel_index'] if isinstance(sched.get('excel_index'), (int, np.integer)) else -1
+            for sched in schedules
+        ]
+
+        # Parse setiap nilai jam unik sekali, lalu sebarkan lewat kode kategori
+        jam_codes = table.codes['jam']
+        intervals = [jam_interval(jam) if jam else None for jam in table.categories['jam']]
+        unique_start = np.array([i[0] if i else -1 for i in intervals] + [-1], dtype=np.int16)
+        unique_end = np.array([i[1] if i else -1 for i in intervals] + [-1], dtype=np.int16)
+        unique_online = np.array([bool(i and i[2]) for i in intervals] + [False], dtype=bool)
+        table.start = unique_start[jam_codes]
+        table.end = unique_end[jam_codes]
+        table.online = unique_online[jam_codes]
+        if keep_rows:
+            table.rows = schedules
+        return table
+
+    def __len__(self):
+        return self.size
+
+    def value(self, field, index):
+        if field in self.codes:
+            code = self.codes[field][index]
+            return None if code < 0 else self.categories[field][code]
+        if field in self.numeric:
+            return float(self.numeric[field][index])
+        if field == 'excel_index':
+            value = int(self.excel_index[index])
+            return value if value >= 0 else self.MISSING
+        return self.MISSING
+
+    def code(self, field, value):
+        return self.lookup[field].get(value, -2)
+
+    def row(self, index):
+        """Dict asli jika tersedia, selain itu view SessionRow"""
+        if self.rows is not None:
+            return self.rows[index]
+        return SessionRow(self, index)
+
+    def scheduled(self):
+        return (self.start >= 0) & (self.end > self.start)
+
+    def filter(self, **criteria):
+        """Indeks baris yang cocok dengan semua kriteria kolom teks, mis. filter(dosen=..., hari=...)"""
+        selected = np.ones(self.size, dtype=bool)
+        for field, value in criteria.items():
+            selected &= self.codes[field] == self.code(field, value)
+        return np.nonzero(selected)[0]
+
+    def room_mask(self):
+        codes = self.codes['ruangan']
+        mask = codes >= 0
+        for value in ('', 'Online'):
+            mask &= codes != self.code('ruangan', value)
+        return mask
+
+    def overlap_pairs(self, field):
+        """Semua pasangan (i, j), i < j, dengan nilai `field` dan hari sama serta waktu beririsan"""
+        valid = self.scheduled() & (self.codes[field] >= 0)
+        if field == 'ruangan':
+            valid &= self.room_mask()
+        idx = np.nonzero(valid)[0]
+        if not len(idx):
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+        n_days = len(self.categories['hari']) + 1
+        group = self.codes[field][idx].astype(np.int64) * n_days + (self.codes['hari'][idx] + 1)
+        starts = self.start[idx].astype(np.int64)
+        ends = self.end[idx].astype(np.int64)
+        order = np.lexsort((starts, group))
+        idx, group, starts, ends = idx[order], group[order], starts[order], ends[order]
+
+        # Setelah diurutkan per (grup, mulai), pasangan beririsan untuk baris k adalah
+        # baris setelahnya pada grup yang sama dengan waktu mulai < waktu selesai baris k.
+        span = MINUTES_PER_DAY + 1
+        keys = group * span + starts
+        upper = np.searchsorted(keys, group * span + ends, side='left')
+        counts = np.maximum(upper - np.arange(len(idx)) - 1, 0)
+        left = np.repeat(np.arange(len(idx)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        right = left + 1 + offsets
+        first = np.minimum(idx[left], idx[right])
+        second = np.maximum(idx[left], idx[right])
+        order = np.lexsort((second, first))
+        return first[order], second[order]
+
+    def capacity_violations(self, room_capacities):
+        capacity_by_code = np.array(
+            [pd.to_numeric(room_capacities.get(name, 0), errors='coerce') for name in self.categories['ruangan']] + [0],
+            dtype=np.float64
+        )
+        capacity = capacity_by_code[self.codes['ruangan']]
+        students = self.numeric['jumlah_mahasiswa']
+        return np.nonzero(self.room_mask() & self.scheduled() & (students > capacity))[0]
+
+    def break_violations(self, break_intervals):
+        not_online = self.codes['ruangan'] != self.code('ruangan', 'Online')
+        hits = np.zeros(self.size, dtype=bool)
+        for break_start, break_end in break_intervals:
+            hits |= (self.start < break_end) & (self.end > break_start)
+        return np.nonzero(not_online & self.scheduled() & hits)[0]
+
+    def room_slot_occupancy(self, room_names, days, slots):
+        """Array bool [ruangan, hari, slot] yang bernilai True jika slot terisi"""
+        occupied = np.zeros((len(room_names), len(days), len(slots)), dtype=bool)
+        room_pos = np.full(len(self.categories['ruangan']) + 1, -1, dtype=np.int64)
+        for pos, name in enumerate(room_names):
+            code = self.code('ruangan', name)
+            if code >= 0:
+                room_pos[code] = pos
+        day_pos = np.full(len(self.categories['hari']) + 1, -1, dtype=np.int64)
+        for pos, day in enumerate(days):
+            code = self.code('hari', day)
+            if code >= 0:
+                day_pos[code] = pos
+        rooms = room_pos[self.codes['ruangan']]
+        session_days = day_pos[self.codes['hari']]
+        selected = np.nonzero((rooms >= 0) & (session_days >= 0) & self.scheduled())[0]
+        slot_start = np.array([slot[0] for slot in slots], dtype=np.int64)
+        slot_end = np.array([slot[1] for slot in slots], dtype=np.int64)
+        overlap = ((self.start[selected, None] < slot_end[None, :]) &
+                   (self.end[selected, None] > slot_start[None, :]))
+        rows, slot_idx = np.nonzero(overlap)
+        occupied[rooms[selected][rows], session_days[selected][rows], slot_idx] = True
+        return occupied
+
+    def to_frame(self):
+        data = {'excel_index': pd.Series(self.excel_index).where(self.excel_index >= 0)}
+        for field in self.CATEGORICAL:
+            categories = np.array(list(self.categories[field]) + [None], dtype=object)
+            data[field] = categories[self.codes[field]]
+        for field in self.NUMERIC:
+            data[field] = self.numeric[field]
+        return pd.DataFrame(data, columns=list(self.FIELDS))
+
+    def to_csv(self, path):
+        self.to_frame().to_csv(path, index=False)
+        return path
+
+
+class SessionSnapshot:
+    """Snapshot read-only dari SessionTable, ruangan dan indeks okupansi dalam satu buffer.
+
+    Layout: b'SSNP', panjang header (uint32), header JSON, lalu array lebar-tetap
+    yang masing-masing rata 8 byte. Kolom teks disimpan sebagai kode int32 dengan
+    tabel string (offset int64 + byte UTF-8 + tag tipe), mask okupansi sebagai
+    baris uint64. Buffer dipublikasikan lewat `multiprocessing.shared_memory`
+    atau file yang di-mmap, sehingga worker cukup attach (hanya header yang
+    diparse) dan membaca array sebagai view NumPy tanpa menyalin.
+    """
+
+    MAGIC = b'SSNP'
+    MASK_WORDS = (MINUTES_PER_DAY + 63) // 64
+    TAG_STR, TAG_INT, TAG_FLOAT = 0, 1, 2
+    _deferred = []  # snapshot yang close-nya tertunda karena view masih dipegang
+
+    def __init__(self, buffer, owner=None):
+        self.buffer = memoryview(buffer)
+        self.owner = owner  # SharedMemory atau mmap yang harus tetap hidup selama dipakai
+        if bytes(self.buffer[:4]) != self.MAGIC:
+            raise ValueError("Bukan snapshot jadwal")
+        header_size = int.from_bytes(self.buffer[4:8], 'little')
+        self.header = json.loads(bytes(self.buffer[8:8 + header_size]).decode('utf-8'))
+        self._strings = {}
+        self._table = None
+        self._occupancy = None
+
+    @property
+    def name(self):
+        return getattr(self.owner, 'name', None)
+
+    # --- Pembentukan buffer ---
+
+    @classmethod
+    def _string_arrays(cls, name, values):
+        encoded = []
+        tags = np.zeros(len(values), dtype=np.uint8)
+        for position, value in enumerate(values):
+            if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, float, np.integer, np.floating)):
+                encoded.append(str(value).encode('utf-8'))
+            elif isinstance(value, (int, np.integer)):
+                tags[position] = cls.TAG_INT
+                encoded.append(str(int(value)).encode('utf-8'))
+            else:
+                tags[position] = cls.TAG_FLOAT
+                encoded.append(repr(float(value)).encode('utf-8'))
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(item) for item in encoded])
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return {f"{name}.offsets": offsets, f"{name}.data": data, f"{name}.tags": tags}
+
+    @classmethod
+    def pack(cls, table, rooms=(), occupancy=None):
+        """Bentuk isi buffer snapshot (bytes) dari SessionTable, daftar ruangan dan OccupancyIndex"""
+        arrays = {
+            'excel_index': table.excel_index,
+            'start': table.start,
+            'end': table.end,
+            'online': table.online,
+        }
+        for field in table.CATEGORICAL:
+            arrays[f"codes.{field}"] = table.codes[field]
+            arrays.update(cls._string_arrays(f"categories.{field}", table.categories[field]))
+        for field in table.NUMERIC:
+            arrays[f"numeric.{field}"] = table.numeric[field]
+
+        rooms = list(rooms)
+        arrays.update(cls._string_arrays('rooms.nama', [room['nama'] for room in rooms]))
+        arrays['rooms.kapasitas'] = pd.to_numeric(
+            pd.Series([room.get('kapasitas') for room in rooms], dtype=object), errors='coerce'
+        ).to_numpy(dtype=np.float64)
+        arrays['rooms.lantai'] = np.array(
+            [room['lantai'] if isinstance(room.get('lantai'), (int, np.integer)) else -1 for room in rooms],
+            dtype=np.int16
+        )
+
+        keys = list(occupancy.masks) if occupancy is not None else []
+        arrays['occupancy.kind'] = np.array([OccupancyIndex.KINDS.index(key[0]) for key in keys], dtype=np.uint8)
+        arrays.update(cls._string_arrays('occupancy.name', [key[1] for key in keys]))
+        arrays.update(cls._string_arrays('occupancy.day', [key[2] for key in keys]))
+        width = cls.MASK_WORDS * 8
+        masks = b''.join(occupancy.masks[key].to_bytes(width, 'little') for key in keys)
+        arrays['occupancy.masks'] = np.frombuffer(masks, dtype=np.uint64).reshape(len(keys), cls.MASK_WORDS)
+
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            arrays[name] = array
+            layout[name] = [array.dtype.str, list(array.shape), offset]
+            offset += -(-array.nbytes // 8) * 8
+        header = json.dumps({'size': len(table), 'arrays': layout}).encode('utf-8')
+        base = -(-(8 + len(header)) // 8) * 8
+        buffer = bytearray(base + offset)
+        buffer[:4] = cls.MAGIC
+        buffer[4:8] = len(header).to_bytes(4, 'little')
+        buffer[8:8 + len(header)] = header
+        for name, array in arrays.items():
+            start = base + layout[name][2]
+            buffer[start:start + array.nbytes] = array.tobytes()
+        return bytes(buffer)
+
+    @classmethod
+    def publish(cls, table, rooms=(), occupancy=None):
+        """Salin snapshot ke shared memory baru; worker attach lewat `attach(snapshot.name)`"""
+        data = cls.pack(table, rooms, occupancy)
+        memory = shared_memory.SharedMemory(create=True, size=len(data))
+        memory.buf[:len(data)] = data
+        return cls(memory.buf, memory)
+
+    @classmethod
+    def attach(cls, name):
+        try:
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13
+            memory = shared_memory.SharedMemory(name=name)
+        return cls(memory.buf, memory)
+
+    @classmethod
+    def write(cls, path, table, rooms=(), occupancy=None):
+        with open(path, 'wb') as f:
+            f.write(cls.pack(table, rooms, occupancy))
+        return path
+
+    @classmethod
+    def open(cls, path):
+        """Buka snapshot dari file lewat mmap (read-only)"""
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(mapped, mapped)
+
+    def close(self):
+        """Lepas buffer; kembalikan False bila pelepasan ditunda.
+
+        View NumPy dari `table()`/`array()` yang masih dipegang pemanggil mengunci
+        buffer. Dalam kasus itu close tidak gagal: cache view milik snapshot dibuang,
+        snapshot dicatat sebagai tertunda dan pelepasannya dicoba ulang pada close
+        berikutnya (snapshot mana pun), setelah view terakhir hilang.
+        """
+        self._table = None
+        self._occupancy = None
+        self._strings = {}
+        pending = SessionSnapshot._deferred
+        SessionSnapshot._deferred = [snapshot for snapshot in pending
+                                     if snapshot is not self and not snapshot._release()]
+        if self._release():
+            return True
+        SessionSnapshot._deferred.append(self)
+        return False
+
+    def _release(self):
+        try:
+            self.buffer.release()
+            if self.owner is not None:
+                self.owner.close()
+        except BufferError:
+            return False
+        return True
+
+    def unlink(self):
+        if isinstance(self.owner, shared_memory.SharedMemory):
+            self.owner.unlink()
+
+    # --- Pembacaan ---
+
+    def array(self, name):
+        """View NumPy (tanpa salinan) atas satu array di buffer"""
+        dtype, shape, offset = self.header['arrays'][name]
+        header_size = int.from_bytes(self.buffer[4:8], 'little')
+        base = -(-(8 + header_size) // 8) * 8
+        count = int(np.prod(shape)) if shape else 1
+        return np.frombuffer(self.buffer, dtype=np.dtype(dtype), count=count, offset=base + offset).reshape(shape)
+
+    def strings(self, name):
+        """Isi tabel string (di-cache setelah dibaca pertama kali)"""
+        if name not in self._strings:
+            offsets = self.array(f"{name}.offsets")
+            data = self.array(f"{name}.data").tobytes()
+            tags = self.array(f"{name}.tags")
+            values = []
+            for position in range(len(tags)):
+                text = data[offsets[position]:offsets[position + 1]].decode('utf-8')
+                if tags[position] == self.TAG_INT:
+                    values.append(int(text))
+                elif tags[position] == self.TAG_FLOAT:
+                    values.append(float(text))
+                else:
+                    values.append(text)
+            self._strings[name] = values
+        return self._strings[name]
+
+    def table(self):
+        """SessionTable yang array-nya berupa view atas buffer snapshot (baris berupa SessionRow)"""
+        if self._table is None:
+            table = SessionTable(0)
+            table.size = self.header['size']
+            table.excel_index = self.array('excel_index')
+            table.start = self.array('start')
+            table.end = self.array('end')
+            table.online = self.array('online')
+            for field in SessionTable.CATEGORICAL:
+                table.codes[field] = self.array(f"codes.{field}")
+                table.categories[field] = self.strings(f"categories.{field}")
+                table.lookup[field] = {value: code for code, value in enumerate(table.categories[field])}
+            for field in SessionTable.NUMERIC:
+                table.numeric[field] = self.array(f"numeric.{field}")
+            self._table = table
+        return self._table
+
+    def rooms(self):
+        capacities = self.array('rooms.kapasitas')
+        floors = self.array('rooms.lantai')
+        return [
+            {'nama': name, 'kapasitas': float(capacity), 'lantai': int(floor) if floor >= 0 else None}
+            for name, capacity, floor in zip(self.strings('rooms.nama'), capacities, floors)
+        ]
+
+    def occupancy_mask(self, kind, name, day):
+        """Bitmask okupansi (jenis, nama, hari) seperti OccupancyIndex.mask_for"""
+        if self._occupancy is None:
+            kinds = self.array('occupancy.kind')
+            names = self.strings('occupancy.name')
+            days = self.strings('occupancy.day')
+            self._occupancy = {
+                (OccupancyIndex.KINDS[kind_code], key_name, key_day): position
+                for position, (kind_code, key_name, key_day) in enumerate(zip(kinds, names, days))
+            }
+        position = self._occupancy.get((kind, name, day))
+        if position is None:
+            return 0
+        return int.from_bytes(self.array('occupancy.masks')[position].tobytes(), 'little')
+
+
+class RoomUtilization:
+    """Analitik pemakaian ruangan per ruangan, lantai, hari, dan slot.
+
+    Semua angka dihitung dari SessionTable dengan operasi vektor: okupansi
+    [ruangan, hari, slot], rasio isi kursi (jumlah_mahasiswa / kapasitas) dan
+    puncak jumlah sesi yang berjalan bersamaan.
+    """
+
+    def __init__(self, generator, days=None):
+        self.days = days or generator.time_grid.days
+        self.rooms = list(generator.available_rooms)
+        self.slots = generator.time_grid.offline_slots()
+        registry = generator.get_room_registry()
+        table = generator.build_session_table(keep_rows=False)
+        room_names = [room['nama'] for room in self.rooms]
+        self.floors = np.array([room.get('lantai') for room in self.rooms], dtype=object)
+        self.capacities = np.array([registry.capacity(room) for room in self.rooms], dtype=np.float64)
+
+        slot_minutes = [generator.time_range_minutes(start, end)[:2] for start, end in self.slots]
+        self.occupied = table.room_slot_occupancy(room_names, self.days, slot_minutes)
+        self.room_utilization = self.occupied.mean(axis=(1, 2)) if self.occupied.size else np.zeros(len(self.rooms))
+        self.day_utilization = self.occupied.mean(axis=(0, 2)) if self.occupied.size else np.zeros(len(self.days))
+        self.slot_utilization = self.occupied.mean(axis=(0, 1)) if self.occupied.size else np.zeros(len(self.slots))
+        self.heatmap = self.occupied.mean(axis=2) if self.occupied.size else np.zeros((len(self.rooms), len(self.days)))
+
+        # Posisi ruangan dan hari untuk setiap sesi yang menempati ruangan fisik
+        room_pos = np.full(len(table.categories['ruangan']) + 1, -1, dtype=np.int64)
+        for pos, name in enumerate(room_names):
+            code = table.code('ruangan', name)
+            if code >= 0:
+                room_pos[code] = pos
+        day_pos = np.full(len(table.categories['hari']) + 1, -1, dtype=np.int64)
+        for pos, day in enumerate(self.days):
+            code = table.code('hari', day)
+            if code >= 0:
+                day_pos[code] = pos
+        session_rooms = room_pos[table.codes['ruangan']]
+        session_days = day_pos[table.codes['hari']]
+        selected = (session_rooms >= 0) & table.scheduled()
+        rooms = session_rooms[selected]
+        self.sessions_per_room = np.bincount(rooms, minlength=len(self.rooms))
+
+        students = table.numeric['jumlah_mahasiswa'][selected].astype(np.float64)
+        capacity = self.capacities[rooms]
+        valid_fill = ~np.isnan(students) & (capacity > 0)
+        fill = np.where(valid_fill, students / np.where(capacity > 0, capacity, 1), 0.0)
+        fill_sum = np.bincount(rooms, weights=fill, minlength=len(self.rooms))
+        fill_count = np.bincount(rooms, weights=valid_fill.astype(np.float64), minlength=len(self.rooms))
+        self.fill_sum, self.fill_count = fill_sum, fill_count
+        self.seat_fill = np.divide(fill_sum, fill_count, out=np.full(len(self.rooms), np.nan), where=fill_count > 0)
+
+        in_week = selected & (session_days >= 0)
+        starts = table.start[in_week].astype(np.int64)
+        ends = table.end[in_week].astype(np.int64)
+        days = session_days[in_week]
+        self.room_peak = self._peak(session_rooms[in_week] * len(self.days) + days, starts, ends,
+                                    len(self.rooms) * len(self.days)).reshape(len(self.rooms), len(self.days)).max(axis=1) \
+            if len(self.rooms) else np.zeros(0, dtype=np.int64)
+        self.day_peak = self._peak(days, starts, ends, len(self.days))
+
+    @staticmethod
+    def _peak(groups, starts, ends, n_groups):
+        """Puncak jumlah interval yang beririsan per grup (sweep dengan searchsorted)"""
+        peak = np.zeros(n_groups, dtype=np.int64)
+        if not len(groups):
+            return peak
+        span = MINUTES_PER_DAY + 1
+        start_keys = np.sort(groups * span + starts)
+        end_keys = np.sort(groups * span + ends)
+        active = (np.searchsorted(start_keys, start_keys, side='right') -
+                  np.searchsorted(end_keys, start_keys, side='right'))
+        np.maximum.at(peak, start_keys // span, active)
+        return peak
+
+    def floor_summary(self):
+        rows = []
+        for floor in sorted(set(self.floors.tolist()), key=str):
+            on_floor = self.floors == floor
+            fill_count = self.fill_count[on_floor].sum()
+            rows.append({
+                'Lantai': floor,
+                'Jumlah Ruangan': int(on_floor.sum()),
+                'Utilisasi (%)': round(float(self.room_utilization[on_floor].mean()) * 100, 1),
+                'Rata-rata Isi Kursi (%)': round(float(self.fill_sum[on_floor].sum() / fill_count) * 100, 1)
+                if fill_count else None,
+                'Sesi': int(self.sessions_per_room[on_floor].sum()),
+            })
+        return pd.DataFrame(rows)
+
+    def to_frames(self):
+        rooms = pd.DataFrame({
+            'Ruangan': [room['nama'] for room in self.rooms],
+            'Lantai': self.floors,
+            'Kapasitas': self.capacities,
+            'Sesi': self.sessions_per_room,
+            'Slot Terisi': self.occupied.sum(axis=(1, 2)) if self.occupied.size else 0,
+            'Utilisasi (%)': np.round(self.room_utilization * 100, 1),
+            'Rata-rata Isi Kursi (%)': np.round(self.seat_fill * 100, 1),
+            'Puncak Bersamaan': self.room_peak,
+        })
+        days = pd.DataFrame({
+            'Hari': self.days,
+            'Utilisasi (%)': np.round(self.day_utilization * 100, 1),
+            'Puncak Bersamaan': self.day_peak,
+        })
+        slots = pd.DataFrame({
+            'Slot': [f"{start} - {end}" for start, end in self.slots],
+            'Utilisasi (%)': np.round(self.slot_utilization * 100, 1),
+        })
+        heatmap = pd.DataFrame(np.round(self.heatmap * 100, 1), columns=self.days,
+                               index=[room['nama'] for room in self.rooms])
+        heatmap.index.name = 'Ruangan'
+        return {
+            'Ruangan': rooms,
+            'Lantai': self.floor_summary(),
+            'Hari': days,
+            'Slot': slots,
+            'Heatmap': heatmap.reset_index(),
+        }
+
+    def export(self, path):
+        """Simpan laporan ke .xlsx (satu sheet per tabel) atau .csv (satu file per tabel)"""
+        frames = self.to_frames()
+        if path.lower().endswith('.csv'):
+            base = path[:-4]
+            paths = []
+            for name, frame in frames.items():
+                frame_path = f"{base}_{name.lower()}.csv"
+                frame.to_csv(frame_path, index=False)
+                paths.append(frame_path)
+            return paths
+        with pd.ExcelWriter(path) as writer:
+            for name, frame in frames.items():
+                frame.to_excel(writer, sheet_name=name, index=False)
+        return [path]
+
+
+class ScheduleObjective:
+    """Fungsi objektif berbobot untuk batasan lunak (semakin kecil semakin baik).
+
+    Komponen:
+    - lecturer_gaps: menit jeda di antara sesi dosen dalam satu hari
+    - daily_load: kelebihan SKS dosen per hari di atas `max_daily_sks`
+    - floor_changes: selisih lantai antar sesi berurutan (dosen dan kelas) yang
+      berjarak paling lama `walk_minutes`
+    - online_overuse: kelebihan sesi online per kelas di atas `max_online_per_class`
+    - wasted_seats: kursi kosong pada sesi luring (kapasitas - jumlah mahasiswa)
+
+    Nilai disimpan per kunci (dosen/kelas, hari) dan per kelas, sehingga menambah,
+    menghapus atau memindahkan satu sesi hanya menghitung ulang kunci yang tersentuh
+    (beberapa sesi per kunci), bukan seluruh jadwal.
+    """
+
+    COMPONENTS = ('lecturer_gaps', 'daily_load', 'floor_changes', 'online_overuse', 'wasted_seats')
+    DEFAULT_WEIGHTS = {
+        'lecturer_gaps': 0.05,
+        'daily_load': 5.0,
+        'floor_changes': 2.0,
+        'online_overuse': 10.0,
+        'wasted_seats': 0.1,
+    }
+
+    def __init__(self, generator, weights=None, max_daily_sks=8, max_online_per_class=2, walk_minutes=20):
+        self.generator = generator
+        self.weights = dict(self.DEFAULT_WEIGHTS, **(weights or {}))
+        self.max_daily_sks = max_daily_sks
+        self.max_online_per_class = max_online_per_class
+        self.walk_minutes = walk_minutes
+        self.stale = False
+        self.rebuild()
+
+    def rebuild(self):
+        """Hitung ulang seluruh skor dari jadwal generator saat ini"""
+        self.entries = {}  # (kind, name, hari) -> [(mulai, selesai, id, sks, lantai)] terurut
+        self.key_terms = {}  # (kind, name, hari) -> {komponen: nilai mentah}
+        self.online = defaultdict(int)  # kelas -> jumlah sesi online
+        self.sessions = {}  # id(jadwal) -> (entry, kunci, kelas, online, kursi kosong)
+        self.totals = dict.fromkeys(self.COMPONENTS, 0.0)
+        self.stale = False
+        for sched in self.generator.fixed_schedules + self.generator.generated_schedules:
+            self.add(sched)
+
+    @staticmethod
+    def _number(value):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return 0.0
+        return 0.0 if value != value else value
+
+    def _session(self, schedule):
+        """Data yang dinilai dari satu jadwal, atau None bila belum terjadwal"""
+        if not schedule.get('hari') or not schedule.get('jam'):
+            return None
+        interval = self.generator.jam_interval(schedule['jam'])
+        if interval is None:
+            return None
+        start, end, is_online = interval
+        room_name = schedule.get('ruangan')
+        is_online = is_online or room_name == 'Online'
+        registry = self.generator.room_registry
+        room = registry.by_name.get(room_name) if registry is not None and not is_online else None
+        floor = room.get('lantai') if room else None
+        wasted = max(0.0, registry.capacity(room) - self._number(schedule.get('jumlah_mahasiswa', 0))) if room else 0.0
+        entry = (start, end, id(schedule), self._number(schedule.get('sks', 0)), floor)
+        keys = (('dosen', schedule.get('dosen'), schedule['hari']), ('kelas', schedule.get('kelas'), schedule['hari']))
+        return entry, keys, schedule.get('kelas'), int(is_online), wasted
+
+    def _terms(self, kind, entries):
+        """Nilai mentah komponen untuk satu kunci (dosen/kelas, hari)"""
+        floor_changes = 0
+        for previous, current in zip(entries, entries[1:]):
+            if (previous[4] is not None and current[4] is not None
+                    and current[0] - previous[1] <= self.walk_minutes):
+                floor_changes += abs(current[4] - previous[4])
+        terms = {'floor_changes': floor_changes}
+        if kind == 'dosen':
+            busy = sum(end - start for start, end, *_ in entries)
+            span = max(end for _, end, *_ in entries) - entries[0][0]
+            terms['lecturer_gaps'] = max(0, span - busy)
+            terms['daily_load'] = max(0.0, sum(entry[3] for entry in entries) - self.max_daily_sks)
+        return terms
+
+    def _online_excess(self, count):
+        return max(0, count - self.max_online_per_class)
+
+    def _refresh(self, key):
+        entries = self.entries.get(key)
+        terms = self._terms(key[0], entries) if entries else {}
+        for component, value in terms.items():
+            self.totals[component] += value
+        for component, value in self.key_terms.pop(key, {}).items():
+            self.totals[component] -= value
+        if entries:
+            self.key_terms[key] = terms
+        else:
+            self.entries.pop(key, None)
+
+    def add(self, schedule):
+        session = self._session(schedule)
+        if session is None or id(schedule) in self.sessions:
+            return
+        entry, keys, kelas, is_online, wasted = session
+        self.sessions[id(schedule)] = session
+        for key in keys:
+            bisect.insort(self.entries.setdefault(key, []), entry)
+            self._refresh(key)
+        if is_online:
+            self.totals['online_overuse'] += self._online_excess(self.online[kelas] + 1) - self._online_excess(self.online[kelas])
+            self.online[kelas] += 1
+        self.totals['wasted_seats'] += wasted
+
+    def remove(self, schedule):
+        session = self.sessions.pop(id(schedule), None)
+        if session is None:
+            return
+        entry, keys, kelas, is_online, wasted = session
+        for key in keys:
+            entries = self.entries[key]
+            del entries[bisect.bisect_left(entries, entry)]
+            self._refresh(key)
+        if is_online:
+            self.totals['online_overuse'] += self._online_excess(self.online[kelas] - 1) - self._online_excess(self.online[kelas])
+            self.online[kelas] -= 1
+        self.totals['wasted_seats'] -= wasted
+
+    def _weighted(self, raw):
+        result = {component: self.weights.get(component, 0) * raw[component] for component in self.COMPONENTS}
+        result['total'] = sum(result.values())
+        return result
+
+    def breakdown(self):
+        """Skor berbobot per komponen beserta total"""
+        return self._weighted(self.totals)
+
+    def score(self):
+        return self.breakdown()['total']
+
+    def delta(self, removed=(), added=()):
+        """Perubahan skor berbobot bila `removed` dihapus dan `added` ditambahkan.
+
+        Tidak mengubah state; hanya kunci yang disentuh jadwal tersebut yang dihitung ulang.
+        """
+        raw = dict.fromkeys(self.COMPONENTS, 0.0)
+        touched = {}  # kunci -> (id yang dihapus, entry baru)
+        online = defaultdict(int)
+        for sched in removed:
+            session = self.sessions.get(id(sched))
+            if session is None:
+                continue
+            entry, keys, kelas, is_online, wasted = session
+            for key in keys:
+                touched.setdefault(key, (set(), []))[0].add(entry[2])
+            online[kelas] -= is_online
+            raw['wasted_seats'] -= wasted
+        for sched in added:
+            session = self._session(sched)
+            if session is None:
+                continue
+            entry, keys, kelas, is_online, wasted = session
+            for key in keys:
+                touched.setdefault(key, (set(), []))[1].append(entry)
+            online[kelas] += is_online
+            raw['wasted_seats'] += wasted
+
+        for key, (gone, new) in touched.items():
+            entries = [entry for entry in self.entries.get(key, ()) if entry[2] not in gone]
+            if new:
+                entries = sorted(entries + new)
+            terms = self._terms(key[0], entries) if entries else {}
+            for component, value in terms.items():
+                raw[component] += value
+            for component, value in self.key_terms.get(key, {}).items():
+                raw[component] -= value
+        for kelas, change in online.items():
+            count = self.online.get(kelas, 0)
+            raw['online_overuse'] += self._online_excess(count + change) - self._online_excess(count)
+        return self._weighted(raw)
+
+    def delta_add(self, schedule):
+        return self.delta(added=[schedule])['total']
+
+    def delta_remove(self, schedule):
+        return self.delta(removed=[schedule])['total']
+
+    def delta_move(self, schedule, **changes):
+        return self.delta(removed=[schedule], added=[dict(schedule, **changes)])['total']
+
+
+class GenerationDiagnostics:
+    """Diagnostik pencarian generate: alasan penolakan kandidat dan jejak per mata kuliah.
+
+    Setiap run menyimpan jejak per mata kuliah (jumlah kandidat, percobaan,
+    histogram alasan penolakan, waktu) serta histogram teragregasi per run dan per
+    dosen. Per kandidat hanya satu counter yang dinaikkan, jadi cukup murah untuk
+    selalu aktif; daftar kandidat yang ditolak hanya disimpan bila
+    `trace_candidates` diaktifkan.
+    """
+
+    REASONS = {
+        'dosen': 'Dosen sudah mengajar',
+        'kelas': 'Kelas bentrok',
+        'istirahat': 'Waktu istirahat',
+        'istirahat_dosen': 'Istirahat dosen',
+        'ruangan': 'Tidak ada ruangan yang muat',
+        'konflik': 'Ditolak cek konflik akhir',
+    }
+
+    def __init__(self, max_runs=20, trace_candidates=False):
+        self.runs = deque(maxlen=max_runs)
+        self.current = None
+        self.trace_candidates = trace_candidates
+
+    @staticmethod
+    def _new_run(label):
+        return {
+            'label': label,
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'seconds': 0.0,
+            'courses': [],
+            'reasons': Counter(),
+            'lecturers': {},
+        }
+
+    def start_run(self, label):
+        self.current = self._new_run(label)
+        self.runs.append(self.current)
+        return self.current
+
+    def clear(self):
+        self.runs.clear()
+        self.current = None
+
+    def _lecturer_stats(self, run, lecturer):
+        return run['lecturers'].setdefault(
+            lecturer, {'courses': 0, 'placed': 0, 'failed': 0, 'seconds': 0.0, 'reasons': Counter()})
+
+    def record(self, course, placed, attempts, candidates, feasible, rejections, seconds, rejected=None):
+        """Catat hasil pencarian satu mata kuliah pada run aktif"""
+        run = self.current if self.current is not None else self.start_run("Generate")
+        trace = {
+            'dosen': course['dosen'],
+            'mata_kuliah': course['mata_kuliah'],
+            'kelas': course['kelas'],
+            'excel_index': course.get('excel_index'),
+            'placed': placed,
+            'candidates': candidates,
+            'feasible': feasible,
+            'attempts': attempts,
+            'rejections': dict(rejections),
+            'seconds': seconds,
+        }
+        if rejected is not None:
+            trace['rejected'] = rejected
+        self._add_trace(run, trace)
+
+    def _add_trace(self, run, trace):
+        run['courses'].append(trace)
+        run['reasons'].update(trace['rejections'])
+        run['seconds'] += trace['seconds']
+        stats = self._lecturer_stats(run, trace['dosen'])
+        stats['courses'] += 1
+        stats['placed' if trace['placed'] else 'failed'] += 1
+        stats['seconds'] += trace['seconds']
+        stats['reasons'].update(trace['rejections'])
+
+    def merge(self, run):
+        """Gabungkan run dari worker (mis. generate_sharded) ke run aktif"""
+        if run is None:
+            return
+        target = self.current if self.current is not None else self.start_run(run['label'])
+        for trace in run['courses']:
+            self._add_trace(target, trace)
+
+    def last_run(self):
+        return self.runs[-1] if self.runs else None
+
+    def failed_courses(self, run=None):
+        run = run if run is not None else self.last_run()
+        return [trace for trace in run['courses'] if not trace['placed']] if run else []
+
+    def to_frames(self, run=None):
+        """Tabel ringkasan satu run (default: run terakhir): Alasan, Dosen, Mata Kuliah"""
+        run = run if run is not None else self.last_run()
+        run = run or self._new_run('')
+        reasons = pd.DataFrame(
+            [(reason, self.REASONS.get(reason, reason), count) for reason, count in run['reasons'].most_common()],
+            columns=['Alasan', 'Keterangan', 'Jumlah'])
+        lecturers = pd.DataFrame(
+            [(lecturer, stats['courses'], stats['placed'], stats['failed'], round(stats['seconds'] * 1000, 1),
+              stats['reasons'].most_common(1)[0][0] if stats['reasons'] else '')
+             for lecturer, stats in run['lecturers'].items()],
+            columns=['Dosen', 'Mata Kuliah', 'Berhasil', 'Gagal', 'Waktu (ms)', 'Alasan Utama'])
+        courses = pd.DataFrame(
+            [(trace['dosen'], trace['mata_kuliah'], trace['kelas'], 'Ya' if trace['placed'] else 'Tidak',
+              trace['candidates'], trace['feasible'], trace['attempts'],
+              ', '.join(f"{reason}={count}" for reason, count in trace['rejections'].items()),
+              round(trace['seconds'] * 1000, 2))
+             for trace in sorted(run['courses'], key=lambda trace: trace['placed'])],
+            columns=['Dosen', 'Mata Kuliah', 'Kelas', 'Terjadwal', 'Kandidat', 'Feasible', 'Percobaan',
+                     'Penolakan', 'Waktu (ms)'])
+        return {'Alasan': reasons, 'Dosen': lecturers, 'Mata Kuliah': courses}
+
+    def to_dict(self):
+        return {'runs': [
+            dict(run, reasons=dict(run['reasons']),
+                 lecturers={lecturer: dict(stats, reasons=dict(stats['reasons']))
+                            for lecturer, stats in run['lecturers'].items()})
+            for run in self.runs
+        ]}
+
+    def export(self, path):
+        """Simpan seluruh run ke file JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2, default=str)
+        return path
+
+
+class DecisionCache:
+    """Memo hasil cek (is_conflict, get_available_room) yang divalidasi per versi kunci.
+
+    Setiap mutasi jadwal menaikkan `version` dan versi kunci okupansi yang disentuh
+    (dosen/kelas/ruangan per hari, plus ('ruangan', '*', hari) untuk seluruh ruangan
+    hari itu). Entri menyimpan versi kunci yang dibaca saat dihitung, jadi entri
+    hanya usang bila salah satu kunci tersebut berubah; edit di hari atau dosen lain
+    tidak membuangnya. Jumlah entri dibatasi `maxsize` (LRU).
+    """
+
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self.version = 0  # Naik pada setiap mutasi jadwal
+        self.key_versions = defaultdict(int)
+        self.entries = OrderedDict()  # (jenis, argumen) -> (hasil, versi kunci)
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = 0
+
+    def bump(self, keys):
+        self.version += 1
+        for key in keys:
+            self.key_versions[key] += 1
+            if key[0] == 'ruangan':
+                self.key_versions[('ruangan', '*', key[2])] += 1
+
+    def clear(self):
+        """Buang semua entri (data ruangan, grid waktu atau seluruh jadwal diganti)"""
+        self.version += 1
+        self.entries.clear()
+
+    def _token(self, keys):
+        return tuple(self.key_versions.get(key, 0) for key in keys)
+
+    def get(self, kind, args, keys):
+        """Kembalikan (ketemu, hasil) untuk entri yang versi kuncinya masih sama"""
+        entry = self.entries.get((kind, args))
+        if entry is not None and entry[1] == self._token(keys):
+            self.entries.move_to_end((kind, args))
+            self.hits[kind] += 1
+            return True, entry[0]
+        self.misses[kind] += 1
+        return False, None
+
+    def put(self, kind, args, keys, value):
+        self.entries[(kind, args)] = (value, self._token(keys))
+        self.entries.move_to_end((kind, args))
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def stats(self):
+        """Statistik hit/miss per jenis cek"""
+        result = {}
+        for kind in sorted(set(self.hits) | set(self.misses)):
+            total = self.hits[kind] + self.misses[kind]
+            result[kind] = {
+                'hits': self.hits[kind],
+                'misses': self.misses[kind],
+                'hit_rate': round(self.hits[kind] / total, 3) if total else 0.0,
+            }
+        result['entries'] = len(self.entries)
+        result['evictions'] = self.evictions
+        result['version'] = self.version
+        return result
+
+
+class IngestReport:
+    """Hasil validasi data masuk per sumber: valid, diperbaiki otomatis, atau dikarantina.
+
+    Baris yang dikarantina tidak pernah masuk ke daftar jadwal/ruangan, jadi mesin
+    generate dan cek konflik boleh menganggap datanya bersih dan bertipe benar.
+    """
+
+    STATUSES = ('valid', 'repairable', 'quarantined')
+
+    def __init__(self, source):
+        self.source = source
+        self.counts = Counter()
+        self.rows = []  # (label baris, status, daftar masalah)
+        self.quarantined = []  # Data asli baris yang dikarantina
+
+    def add(self, label, status, issues, item=None):
+        self.counts[status] += 1
+        if issues:
+            self.rows.append((label, status, issues))
+        if status == 'quarantined':
+            self.quarantined.append(item)
+
+    def summary(self):
+        return ", ".join(f"{self.counts[status]} {status}" for status in self.STATUSES)
+
+    def to_frame(self):
+        return pd.DataFrame([{'baris': label, 'status': status, 'masalah': "; ".join(issues)}
+                             for label, status, issues in self.rows],
+                            columns=['baris', 'status', 'masalah'])
+
 
 class ScheduleGenerator:
     def __init__(self):
@@ -18,10 +1859,8 @@ class ScheduleGenerator:
         self.fixed_schedules = []  # Jadwal dari Excel
         self.generated_schedules = []  # Jadwal yang di-generate
         self.available_rooms = []
-        self.break_times = [
-            {"start": time(12, 0), "end": time(13, 0)},
-            {"start": time(18, 0), "end": time(19, 0)}
-        ]
+        self.time_grid = TimeGrid()  # Grid slot per program, bisa dimuat dari konfigurasi
+        self.break_times = self.time_grid.break_times()
         self.department_preferences = {
             "TI": [3, 4],
             "SI": [3, 4],
@@ -29,32 +1868,222 @@ class ScheduleGenerator:
             "default": [3, 4, 5]
         }
         self.room_capacities = {}
-        self.time_slots = [
-            ("08:00", "09:40"), ("10:00", "11:40"), 
-            ("13:00", "14:40"), ("15:00", "16:40"), 
-            ("19:00", "20:40"), ("17:40 (online)", "19:20 (online)"),
-            ("15:30 (online)", "17:10 (online)")
-        ]
+        self.time_slots = self.time_grid.time_slots()
         self.excel_path = None  # Menyimpan path file Excel asli
         self.lecturer_breaks = defaultdict(list)  # Menyimpan waktu istirahat dosen
+        self.occupancy = None  # Indeks bitmask, dibangun ulang saat dibutuhkan
+        self.free_slots = None  # FreeSlotIndex, mengikuti indeks okupansi
+        self.schedule_index = None  # ScheduleIndex untuk pencarian dan timetable per entitas
+        self.unplaceable = []  # (mata kuliah, alasan) dari generate terakhir
+        self.diagnostics = GenerationDiagnostics()  # Alasan penolakan dan jejak per mata kuliah
+        self.room_registry = None
+        self.rng = random.Random()  # RNG lokal untuk pemilihan ruangan
+        self.use_columnar = False  # Deteksi konflik vektor lewat SessionTable
+        self.decision_cache = DecisionCache()  # Memo is_conflict/get_available_room per versi kunci
+        self.use_memo = False  # Hanya aktif di dalam memoized(); jalur generate memanggil cek langsung
+        self.objective = None  # ScheduleObjective, dibangun saat dibutuhkan
+        self.use_objective = False  # Pilih penempatan dengan skor batasan lunak terbaik
+        self.objective_candidates = 5  # Jumlah penempatan valid yang dibandingkan
+        self.journal = CommandJournal()  # Riwayat undo/redo
+        self.excel_row_hashes = {}  # excel_index -> hash isi baris saat dimuat
+        self.ingest_reports = {}  # sumber ('excel', 'mapping', 'ruangan', 'manual') -> IngestReport terakhir
+        self.excel_mtime = None
 
     def parse_time(self, time_str):
+        return parse_time_string(str(time_str).strip())
+
+    def normalize_jam(self, jam):
+        """Normalisasi kolom jam ke bentuk kanonik (lihat normalize_jam)"""
+        if not jam:
+            return jam
+        return normalize_jam(jam)
+
+    def time_range_minutes(self, start_time_str, end_time_str):
+        """Konversi rentang waktu ke (menit_mulai, menit_selesai, is_online)"""
+        start_time, is_online = self.parse_time(start_time_str)
+        end_time, end_online = self.parse_time(end_time_str)
+        if not start_time or not end_time:
+            return None
+        return (start_time.hour * 60 + start_time.minute,
+                end_time.hour * 60 + end_time.minute,
+                is_online or end_online)
+
+    def jam_interval(self, jam):
+        """Parse kolom jam "HH:MM - HH:MM" menjadi (mulai, selesai, is_online) dalam menit.
+
+        Mengembalikan None untuk format yang tidak valid atau waktu mulai >= selesai.
+        """
+        return parse_jam(jam)
+
+    def jam_mask(self, jam):
+        interval = self.jam_interval(jam) if jam else None
+        if interval is None:
+            return 0
+        return interval_mask(interval[0], interval[1])
+
+    def break_mask(self):
+        mask = 0
+        for bt in self.break_times:
+            mask |= interval_mask(bt['start'].hour * 60 + bt['start'].minute,
+                                  bt['end'].hour * 60 + bt['end'].minute)
+        return mask
+
+    def lecturer_break_mask(self, lecturer, day):
+        mask = 0
+        for break_time in self.lecturer_breaks.get(f"{lecturer}|{day}", []):
+            mask |= self.jam_mask(break_time)
+        return mask
+
+    def get_occupancy(self):
+        """Kembalikan indeks okupansi, dibangun dari seluruh jadwal jika belum ada"""
+        if self.occupancy is None:
+            self.occupancy = OccupancyIndex()
+            for sched in self.fixed_schedules + self.generated_schedules:
+                self.occupancy.add(sched, self.jam_mask(sched.get('jam')))
+        return self.occupancy
+
+    def invalidate_occupancy(self):
+        self.occupancy = None
+        self.free_slots = None
+        self.schedule_index = None
+        self.decision_cache.clear()
+        if self.objective is not None:
+            self.objective.stale = True
+
+    def get_objective(self):
+        """Kembalikan fungsi objektif batasan lunak, dihitung ulang jika usang"""
+        if self.objective is None:
+            self.objective = ScheduleObjective(self)
+        elif self.objective.stale:
+            self.objective.rebuild()
+        return self.objective
+
+    def get_free_slots(self):
+        """Kembalikan indeks slot bebas (semua slot grid), dibangun dari indeks okupansi jika belum ada"""
+        if self.free_slots is None:
+            self.free_slots = FreeSlotIndex(self.get_occupancy(), self.time_grid.all_days, self.time_grid)
+        return self.free_slots
+
+    def load_time_grid(self, config):
+        """Pasang grid waktu dari dict konfigurasi atau path file JSON"""
         try:
-            time_str = str(time_str).strip()
-            is_online = "(online)" in time_str.lower()
-            time_part = re.sub(r'\(.*\)', '', time_str).strip()
-            time_part = time_part.replace('.', ':')
-            
-            if ':' in time_part:
-                hours, minutes = time_part.split(':')
-                minutes = minutes[:2]
-                time_part = f"{hours}:{minutes}"
-            
-            time_obj = datetime.strptime(time_part, "%H:%M").time()
-            return time_obj, is_online
-        except ValueError as e:
-            print(f"Error parsing time '{time_str}': {e}")
-            return None, False
+            grid = TimeGrid.from_file(config) if isinstance(config, str) else TimeGrid(config)
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal memuat grid waktu: {str(e)}")
+            return False
+        self.time_grid = grid
+        self.time_slots = grid.time_slots()
+        self.break_times = grid.break_times()
+        self.free_slots = None
+        self.decision_cache.clear()
+        return True
+
+    def display_days(self):
+        """Hari untuk filter tampilan: hari grid ditambah hari jadwal tetap di luar grid (mis. Sabtu)"""
+        days = set(self.time_grid.all_days)
+        days.update(sched['hari'] for sched in self.fixed_schedules + self.generated_schedules if sched.get('hari'))
+        return sorted(days, key=lambda day: WEEKDAYS.index(day) if day in WEEKDAYS else len(WEEKDAYS))
+
+    def days_for(self, kelas):
+        """Hari kuliah untuk program kelas tersebut"""
+        return self.time_grid.program_days(self.time_grid.program_of(kelas))
+
+    def get_schedule_index(self):
+        """Kembalikan indeks pencarian jadwal, dibangun dari seluruh jadwal jika belum ada"""
+        if self.schedule_index is None:
+            self.schedule_index = ScheduleIndex(self.jam_interval, self.fixed_schedules + self.generated_schedules)
+        return self.schedule_index
+
+    def search_schedules(self, query, field=None, limit=None):
+        """Cari jadwal (substring) pada satu field atau semua field indeks"""
+        return self.get_schedule_index().search(query, [field] if field else None, limit)
+
+    def timetable(self, field, value):
+        return self.get_schedule_index().timetable(field, value)
+
+    def _track(self, schedule):
+        self.decision_cache.bump(OccupancyIndex.keys_for(schedule))
+        if self.schedule_index is not None:
+            self.schedule_index.add(schedule)
+        if self.occupancy is not None:
+            self.occupancy.add(schedule, self.jam_mask(schedule.get('jam')))
+            if self.free_slots is not None:
+                self.free_slots.refresh_schedule(schedule)
+        if self.objective is not None and not self.objective.stale:
+            self.objective.add(schedule)
+
+    def _untrack(self, schedule):
+        self.decision_cache.bump(OccupancyIndex.keys_for(schedule))
+        if self.schedule_index is not None:
+            self.schedule_index.remove(schedule)
+        if self.occupancy is not None:
+            self.occupancy.remove(schedule)
+            if self.free_slots is not None:
+                self.free_slots.refresh_schedule(schedule)
+        if self.objective is not None and not self.objective.stale:
+            self.objective.remove(schedule)
+
+    def _raw_insert(self, target, schedule, position=None):
+        schedules = getattr(self, target)
+        if position is None or position >= len(schedules):
+            schedules.append(schedule)
+        else:
+            schedules.insert(position, schedule)
+        self._track(schedule)
+
+    def _raw_delete(self, target, schedule, position=None):
+        schedules = getattr(self, target)
+        if position is None or position >= len(schedules) or schedules[position] is not schedule:
+            position = next(i for i, sched in enumerate(schedules) if sched is schedule)
+        del schedules[position]
+        self._untrack(schedule)
+        return position
+
+    def _raw_update(self, schedule, fields):
+        self._untrack(schedule)
+        for field, value in fields.items():
+            if value is CommandJournal.MISSING:
+                schedule.pop(field, None)
+            else:
+                schedule[field] = value
+        self._track(schedule)
+
+    def _insert_schedule(self, schedule, target=None):
+        """Tambahkan jadwal ke daftar (tercatat di jurnal dan indeks)"""
+        if target is None:
+            target = 'generated_schedules' if schedule.get('source') == 'generated' else 'fixed_schedules'
+        self._raw_insert(target, schedule)
+        self.journal.record(('add', target, schedule, len(getattr(self, target)) - 1))
+
+    def _delete_schedule(self, schedule):
+        """Hapus jadwal (dicari berdasarkan identitas, lalu kesamaan isi)"""
+        for target in ('fixed_schedules', 'generated_schedules'):
+            schedules = getattr(self, target)
+            position = next((i for i, sched in enumerate(schedules) if sched is schedule), None)
+            if position is None and schedule in schedules:
+                position = schedules.index(schedule)
+            if position is not None:
+                stored = schedules[position]
+                self._raw_delete(target, stored, position)
+                self.journal.record(('remove', target, stored, position))
+                return True
+        return False
+
+    def _update_schedule(self, schedule, **fields):
+        """Ubah field jadwal di tempat (tercatat di jurnal dan indeks)"""
+        changes = {field: (schedule.get(field, CommandJournal.MISSING), value) for field, value in fields.items()}
+        self._raw_update(schedule, fields)
+        self.journal.record(('update', schedule, changes))
+
+    def _set_room(self, schedule, room):
+        self._update_schedule(schedule, ruangan=room)
+
+    def undo(self):
+        """Batalkan perintah terakhir, kembalikan labelnya (None jika tidak ada)"""
+        return self.journal.undo(self)
+
+    def redo(self):
+        return self.journal.redo(self)
 
     def is_valid_time_range(self, start_time_str, end_time_str):
         start_time, _ = self.parse_time(start_time_str)
@@ -70,56 +2099,281 @@ class ScheduleGenerator:
 
     def is_break_time(self, start_time_str, end_time_str):
         """Check if time range overlaps with break times"""
-        start_time, _ = self.parse_time(start_time_str)
-        end_time, _ = self.parse_time(end_time_str)
-        if not start_time or not end_time:
+        position = self.time_grid.position(start_time_str, end_time_str)
+        if position is not None:
+            return bool(self.time_grid.in_break[position])
+        interval = self.time_range_minutes(start_time_str, end_time_str)
+        if interval is None:
             return False
-            
-        for bt in self.break_times:
-            if start_time < bt['end'] and end_time > bt['start']:
-                return True
-        return False
+        return bool(interval_mask(interval[0], interval[1]) & self.break_mask())
+
+    @staticmethod
+    def _clean_text(value):
+        """Teks bersih dari nilai sel; None untuk kosong/NaN, angka bulat tanpa '.0'"""
+        if value is None or (isinstance(value, float) and value != value):
+            return None
+        if isinstance(value, (float, np.floating)) and float(value).is_integer():
+            value = int(value)
+        text = str(value).strip()
+        return text or None
+
+    def clean_session(self, session):
+        """Validasi dan normalisasi satu jadwal/mata kuliah di tempat.
+
+        Mengembalikan (status, masalah): 'valid', 'repairable' (sudah diperbaiki:
+        teks dirapikan, angka NaN/teks/pecahan menjadi int, jam dinormalisasi, jam
+        tanpa hari atau dengan hari di luar WEEKDAYS dikosongkan, jam "online" tanpa
+        waktu dan ruangan jam online menjadi 'Online') atau 'quarantined'
+        (dosen/mata kuliah/kelas kosong atau jam tidak bisa diparse). Angka bulat
+        bertipe float (mis. 4.0 dari pandas) diterima tanpa catatan.
+        """
+        issues, fatal = [], []
+        for field in ('dosen', 'mata_kuliah', 'kelas'):
+            text = self._clean_text(session.get(field))
+            if text is None:
+                fatal.append(f"{field} kosong")
+            elif text != session[field]:
+                session[field] = text
+                issues.append(f"{field} dinormalisasi")
+        for field in ('sks', 'semester', 'jumlah_mahasiswa'):
+            if field not in session:
+                continue
+            value = session[field]
+            if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+                session[field] = int(value)
+                continue
+            number = pd.to_numeric(pd.Series([value]), errors='coerce').iat[0]
+            session[field] = 0 if pd.isna(number) else int(number)
+            if pd.isna(number) or number != session[field]:
+                issues.append(f"{field} '{value}' menjadi {session[field]}")
+        if 'jam' in session:
+            jam = self._clean_text(session.get('jam')) or ''
+            hari = (self._clean_text(session.get('hari')) or '').capitalize()
+            online = False
+            if jam and hari not in WEEKDAYS:
+                # Jam tanpa hari (atau hari tidak dikenal) diperlakukan sebagai belum terjadwal
+                if hari:
+                    issues.append(f"hari '{session.get('hari')}' tidak dikenal, jadwal dikosongkan")
+                jam, hari = '', ''
+            if is_online_marker(jam):
+                jam, online = 'online', True  # Sesi online tanpa jam: tidak menempati slot waktu
+            elif jam:
+                normalized = self.normalize_jam(jam)
+                interval = parse_jam(normalized)
+                if interval is None:
+                    fatal.append(f"format jam '{jam}' tidak valid")
+                else:
+                    jam, online = normalized, interval[2]
+            if jam != session['jam'] or hari != session.get('hari'):
+                issues.append("hari/jam dinormalisasi")
+            session['jam'], session['hari'] = jam, hari
+            room = self._clean_text(session.get('ruangan')) or ''
+            if online:
+                room = 'Online'
+            if room != session.get('ruangan'):
+                issues.append("ruangan dinormalisasi")
+                session['ruangan'] = room
+            if 'ruangan_excel' in session:
+                session['ruangan_excel'] = self._clean_text(session['ruangan_excel']) or ''
+        status = 'quarantined' if fatal else 'repairable' if issues else 'valid'
+        return status, fatal + issues
+
+    def clean_room(self, room):
+        """Validasi satu data ruangan di tempat: nama wajib, kapasitas/lantai menjadi angka"""
+        name = self._clean_text(room.get('nama'))
+        if name is None:
+            return 'quarantined', ["nama ruangan kosong"]
+        issues = []
+        if name != room['nama']:
+            room['nama'] = name
+            issues.append("nama dinormalisasi")
+        for field, default in (('kapasitas', 30), ('lantai', 0)):
+            value = room.get(field, default)
+            number = pd.to_numeric(pd.Series([value]), errors='coerce').iat[0]
+            cleaned = default if pd.isna(number) or (field == 'kapasitas' and number <= 0) else int(number)
+            if cleaned != value or not isinstance(value, (int, np.integer)):
+                issues.append(f"{field} '{value}' menjadi {cleaned}")
+            room[field] = cleaned
+        return ('repairable' if issues else 'valid'), issues
+
+    def _ingest(self, report, label, session):
+        """Bersihkan jadwal lalu catat di laporan; kembalikan jadwal atau None bila dikarantina"""
+        status, issues = self.clean_session(session)
+        report.add(label, status, issues, session)
+        return None if status == 'quarantined' else session
+
+    def _read_mapping(self, excel_path):
+        df = pd.read_excel(excel_path, sheet_name='Mapping mata kuliah', skiprows=2)
+        return df.dropna(subset=['Nama Dosen', 'Mata Kuliah'])
+
+    def _row_hash(self, row):
+        return hash(tuple(str(value) for value in row.tolist()))
+
+    def _session_from_row(self, idx, row):
+        jam = self.normalize_jam(row['Jam']) if pd.notna(row['Jam']) else ""
+        hari = row['Hari'] if pd.notna(row['Hari']) else ""
+        _, is_online = self.parse_time(jam)
+        
+        return {
+            'source': 'excel',  # Tandai berasal dari Excel
+            'excel_index': idx,  # Simpan indeks baris Excel
+            'dosen': row['Nama Dosen'],
+            'mata_kuliah': row['Mata Kuliah'],
+            'kelas': row['Kelas'],
+            'hari': hari,
+            'jam': jam,
+            'semester': row['Semester'],
+            'sks': row['SKS'],
+            'ruangan': 'Online' if is_online or is_online_marker(jam) else row.get('Ruangan', ''),
+            'ruangan_excel': row.get('Ruangan', ''),  # Ruangan asli di Excel (dipin saat reassign_rooms)
+            'jumlah_mahasiswa': row.get('Jumlah Mahasiswa', 0)
+        }
+
+    def _update_entity_lists(self, df):
+        self.lecturers = df['Nama Dosen'].unique().tolist()
+        self.subjects = df['Mata Kuliah'].unique().tolist()
+        self.classes = df['Kelas'].unique().tolist()
 
     def load_data(self, excel_path):
         try:
             self.excel_path = excel_path  # Simpan path file asli
-            df = pd.read_excel(excel_path, sheet_name='Mapping mata kuliah', skiprows=2)
-            df = df.dropna(subset=['Nama Dosen', 'Mata Kuliah'])
+            df = self._read_mapping(excel_path)
 
-            self.lecturers = df['Nama Dosen'].unique().tolist()
-            self.subjects = df['Mata Kuliah'].unique().tolist()
-            self.classes = df['Kelas'].unique().tolist()
+            self._update_entity_lists(df)
             self.fixed_schedules = []
+            self.invalidate_occupancy()
+            self.journal.clear()
+            self.excel_row_hashes = {}
+            self.excel_mtime = os.path.getmtime(excel_path)
+            report = self.ingest_reports['excel'] = IngestReport('excel')
             
             for idx, row in df.iterrows():
-                jam = row['Jam'] if pd.notna(row['Jam']) else ""
-                hari = row['Hari'] if pd.notna(row['Hari']) else ""
-                _, is_online = self.parse_time(jam)
-                
-                self.fixed_schedules.append({
-                    'source': 'excel',  # Tandai berasal dari Excel
-                    'excel_index': idx,  # Simpan indeks baris Excel
-                    'dosen': row['Nama Dosen'],
-                    'mata_kuliah': row['Mata Kuliah'],
-                    'kelas': row['Kelas'],
-                    'hari': hari,
-                    'jam': jam,
-                    'semester': row['Semester'],
-                    'sks': row['SKS'],
-                    'ruangan': 'Online' if is_online else row.get('Ruangan', ''),
-                    'jumlah_mahasiswa': row.get('Jumlah Mahasiswa', 0)
-                })
+                session = self._ingest(report, idx, self._session_from_row(idx, row))
+                if session is not None:
+                    self.fixed_schedules.append(session)
+                self.excel_row_hashes[idx] = self._row_hash(row)
             return True
         except Exception as e:
             messagebox.showerror("Error", f"Gagal memuat data: {str(e)}")
             return False
 
+    def excel_changed(self):
+        """True jika file Excel berubah sejak terakhir dimuat"""
+        try:
+            return bool(self.excel_path) and os.path.getmtime(self.excel_path) != self.excel_mtime
+        except OSError:
+            return False
+
+    def reload_changes(self):
+        """Muat ulang hanya baris Excel yang berubah.
+
+        Baris dibandingkan berdasarkan excel_index dan hash isinya. Baris yang
+        bergeser posisi tetapi isinya sama hanya diperbarui indeksnya. Jadwal
+        generated dari baris yang dihapus/diubah, atau yang bentrok dengan baris
+        yang berubah, dibuang; jadwal generated lainnya dipertahankan.
+        """
+        df = self._read_mapping(self.excel_path)
+        new_hashes = {idx: self._row_hash(row) for idx, row in df.iterrows()}
+        old_hashes = self.excel_row_hashes
+
+        excel_sessions = {}
+        generated_by_row = defaultdict(list)
+        for sched in self.fixed_schedules:
+            if sched.get('source') == 'excel':
+                excel_sessions[sched['excel_index']] = sched
+        for sched in self.generated_schedules:
+            if sched.get('excel_index') is not None:
+                generated_by_row[sched['excel_index']].append(sched)
+
+        unchanged = {idx for idx, row_hash in new_hashes.items() if old_hashes.get(idx) == row_hash}
+        old_pending = {idx: h for idx, h in old_hashes.items() if idx not in unchanged}
+        new_pending = {idx: h for idx, h in new_hashes.items() if idx not in unchanged}
+
+        # Baris yang hanya bergeser posisi: cocokkan berdasarkan hash isi
+        old_by_hash = defaultdict(list)
+        for idx, row_hash in old_pending.items():
+            old_by_hash[row_hash].append(idx)
+        moved = {}
+        for idx, row_hash in new_pending.items():
+            if old_by_hash.get(row_hash):
+                moved[old_by_hash[row_hash].pop()] = idx
+        remaining_old = old_pending.keys() - moved.keys()
+        remaining_new = new_pending.keys() - set(moved.values())
+        updated = sorted(remaining_old & remaining_new)
+        deleted = sorted(remaining_old - remaining_new)
+        inserted = sorted(remaining_new - remaining_old)
+
+        report = {'inserted': 0, 'updated': 0, 'deleted': 0, 'moved': 0, 'dropped_generated': 0, 'quarantined': 0}
+        ingest = self.ingest_reports['excel'] = IngestReport('excel')
+        changed_sessions = []
+        with self.journal.command("Muat Ulang Perubahan"):
+            for old_idx, new_idx in moved.items():
+                if old_idx in excel_sessions:
+                    self._update_schedule(excel_sessions[old_idx], excel_index=new_idx)
+                for sched in generated_by_row.pop(old_idx, []):
+                    self._update_schedule(sched, excel_index=new_idx)
+                report['moved'] += 1
+
+            for idx in deleted:
+                if idx in excel_sessions:
+                    self._delete_schedule(excel_sessions[idx])
+                for sched in generated_by_row.pop(idx, []):
+                    self._delete_schedule(sched)
+                    report['dropped_generated'] += 1
+                report['deleted'] += 1
+
+            for idx in updated:
+                fields = self._ingest(ingest, idx, self._session_from_row(idx, df.loc[idx]))
+                if fields is None:
+                    # Baris kini tidak valid: jadwal lamanya dibuang, barisnya dikarantina
+                    if idx in excel_sessions:
+                        self._delete_schedule(excel_sessions[idx])
+                    report['quarantined'] += 1
+                elif idx in excel_sessions:
+                    self._update_schedule(excel_sessions[idx], **fields)
+                    changed_sessions.append(excel_sessions[idx])
+                else:
+                    changed_sessions.append(fields)
+                    self._insert_schedule(fields, 'fixed_schedules')
+                for sched in generated_by_row.pop(idx, []):
+                    self._delete_schedule(sched)
+                    report['dropped_generated'] += 1
+                report['updated'] += 1
+
+            for idx in inserted:
+                session = self._ingest(ingest, idx, self._session_from_row(idx, df.loc[idx]))
+                if session is None:
+                    report['quarantined'] += 1
+                    continue
+                self._insert_schedule(session, 'fixed_schedules')
+                changed_sessions.append(session)
+                report['inserted'] += 1
+
+            # Buang jadwal generated yang bentrok dengan baris yang berubah
+            occupancy = self.get_occupancy()
+            for session in changed_sessions:
+                mask = self.jam_mask(session.get('jam'))
+                if not mask:
+                    continue
+                for key in occupancy.keys_for(session):
+                    for other, other_mask in list(occupancy.members.get(key, {}).values()):
+                        if other is not session and other.get('source') == 'generated' and other_mask & mask:
+                            if self._delete_schedule(other):
+                                report['dropped_generated'] += 1
+
+            # Undo mengembalikan status baris lama sehingga watcher menerapkan ulang sheet baru
+            mtime = os.path.getmtime(self.excel_path)
+            if new_hashes != old_hashes or mtime != self.excel_mtime:
+                self.journal.record(('excel_sync', (old_hashes, new_hashes), (self.excel_mtime, mtime)))
+            self.excel_row_hashes, self.excel_mtime = new_hashes, mtime
+        self._update_entity_lists(df)
+        return report
+
     def load_rooms(self, json_path):
         try:
             with open(json_path, 'r') as f:
                 rooms = json.load(f)
-                self.available_rooms = [room for room in rooms if 'online' not in room['nama'].lower()]
-                self.room_capacities = {room['nama']: room.get('kapasitas', 30) for room in self.available_rooms}
+            self._set_rooms(rooms)
             return True
         except Exception as e:
             messagebox.showerror("Error", f"Gagal memuat data ruangan: {str(e)}")
@@ -128,161 +2382,380 @@ class ScheduleGenerator:
     def load_rooms_from_excel(self, excel_path):
         try:
             df = pd.read_excel(excel_path)
-            self.available_rooms = []
-            for _, row in df.iterrows():
-                room_name = row['Nama Ruangan']
-                if 'online' not in str(room_name).lower():
-                    self.available_rooms.append({
-                        'nama': room_name,
-                        'lantai': row.get('Lantai', 0),
-                        'kapasitas': row.get('Kapasitas', 30)
-                    })
-            self.room_capacities = {room['nama']: room.get('kapasitas', 30) for room in self.available_rooms}
+            self._set_rooms([{'nama': row['Nama Ruangan'], 'lantai': row.get('Lantai', 0),
+                              'kapasitas': row.get('Kapasitas', 30)} for _, row in df.iterrows()])
             return True
         except Exception as e:
             messagebox.showerror("Error", f"Gagal memuat ruangan dari Excel: {str(e)}")
             return False
 
+    def _set_rooms(self, rooms):
+        """Validasi daftar ruangan (lihat clean_room) lalu pasang sebagai ruangan tersedia"""
+        report = self.ingest_reports['ruangan'] = IngestReport('ruangan')
+        self.available_rooms = []
+        for position, room in enumerate(rooms):
+            status, issues = self.clean_room(room)
+            report.add(room.get('nama', position), status, issues, room)
+            if status != 'quarantined' and 'online' not in room['nama'].lower():
+                self.available_rooms.append(room)
+        self.room_capacities = {room['nama']: room['kapasitas'] for room in self.available_rooms}
+        self.build_room_registry()
+
+    def build_room_registry(self):
+        self.room_registry = RoomRegistry(self.available_rooms, self.department_preferences)
+        self.decision_cache.clear()  # Kapasitas dan kandidat ruangan bisa berubah
+        if self.objective is not None:
+            self.objective.stale = True  # Lantai dan kapasitas bisa berubah
+        return self.room_registry
+
+    def get_room_registry(self):
+        if self.room_registry is None:
+            self.build_room_registry()
+        return self.room_registry
+
+    def find_free_room(self, department, day, mask, student_count=0, any_floor=False):
+        """Cari ruangan terkecil yang muat dan kosong pada mask waktu tertentu"""
+        occupancy = self.get_occupancy()
+        registry = self.get_room_registry()
+        for group in registry.candidate_groups(department, student_count, any_floor, self.rng):
+            for room in group:
+                if not occupancy.mask_for(('ruangan', room['nama'], day)) & mask:
+                    return room['nama']
+        return None
+
     def is_time_overlap(self, start1, end1, start2, end2):
         return not (end1 <= start2 or start1 >= end2)
 
-    def is_conflict(self, schedule, check_room_capacity=True):
+    def scenario(self, name=None):
+        """Buat skenario what-if baru di atas jadwal saat ini"""
+        return ScheduleScenario(self, name)
+
+    @contextlib.contextmanager
+    def memoized(self):
+        """Aktifkan memo is_conflict/get_available_room di dalam blok.
+
+        Dipakai pass yang mengulang pertanyaan yang sama (saran konflik, diagnostik);
+        saat generate hampir setiap cek unik sehingga biaya kunci memo tidak terbayar.
+        """
+        previous, self.use_memo = self.use_memo, True
         try:
-            if not schedule['jam']:  # Skip jika tidak ada jadwal
-                return False
-                
-            # Handle case where jam is not in "start - end" format
-            jam_parts = schedule['jam'].split(' - ')
-            if len(jam_parts) != 2:
-                return True
-                
-            start, end = jam_parts
-            start_time, _ = self.parse_time(start)
-            end_time, _ = self.parse_time(end)
-            
-            if not start_time or not end_time:
-                return True
-                
-            if not self.is_valid_time_range(start, end):
-                return True
-                
-            all_schedules = self.fixed_schedules + self.generated_schedules
+            yield
+        finally:
+            self.use_memo = previous
+
+    def is_conflict(self, schedule, check_room_capacity=True, scenario=None):
+        if scenario is not None or not self.use_memo:
+            return self._is_conflict(schedule, check_room_capacity, scenario)
+        hari = schedule['hari']
+        keys = [('dosen', schedule['dosen'], hari), ('kelas', schedule['kelas'], hari)]
+        if check_room_capacity:
+            keys.append(('ruangan', schedule.get('ruangan'), hari))
+        # Kunci berdasarkan isi; jadwal yang sudah ada di indeks mengabaikan dirinya sendiri
+        # saat cek overlap, jadi status keanggotaan ikut menentukan hasil
+        args = (schedule['jam'], schedule.get('ruangan'), schedule.get('jumlah_mahasiswa', 0),
+                check_room_capacity, self.get_occupancy().contains(schedule), *keys)
+        found, result = self.decision_cache.get('is_conflict', args, keys)
+        if found:
+            return result
+        return self.decision_cache.put('is_conflict', args, keys, self._is_conflict(schedule, check_room_capacity))
+
+    def _is_conflict(self, schedule, check_room_capacity=True, scenario=None):
+        if not schedule['jam'] or is_online_marker(schedule['jam']):  # Tidak menempati slot waktu
+            return False
             
-            # 1. Check lecturer availability
-            for sched in all_schedules:
-                if sched != schedule and sched['dosen'] == schedule['dosen'] and sched['hari'] == schedule['hari'] and sched['jam']:
-                    s_jam_parts = sched['jam'].split(' - ')
-                    if len(s_jam_parts) != 2:
-                        continue
-                    s_start, s_end = s_jam_parts
-                    s_start, _ = self.parse_time(s_start)
-                    s_end, _ = self.parse_time(s_end)
-                    if not s_start or not s_end:
-                        continue
-                    if self.is_time_overlap(start_time, end_time, s_start, s_end):
-                        return True
-                        
-            # 2. Check room availability and capacity
-            if check_room_capacity and schedule.get('ruangan') and schedule['ruangan'] != 'Online':
-                # Room time conflict
-                for sched in all_schedules:
-                    if sched != schedule and sched.get('ruangan') == schedule['ruangan'] and sched['hari'] == schedule['hari'] and sched['jam']:
-                        s_jam_parts = sched['jam'].split(' - ')
-                        if len(s_jam_parts) != 2:
-                            continue
-                        s_start, s_end = s_jam_parts
-                        s_start, _ = self.parse_time(s_start)
-                        s_end, _ = self.parse_time(s_end)
-                        if not s_start or not s_end:
-                            continue
-                        if self.is_time_overlap(start_time, end_time, s_start, s_end):
-                            return True
-                
-                # Room capacity check
-                room_capacity = self.room_capacities.get(schedule['ruangan'], 0)
-                if schedule.get('jumlah_mahasiswa', 0) > room_capacity:
-                    return True
+        # Format jam tidak valid atau waktu mulai >= selesai
+        interval = self.jam_interval(schedule['jam'])
+        if interval is None:
+            return True
             
-            # 3. Check class availability (no same class at same time)
-            for sched in all_schedules:
-                if sched != schedule and sched['kelas'] == schedule['kelas'] and sched['hari'] == schedule['hari'] and sched['jam']:
-                    s_jam_parts = sched['jam'].split(' - ')
-                    if len(s_jam_parts) != 2:
-                        continue
-                    s_start, s_end = s_jam_parts
-                    s_start, _ = self.parse_time(s_start)
-                    s_end, _ = self.parse_time(s_end)
-                    if not s_start or not s_end:
-                        continue
-                    if self.is_time_overlap(start_time, end_time, s_start, s_end):
-                        return True
+        mask = interval_mask(interval[0], interval[1])
+        occupancy = scenario if scenario is not None else self.get_occupancy()
+        hari = schedule['hari']
+        
+        # 1. Check lecturer availability
+        if occupancy.overlaps(('dosen', schedule['dosen'], hari), mask, ignore=schedule):
+            return True
+                    
+        # 2. Check room availability and capacity
+        if check_room_capacity and schedule.get('ruangan') and schedule['ruangan'] != 'Online':
+            # Room time conflict
+            if occupancy.overlaps(('ruangan', schedule['ruangan'], hari), mask, ignore=schedule):
+                return True
             
-            # 4. Check break times
-            if schedule.get('ruangan') != 'Online' and self.is_break_time(start, end):
+            # Room capacity check
+            room_capacity = self.room_capacities.get(schedule['ruangan'], 0)
+            if schedule.get('jumlah_mahasiswa', 0) > room_capacity:
                 return True
-                
-            # 5. Check lecturer break times
-            lecturer_breaks = self.lecturer_breaks.get(schedule['dosen'], [])
-            for break_time in lecturer_breaks:
-                break_start, break_end = break_time.split(' - ')
-                break_start, _ = self.parse_time(break_start)
-                break_end, _ = self.parse_time(break_end)
-                
-                if self.is_time_overlap(start_time, end_time, break_start, break_end):
-                    return True
-                
-            return False
-        except Exception as e:
-            print(f"Error in conflict check: {e}")
+        
+        # 3. Check class availability (no same class at same time)
+        if occupancy.overlaps(('kelas', schedule['kelas'], hari), mask, ignore=schedule):
+            return True
+        
+        # 4. Check break times
+        if schedule.get('ruangan') != 'Online' and mask & self.break_mask():
             return True
+            
+        # 5. Check lecturer break times
+        if mask & self.lecturer_break_mask(schedule['dosen'], hari):
+            return True
+            
+        return False
+
+    def evaluate_placements(self, session, candidates, check_room_capacity=True, scenario=None):
+        """Nilai banyak kandidat penempatan (hari, jam, ruangan) untuk satu jadwal sekaligus.
+
+        `jam` boleh berupa string "HH:MM - HH:MM" atau pasangan dari `time_slots`;
+        ruangan None berarti ruangan jadwal saat ini. Mask dosen/kelas/ruangan (tanpa
+        jadwal itu sendiri) diambil sekali per key lalu dipakai ulang untuk semua
+        kandidat. Mengembalikan satu dict per kandidat berisi hari, jam, ruangan,
+        `feasible` dan daftar `violations` (lihat PLACEMENT_CHECKS).
+        """
+        occupancy = scenario if scenario is not None else self.get_occupancy()
+        busy = {}
+
+        def busy_mask(kind, name, day):
+            key = (kind, name, day)
+            if key not in busy:
+                busy[key] = occupancy.combined_mask(key, ignore=session)
+            return busy[key]
+
+        break_mask = self.break_mask()
+        lecturer = session['dosen']
+        students = session.get('jumlah_mahasiswa', 0)
+        results = []
+        for day, jam, room in candidates:
+            if isinstance(jam, tuple):
+                jam = f"{jam[0]} - {jam[1]}"
+            if room is None:
+                room = session.get('ruangan')
+            violations = []
+            interval = self.jam_interval(jam) if jam else None
+            if interval is None:
+                violations.append('format')
+            else:
+                mask = interval_mask(interval[0], interval[1])
+                if busy_mask('dosen', lecturer, day) & mask:
+                    violations.append('dosen')
+                if check_room_capacity and room and room != 'Online':
+                    if busy_mask('ruangan', room, day) & mask:
+                        violations.append('ruangan')
+                    if students > self.room_capacities.get(room, 0):
+                        violations.append('kapasitas')
+                if busy_mask('kelas', session['kelas'], day) & mask:
+                    violations.append('kelas')
+                if room != 'Online' and mask & break_mask:
+                    violations.append('istirahat')
+                if mask & self.lecturer_break_mask(lecturer, day):
+                    violations.append('istirahat_dosen')
+            results.append({'hari': day, 'jam': jam, 'ruangan': room,
+                            'feasible': not violations, 'violations': violations})
+        return results
+
+    def rank_placements(self, session, results):
+        """Kandidat yang feasible, diurutkan menurut skor batasan lunak bila use_objective"""
+        feasible = [result for result in results if result['feasible']]
+        if self.use_objective and feasible:
+            objective = self.get_objective()
+            feasible.sort(key=lambda result: objective.delta_move(
+                session, hari=result['hari'], jam=result['jam'], ruangan=result['ruangan']))
+        return feasible
 
     def get_available_room(self, department, day, start_time_str, end_time_str, student_count=0):
-        try:
-            start_time, is_online = self.parse_time(start_time_str)
-            end_time, _ = self.parse_time(end_time_str)
+        """Ruangan kosong untuk rentang waktu, di-memo selama okupansi ruangan hari itu tetap.
+
+        Hit memo mengembalikan ruangan yang sama tanpa mengacak ulang kelompok kapasitas.
+        """
+        if not self.use_memo:
+            return self._get_available_room(department, day, start_time_str, end_time_str, student_count)
+        keys = [('ruangan', '*', day)]
+        args = (department, day, start_time_str, end_time_str, student_count)
+        found, result = self.decision_cache.get('get_available_room', args, keys)
+        if found:
+            return result
+        room = self._get_available_room(department, day, start_time_str, end_time_str, student_count)
+        return self.decision_cache.put('get_available_room', args, keys, room)
+
+    def _get_available_room(self, department, day, start_time_str, end_time_str, student_count=0):
+        interval = self.time_range_minutes(start_time_str, end_time_str)
+        
+        if interval and interval[2]:
+            return 'Online'
             
-            if is_online:
-                return 'Online'
-                
-            if not start_time or not end_time:
-                return None
-                
-            preferred_floors = self.department_preferences.get(department, self.department_preferences['default'])
-            random.shuffle(self.available_rooms)
+        if interval is None:
+            return None
+            
+        return self.find_free_room(department, day, interval_mask(interval[0], interval[1]), student_count)
 
-            for room in self.available_rooms:
-                # Check capacity first
-                if student_count > room.get('kapasitas', 30):
-                    continue
-                    
-                room_floor = room.get('lantai')
-                if room_floor not in preferred_floors:
+    def read_unscheduled(self, lecturer_name=None):
+        """Baca baris mapping yang belum memiliki hari/jam (opsional untuk satu dosen).
+
+        Baris yang sudah punya jadwal hasil generate (excel_index sama) dilewati,
+        sehingga generate berulang tidak menempatkan mata kuliah yang sama dua kali.
+        """
+        df = pd.read_excel(self.excel_path, sheet_name='Mapping mata kuliah', skiprows=2)
+        df = df.dropna(subset=['Nama Dosen', 'Mata Kuliah'])
+        generated = {sched.get('excel_index') for sched in self.generated_schedules}
+        report = self.ingest_reports['mapping'] = IngestReport('mapping')
+        courses = [
+            {
+                'excel_index': idx,
+                'dosen': r['Nama Dosen'],
+                'mata_kuliah': r['Mata Kuliah'],
+                'kelas': r['Kelas'],
+                'semester': r['Semester'],
+                'sks': r['SKS'],
+                'jumlah_mahasiswa': r.get('Jumlah Mahasiswa', 0)
+            }
+            for idx, r in df.iterrows()
+            if (lecturer_name is None or r['Nama Dosen'] == lecturer_name) and (pd.isna(r['Hari']) or pd.isna(r['Jam']))
+            and idx not in generated
+        ]
+        return [course for course in courses if self._ingest(report, course['excel_index'], course) is not None]
+
+    def department_of(self, kelas):
+        """Kode departemen dari nama kelas, mis. 'DKV23A' -> 'DKV'"""
+        match = re.match(r'[A-Za-z]+', str(kelas))
+        if match and match.group(0).upper() in self.department_preferences:
+            return match.group(0).upper()
+        return 'default'
+
+    def feasible_slots(self, course, days, spill_over=False, rejections=None, rejected=None):
+        """Pasangan (hari, mulai, selesai) tempat dosen dan kelas bebas dan ada ruangan kosong.
+
+        Slot istirahat (umum dan dosen) dilewati. Slot luring hanya dihitung bila ada
+        ruangan kandidat departemen (atau semua ruangan dengan `spill_over`) yang muat
+        dan kosong; slot online tidak membutuhkan ruangan. Hanya slot dan hari program
+        kelas (lihat TimeGrid) yang dipertimbangkan. Alasan penolakan pertama tiap
+        slot dihitung di Counter `rejections` dan, bila diberikan, dicatat di daftar
+        `rejected` sebagai (hari, mulai, selesai, alasan).
+        """
+        index = self.get_free_slots()
+        grid = self.time_grid
+        program = grid.programs[grid.program_of(course['kelas'])]
+        lecturer_busy = index.busy_bits('dosen', course['dosen'])
+        class_busy = index.busy_bits('kelas', course['kelas'])
+        student_count = course.get('jumlah_mahasiswa', 0)
+        registry = self.get_room_registry()
+        rooms = [room['nama'] for group in registry.candidate_groups(self.department_of(course['kelas']), student_count)
+                 for room in group]
+        if spill_over:
+            rooms += [room['nama'] for group in registry.candidate_groups(
+                self.department_of(course['kelas']), student_count, any_floor=True) for room in group]
+        room_free = index.free_bits('ruangan', rooms)
+
+        options = []
+        for day in days:
+            if day not in index.day_position or day not in program['days']:
+                continue
+            lecturer_break = self.lecturer_break_mask(course['dosen'], day)
+            for position in program['slots']:
+                start, end, mask, is_online = index.slots[position]
+                bit = index.bit(day, position)
+                if lecturer_busy & bit:
+                    reason = 'dosen'
+                elif class_busy & bit:
+                    reason = 'kelas'
+                elif not is_online and grid.in_break[position]:
+                    reason = 'istirahat'
+                elif mask & lecturer_break:
+                    reason = 'istirahat_dosen'
+                elif not is_online and not room_free & bit:
+                    reason = 'ruangan'
+                else:
+                    options.append((day, start, end))
                     continue
+                if rejections is not None:
+                    rejections[reason] += 1
+                if rejected is not None:
+                    rejected.append((day, start, end, reason))
+        return options
 
-                available = True
-                for sched in self.fixed_schedules + self.generated_schedules:
-                    if sched.get('ruangan') == room['nama'] and sched['hari'] == day and sched['jam']:
-                        try:
-                            s_jam_parts = sched['jam'].split(' - ')
-                            if len(s_jam_parts) != 2:
-                                continue
-                            s_start, s_end = s_jam_parts
-                            s_start, _ = self.parse_time(s_start)
-                            s_end, _ = self.parse_time(s_end)
-                            if not s_start or not s_end:
-                                continue
-                                
-                            if self.is_time_overlap(start_time, end_time, s_start, s_end):
-                                available = False
-                                break
-                        except:
-                            continue
-                if available:
-                    return room['nama']
-            return None
-        except Exception as e:
-            print(f"Error in get_available_room: {e}")
-            return None
+    def _place_course(self, course, days, attempts=50, rng=None, spill_over=False):
+        """Tempatkan satu mata kuliah pada slot acak yang feasible; kembalikan jadwal baru atau None.
+
+        Slot diambil dari indeks slot bebas, jadi mata kuliah tanpa slot feasible
+        langsung gagal (dicatat di `unplaceable`). Dengan `spill_over`, ruangan di luar
+        lantai preferensi boleh dipakai bila lantai preferensi penuh. Hasil, alasan
+        penolakan dan waktunya dicatat di `diagnostics`.
+        """
+        started = perf_counter()
+        rejections = Counter()
+        rejected = [] if self.diagnostics.trace_candidates else None
+        options = self.feasible_slots(course, days, spill_over, rejections, rejected)
+        candidates = len(options) + sum(rejections.values())
+        schedule, tried = self._choose_placement(course, options, attempts, rng or random, spill_over, rejections)
+        if schedule is None:
+            self.unplaceable.append((course, "Semua slot feasible ditolak" if options else "Tidak ada slot feasible"))
+        self.diagnostics.record(course, schedule is not None, tried, candidates, len(options), rejections,
+                                perf_counter() - started, rejected)
+        return schedule
+
+    @staticmethod
+    def _generated_session(course, day, jam):
+        return {
+            'source': 'generated',  # Tandai sebagai generated
+            'excel_index': course.get('excel_index'),
+            'dosen': course['dosen'],
+            'mata_kuliah': course['mata_kuliah'],
+            'kelas': course['kelas'],
+            'hari': day,
+            'jam': jam,
+            'semester': course['semester'],
+            'sks': course['sks'],
+            'jumlah_mahasiswa': course.get('jumlah_mahasiswa', 0)
+        }
+
+    def _choose_placement(self, course, options, attempts, rng, spill_over, rejections):
+        """Coba slot feasible secara acak; kembalikan (jadwal yang ditambahkan atau None, jumlah percobaan).
+
+        Dengan `use_objective`, hingga `objective_candidates` penempatan valid
+        dibandingkan dan yang skor batasan lunaknya terkecil dipilih.
+        """
+        objective = self.get_objective() if self.use_objective else None
+        best = None
+        feasible = 0
+        tried = 0
+        for day, start, end in rng.sample(options, min(len(options), attempts)):
+            tried += 1
+            is_online = "(online)" in start.lower() or "(online)" in end.lower()
+            temp_schedule = self._generated_session(course, day, f"{start} - {end}")
+                
+            if is_online:
+                room = 'Online'
+            else:
+                room = self.get_available_room(
+                    self.department_of(course['kelas']), 
+                    day, 
+                    start, 
+                    end,
+                    course.get('jumlah_mahasiswa', 0)
+                )
+                if not room and spill_over:
+                    room = self.find_free_room(self.department_of(course['kelas']), day,
+                                               self.jam_mask(temp_schedule['jam']),
+                                               course.get('jumlah_mahasiswa', 0), any_floor=True)
+                
+            if not room:
+                rejections['ruangan'] += 1
+                continue
+            temp_schedule['ruangan'] = room
+            if self.is_conflict(temp_schedule):
+                rejections['konflik'] += 1
+                continue
+            if objective is None:
+                # Tambahkan ke generated_schedules
+                self._insert_schedule(temp_schedule, 'generated_schedules')
+                return temp_schedule, tried
+            cost = objective.delta_add(temp_schedule)
+            if best is None or cost < best[0]:
+                best = (cost, temp_schedule)
+            feasible += 1
+            if feasible >= self.objective_candidates:
+                break
+        if best is not None:
+            self._insert_schedule(best[1], 'generated_schedules')
+            return best[1], tried
+        return None, tried
 
     def generate_schedule_for_lecturer(self, lecturer_name):
         try:
@@ -290,83 +2763,492 @@ class ScheduleGenerator:
                 messagebox.showerror("Error", "Tidak ada file Excel yang dimuat!")
                 return False
                 
-            df = pd.read_excel(self.excel_path, sheet_name='Mapping mata kuliah', skiprows=2)
-            df = df.dropna(subset=['Nama Dosen', 'Mata Kuliah'])
-            unfixed = [
-                {
-                    'dosen': r['Nama Dosen'],
-                    'mata_kuliah': r['Mata Kuliah'],
-                    'kelas': r['Kelas'],
-                    'semester': r['Semester'],
-                    'sks': r['SKS'],
-                    'jumlah_mahasiswa': r.get('Jumlah Mahasiswa', 0)
-                }
-                for _, r in df.iterrows()
-                if r['Nama Dosen'] == lecturer_name and (pd.isna(r['Hari']) or pd.isna(r['Jam']))
-            ]
+            unfixed = self.read_unscheduled(lecturer_name)
             if not unfixed:
                 print(f"Tidak ada jadwal kosong untuk dosen {lecturer_name}")
                 return True
                 
-            days = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat']
+            days = self.time_grid.all_days
             success = 0
+            self.unplaceable = []
+            self.diagnostics.start_run(f"Generate {lecturer_name}")
             
-            for s in unfixed:
-                for attempt in range(50):
-                    day = random.choice(days)
-                    start, end = random.choice(self.time_slots)
-                    
-                    is_online = "(online)" in start.lower() or "(online)" in end.lower()
-                    
-                    # Skip break times for all lecturers
-                    if self.is_break_time(start, end):
-                        continue
-                        
-                    temp_schedule = {
-                        'source': 'generated',  # Tandai sebagai generated
-                        'dosen': s['dosen'],
-                        'mata_kuliah': s['mata_kuliah'],
-                        'kelas': s['kelas'],
-                        'hari': day,
-                        'jam': f"{start} - {end}",
-                        'semester': s['semester'],
-                        'sks': s['sks'],
-                        'jumlah_mahasiswa': s.get('jumlah_mahasiswa', 0)
-                    }
-                    
-                    if self.is_conflict(temp_schedule, check_room_capacity=False):
-                        continue
-                        
-                    if is_online:
-                        room = 'Online'
-                    else:
-                        room = self.get_available_room(
-                            s['kelas'][:2], 
-                            day, 
-                            start, 
-                            end,
-                            s.get('jumlah_mahasiswa', 0)
-                        )
-                        
-                    if room:
-                        temp_schedule['ruangan'] = room
-                        if not self.is_conflict(temp_schedule):
-                            # Tambahkan ke generated_schedules
-                            self.generated_schedules.append(temp_schedule)
-                            success += 1
-                            break
+            with self.journal.command(f"Generate {lecturer_name}"):
+                for s in unfixed:
+                    if self._place_course(s, days):
+                        success += 1
             return success > 0
         except Exception as e:
             print(f"Error: {e}")
             return False
 
+    def _shard_payload(self, department, courses, seed):
+        """Data minimal yang dikirim ke worker untuk satu departemen"""
+        floors = self.department_preferences.get(department, self.department_preferences['default'])
+        rooms = [room for room in self.available_rooms if room.get('lantai') in floors]
+        room_names = {room['nama'] for room in rooms}
+        lecturers = {course['dosen'] for course in courses}
+        classes = {course['kelas'] for course in courses}
+        sessions = [
+            {field: sched.get(field) for field in ('dosen', 'kelas', 'hari', 'jam', 'ruangan')}
+            for sched in itertools.chain(self.fixed_schedules, self.generated_schedules)
+            if sched.get('jam') and (sched['dosen'] in lecturers or sched['kelas'] in classes
+                                     or sched.get('ruangan') in room_names)
+        ]
+        return {
+            'department': department,
+            'floors': floors,
+            'courses': courses,
+            'sessions': sessions,
+            'rooms': rooms,
+            'room_capacities': {name: self.room_capacities.get(name, 30) for name in room_names},
+            'time_grid': self.time_grid.config,
+            'lecturer_breaks': {key: list(value) for key, value in self.lecturer_breaks.items()
+                                if key.split('|')[0] in lecturers},
+            'seed': seed,
+            'trace_candidates': self.diagnostics.trace_candidates,
+        }
+
+    def generate_sharded(self, max_workers=None):
+        """Generate semua jadwal kosong per departemen di proses worker terpisah.
+
+        Setiap departemen dijadwalkan terhadap lantai preferensinya. Hasilnya lalu
+        direkonsiliasi: jadwal yang bentrok pada sumber daya bersama (dosen lintas
+        departemen, ruangan di lantai yang sama) ditempatkan ulang satu per satu,
+        dan yang gagal boleh memakai ruangan di lantai lain.
+        """
+        if not self.excel_path:
+            return {}
+        days = self.time_grid.all_days
+        self.unplaceable = []
+        self.diagnostics.start_run("Generate Per Departemen")
+        shards = defaultdict(list)
+        for course in self.read_unscheduled():
+            shards[self.department_of(course['kelas'])].append(course)
+        payloads = [self._shard_payload(department, courses, self.rng.randrange(2 ** 32))
+                    for department, courses in shards.items()]
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_generate_shard, payloads))
+
+        report = {}
+        with self.journal.command("Generate Per Departemen"):
+            for department, placed, failed, diagnostics in results:
+                self.diagnostics.merge(diagnostics)
+                courses = shards[department]
+                stats = {'courses': len(courses), 'placed': 0, 'replaced': 0, 'failed': 0}
+                retry = list(failed)
+                for position, schedule in placed:
+                    if self.is_conflict(schedule):
+                        retry.append(position)
+                    else:
+                        self._insert_schedule(schedule, 'generated_schedules')
+                        stats['placed'] += 1
+                for position in retry:
+                    if self._place_course(courses[position], days, rng=self.rng, spill_over=True):
+                        stats['replaced'] += 1
+                    else:
+                        stats['failed'] += 1
+                report[department] = stats
+        return report
+
+    def feasible_slot_count(self, course, days):
+        """Jumlah pasangan (hari, slot) yang masih bebas untuk dosen dan kelas mata kuliah"""
+        index = self.get_free_slots()
+        grid = self.time_grid
+        program = grid.programs[grid.program_of(course['kelas'])]
+        blocked = index.busy_bits('dosen', course['dosen']) | index.busy_bits('kelas', course['kelas'])
+        count = 0
+        for day in days:
+            if day not in index.day_position or day not in program['days']:
+                continue
+            lecturer_break = self.lecturer_break_mask(course['dosen'], day)
+            for position in program['slots']:
+                if blocked & index.bit(day, position):
+                    continue
+                if (not grid.online[position] and grid.in_break[position]) or grid.masks[position] & lecturer_break:
+                    continue
+                count += 1
+        return count
+
+    def generate_all(self, previous=None):
+        """Generate semua jadwal kosong dalam satu lintasan, yang paling terbatas dulu.
+
+        Mata kuliah diurutkan menurut jumlah slot bebas (paling sedikit dulu), jumlah
+        mahasiswa (terbesar dulu) dan beban dosen (tersibuk dulu), lalu ditempatkan
+        satu per satu terhadap indeks okupansi yang sama. Dengan `previous` (path
+        ekspor semester lalu atau hasil read_previous_term), mata kuliah lebih dulu
+        diberi slot semester lalu lewat warm_start dan hanya sisanya yang dicari.
+        Mengembalikan laporan per dosen: jumlah berhasil (dan dari semester lalu),
+        gagal dan waktu (detik).
+        """
+        if not self.excel_path:
+            return {}
+        days = self.time_grid.all_days
+        courses = self.read_unscheduled()
+        report = {}
+        self.unplaceable = []
+        self.diagnostics.start_run("Generate Semua")
+        with self.journal.command("Generate Semua"):
+            if previous is not None:
+                seeded, courses = self.warm_start(previous, courses)
+                for schedule in seeded:
+                    stats = report.setdefault(schedule['dosen'], {'courses': 0, 'placed': 0, 'failed': 0,
+                                                                  'seconds': 0.0, 'seeded': 0})
+                    stats['courses'] += 1
+                    stats['placed'] += 1
+                    stats['seeded'] += 1
+            for course in self._ordered_courses(courses, days):
+                stats = report.setdefault(course['dosen'], {'courses': 0, 'placed': 0, 'failed': 0,
+                                                            'seconds': 0.0, 'seeded': 0})
+                started = perf_counter()
+                placed = self._place_course(course, days, rng=self.rng)
+                stats['seconds'] += perf_counter() - started
+                stats['courses'] += 1
+                stats['placed' if placed else 'failed'] += 1
+        return report
+
+    def read_previous_term(self, path):
+        """Baca ekspor save_to_excel semester lalu menjadi tabel hash join.
+
+        Kunci (dosen, mata_kuliah, kelas) -> daftar (hari, jam, ruangan) sesuai urutan
+        baris; satu mata kuliah bisa punya beberapa sesi.
+        """
+        df = pd.read_excel(path, skiprows=2)  # Header ekspor ada di baris 3
+        if 'Mata Kuliah' not in df.columns:
+            df = pd.read_excel(path)
+        df = df.dropna(subset=['Dosen', 'Mata Kuliah', 'Kelas', 'Hari', 'Jam'])
+        rooms = df['Ruangan'] if 'Ruangan' in df.columns else pd.Series(None, index=df.index)
+        table = defaultdict(list)
+        for dosen, mata_kuliah, kelas, hari, jam, ruangan in zip(df['Dosen'], df['Mata Kuliah'], df['Kelas'],
+                                                                 df['Hari'], df['Jam'], rooms):
+            key = (str(dosen).strip(), str(mata_kuliah).strip(), str(kelas).strip())
+            room = str(ruangan).strip() if pd.notna(ruangan) and str(ruangan).strip() else None
+            table[key].append((str(hari).strip(), self.normalize_jam(str(jam).strip()), room))
+        return table
+
+    def warm_start(self, previous, courses):
+        """Tempatkan mata kuliah di hari, jam dan ruangan semester lalu bila masih feasible.
+
+        `previous` berupa path ekspor atau tabel dari read_previous_term; mata kuliah
+        dicocokkan lewat hash join pada (dosen, mata_kuliah, kelas). Bila ruangan lama
+        tidak lagi tersedia, slot lama tetap dipakai dengan ruangan lain yang kosong.
+        Mengembalikan (jadwal yang ditempatkan, mata kuliah sisa untuk pencarian).
+        """
+        table = self.read_previous_term(previous) if isinstance(previous, str) else previous
+        table = {key: list(placements) for key, placements in table.items()}
+        seeded, leftovers = [], []
+        for course in courses:
+            placements = table.get((str(course['dosen']).strip(), str(course['mata_kuliah']).strip(),
+                                    str(course['kelas']).strip()))
+            schedule = None
+            while placements and schedule is None:
+                schedule = self._seed_placement(course, *placements.pop(0))
+            if schedule is None:
+                leftovers.append(course)
+            else:
+                seeded.append(schedule)
+        return seeded, leftovers
+
+    def _seed_placement(self, course, day, jam, room):
+        """Tambahkan jadwal di slot semester lalu; None bila slot tidak lagi feasible"""
+        interval = self.jam_interval(jam)
+        if interval is None or day not in self.days_for(course['kelas']):
+            return None
+        schedule = self._generated_session(course, day, jam)
+        if interval[2]:
+            room = 'Online'
+        elif room not in self.room_capacities:
+            room = None
+        if room is not None:
+            schedule['ruangan'] = room
+            if not self.evaluate_placements(schedule, [(day, jam, room)])[0]['feasible']:
+                room = None
+        if room is None:
+            if not self.evaluate_placements(schedule, [(day, jam, None)], check_room_capacity=False)[0]['feasible']:
+                return None
+            start, end = jam.split(' - ')
+            room = (self.get_available_room(self.department_of(course['kelas']), day, start, end,
+                                            course.get('jumlah_mahasiswa', 0))
+                    or self.find_free_room(self.department_of(course['kelas']), day, self.jam_mask(jam),
+                                           course.get('jumlah_mahasiswa', 0), any_floor=True))
+            if not room:
+                return None
+        schedule['ruangan'] = room
+        self._insert_schedule(schedule, 'generated_schedules')
+        return schedule
+
+    def _ordered_courses(self, courses, days):
+        """Urutkan mata kuliah: slot feasible paling sedikit, mahasiswa terbanyak, dosen tersibuk"""
+        load = defaultdict(int)
+        for sched in itertools.chain(self.fixed_schedules, self.generated_schedules, courses):
+            load[sched['dosen']] += 1
+
+        def constraint_key(course):
+            return self.feasible_slot_count(course, days), -self._student_count(course), -load[course['dosen']]
+
+        return sorted(courses, key=constraint_key)
+
+    def checkpoint_path(self):
+        """Lokasi checkpoint generate anytime untuk file Excel yang dimuat"""
+        return f"{self.excel_path}.checkpoint.json" if self.excel_path else None
+
+    def _write_checkpoint(self, path, state):
+        """Tulis checkpoint secara atomik (file sementara lalu os.replace)"""
+        version, internal, gauss = self.rng.getstate()
+        state = dict(state, rng_state=[version, list(internal), gauss], saved=datetime.now().isoformat(timespec='seconds'))
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(state, ensure_ascii=False,
+                               default=lambda value: value.item() if hasattr(value, 'item') else str(value)))
+        os.replace(temp_path, path)
+
+    def load_checkpoint(self, path=None):
+        """Baca checkpoint generate anytime; None bila tidak ada atau milik file Excel lain"""
+        path = path or self.checkpoint_path()
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('excel_path') != self.excel_path:
+            return None
+        return state
+
+    def _restore_checkpoint(self, state):
+        """Pasang ulang jadwal dan ruangan dari checkpoint yang belum ada di memori, lalu RNG"""
+        version, internal, gauss = state['rng_state']
+        self.rng.setstate((version, tuple(internal), gauss))
+
+        def identity(sched):
+            return (sched.get('excel_index'), sched['dosen'], sched['mata_kuliah'], sched['kelas'], sched['hari'], sched['jam'])
+
+        existing = {identity(sched) for sched in self.generated_schedules}
+        for sched in state['placed']:
+            if identity(sched) not in existing:
+                self._insert_schedule(dict(sched), 'generated_schedules')
+        excel_sessions = {sched['excel_index']: sched for sched in self.fixed_schedules if sched.get('source') == 'excel'}
+        for excel_index, room in state['rooms']:
+            sched = excel_sessions.get(excel_index)
+            if sched is not None and not self.has_room(sched):
+                self._set_room(sched, room)
+
+    def generate_anytime(self, budget=None, checkpoint_every=30.0, checkpoint_path=None, resume=True, should_stop=None):
+        """Generate, isi ruangan dan atasi konflik dengan batas waktu (detik), bisa dilanjutkan.
+
+        Fase 'generate' menempatkan antrean mata kuliah (urutan generate_all), fase
+        'rooms' memberi ruangan jadwal yang belum/salah ruangan per potongan, dan fase
+        'repair' menerapkan rencana plan_conflict_resolution di memori selama jumlah
+        konflik turun; putaran yang tidak memperbaiki di-rollback lewat jurnal dan
+        baris Excel yang dipindah ditulis sekali di akhir. Semua fase berada dalam
+        satu perintah jurnal "Generate Anytime".
+        Bila `budget` habis atau `should_stop()` bernilai True, proses berhenti dengan
+        jadwal terbaik sejauh ini. Setiap `checkpoint_every` detik (dan saat berhenti)
+        jadwal yang ditempatkan, ruangan yang diisi, state RNG dan sisa antrean disimpan
+        ke `checkpoint_path`; dengan `resume`, run berikutnya melanjutkan dari sana.
+        """
+        if not self.excel_path:
+            return {}
+        started = perf_counter()
+        path = checkpoint_path or self.checkpoint_path()
+        days = self.time_grid.all_days
+        state = self.load_checkpoint(path) if resume else None
+        self.unplaceable = []
+        self.diagnostics.start_run("Generate Anytime")
+        with self.journal.command("Generate Anytime"):
+            if state is not None:
+                self._restore_checkpoint(state)
+            else:
+                state = {'excel_path': self.excel_path, 'phase': 'generate', 'elapsed': 0.0,
+                         'queue': self._ordered_courses(self.read_unscheduled(), days),
+                         'placed': [], 'failed': [], 'rooms': [], 'repair_rounds': 0}
+            elapsed_before = state['elapsed']
+            last_checkpoint = perf_counter()
+
+            def out_of_time():
+                return ((budget is not None and perf_counter() - started >= budget)
+                        or (should_stop is not None and should_stop()))
+
+            def checkpoint(force=False):
+                nonlocal last_checkpoint
+                if path and (force or perf_counter() - last_checkpoint >= checkpoint_every):
+                    state['elapsed'] = elapsed_before + perf_counter() - started
+                    self._write_checkpoint(path, state)
+                    last_checkpoint = perf_counter()
+
+            try:
+                while state['phase'] == 'generate' and state['queue'] and not out_of_time():
+                    course = state['queue'].pop(0)
+                    placed = self._place_course(course, days, rng=self.rng)
+                    if placed is not None:
+                        state['placed'].append(placed)
+                    else:
+                        state['failed'].append(course)
+                    checkpoint()
+                if state['phase'] == 'generate' and not state['queue']:
+                    state['phase'] = 'rooms'
+                    state['queue'] = []
+
+                if state['phase'] == 'rooms':
+                    affected = self.rooms_to_reassign()
+                    for position in range(0, len(affected), 200):
+                        if out_of_time():
+                            break
+                        chunk = affected[position:position + 200]
+                        self.reassign_rooms(chunk)
+                        state['rooms'] += [[sched['excel_index'], sched['ruangan']] for sched in chunk
+                                           if sched.get('source') == 'excel' and self.has_room(sched)]
+                        checkpoint()
+                    else:
+                        state['phase'] = 'repair'
+
+                repaired = {}  # Baris Excel yang dipindah putaran repair; ditulis sekali di akhir
+                while state['phase'] == 'repair' and not out_of_time():
+                    before = sum(1 for _ in self.iter_conflicts(types=['lecturer', 'class', 'room']))
+                    plan = self.plan_conflict_resolution() if before else None
+                    moves = [change[1:] for change in plan.changes() if change[0] == 'move'] if plan else []
+                    if not moves:
+                        state['phase'] = 'done'
+                        break
+                    # Putaran dicoba di memori saja (jurnal), tanpa menulis workbook per pemindahan
+                    mark = self.journal.mark()
+                    for original, replacement in moves:
+                        self._update_schedule(original, **{field: value for field, value in replacement.items()
+                                                           if original.get(field) != value})
+                    after = sum(1 for _ in self.iter_conflicts(types=['lecturer', 'class', 'room']))
+                    state['repair_rounds'] += 1
+                    if after >= before:
+                        self.journal.rollback(self, mark)  # Putaran ini tidak memperbaiki
+                        state['phase'] = 'done'
+                    else:
+                        repaired.update((sched['excel_index'], sched) for sched, _ in moves
+                                        if sched.get('source') == 'excel')
+                if repaired:
+                    self._write_excel_rows(repaired)
+            finally:
+                checkpoint(force=True)
+
+        if path and state['phase'] == 'done':
+            with contextlib.suppress(OSError):
+                os.remove(path)
+        return {
+            'phase': state['phase'],
+            'complete': state['phase'] == 'done',
+            'placed': len(state['placed']),
+            'failed': len(state['failed']),
+            'remaining': len(state['queue']),
+            'rooms': len(state['rooms']),
+            'repair_rounds': state['repair_rounds'],
+            'elapsed': elapsed_before + perf_counter() - started,
+            'checkpoint': path if state['phase'] != 'done' else None,
+        }
+
     def clear_all_rooms(self):
-        for sched in self.fixed_schedules + self.generated_schedules:
-            if '(online)' not in str(sched.get('jam', '')).lower():
-                sched['ruangan'] = ''
+        with self.journal.command("Hapus Ruangan"):
+            for sched in self.fixed_schedules + self.generated_schedules:
+                jam = str(sched.get('jam', ''))
+                if '(online)' not in jam.lower() and not is_online_marker(jam) and sched.get('ruangan') != '':
+                    self._set_room(sched, '')
         return True
 
-    def fill_empty_rooms_randomly(self):
+    def fill_empty_rooms_randomly(self, incremental=False):
+        if incremental:
+            try:
+                self.reassign_rooms()
+                return True
+            except Exception as e:
+                print(f"Error in fill_empty_rooms_randomly: {e}")
+                return False
+        with self.journal.command("Generate Ruangan"):
+            mark = self.journal.mark()
+            if self._fill_empty_rooms_randomly():
+                return True
+            self.journal.rollback(self, mark)  # Kembalikan ruangan yang sudah dihapus/diisi
+            return False
+
+    @staticmethod
+    def _student_count(schedule):
+        students = schedule.get('jumlah_mahasiswa', 0)
+        return students if isinstance(students, (int, float)) and students == students else 0
+
+    @staticmethod
+    def has_room(schedule):
+        room = schedule.get('ruangan')
+        return room is not None and not pd.isna(room) and str(room).strip() != ''
+
+    def is_room_pinned(self, schedule):
+        """True jika ruangan jadwal masih ruangan yang tertulis di Excel"""
+        return (schedule.get('source') == 'excel' and self.has_room(schedule)
+                and schedule['ruangan'] == schedule.get('ruangan_excel'))
+
+    def rooms_to_reassign(self, sessions=None):
+        """Jadwal luring yang perlu ruangan baru: tanpa ruangan, melebihi kapasitas atau bentrok ruangan.
+
+        Jadwal yang ruangannya dipin dari Excel tidak pernah dipilih. Dari jadwal yang
+        saling bentrok ruangan cukup satu yang dipilih (yang diperiksa lebih dulu),
+        yang lain tetap di tempat. `sessions` membatasi pemeriksaan (mis. jadwal yang
+        baru diedit), default semua jadwal.
+        """
+        occupancy = self.get_occupancy()
+        if sessions is None:
+            sessions = self.fixed_schedules + self.generated_schedules
+        affected = []
+        moving = set()
+        for sched in sessions:
+            mask = self.jam_mask(sched.get('jam'))
+            if not mask or self.is_room_pinned(sched):
+                continue
+            if self.jam_interval(sched['jam'])[2]:
+                if sched.get('ruangan') != 'Online':
+                    affected.append(sched)
+                continue
+            if not self.has_room(sched) or sched['ruangan'] == 'Online':
+                affected.append(sched)
+                continue
+            room = sched['ruangan']
+            over_capacity = self._student_count(sched) > self.room_capacities.get(room, 0)
+            if over_capacity or occupancy.overlaps(('ruangan', room, sched['hari']), mask, ignore=sched, exclude=moving):
+                affected.append(sched)
+                moving.add(id(sched))
+        return affected
+
+    def reassign_rooms(self, sessions=None):
+        """Mode inkremental Generate Ruangan: hanya jadwal dari rooms_to_reassign yang diberi ruangan baru.
+
+        Penempatan ruangan lain (termasuk yang dipin dari Excel) tidak disentuh,
+        sehingga biaya sebanding dengan jumlah jadwal yang terdampak. Mengembalikan
+        laporan {'checked', 'reassigned', 'unassigned'}. Bila terjadi error, perubahan
+        yang sudah dibuat dibatalkan lalu exception diteruskan ke pemanggil.
+        """
+        checked = len(sessions) if sessions is not None else len(self.fixed_schedules) + len(self.generated_schedules)
+        affected = self.rooms_to_reassign(sessions)
+        report = {'checked': checked, 'reassigned': 0, 'unassigned': []}
+        with self.journal.command("Perbarui Ruangan"):
+            mark = self.journal.mark()
+            try:
+                for sched in affected:
+                    self._set_room(sched, '')  # Lepas dulu agar ruangannya bisa dipakai ulang
+                affected.sort(key=lambda sched: self._student_count(sched), reverse=True)
+                for sched in affected:
+                    if self.jam_interval(sched['jam'])[2]:
+                        self._set_room(sched, 'Online')
+                        report['reassigned'] += 1
+                        continue
+                    department = self.department_of(sched['kelas'])
+                    mask = self.jam_mask(sched['jam'])
+                    count = sched.get('jumlah_mahasiswa', 0)
+                    room = (self.find_free_room(department, sched['hari'], mask, count)
+                            or self.find_free_room(department, sched['hari'], mask, count, any_floor=True))
+                    if room:
+                        self._set_room(sched, room)
+                        report['reassigned'] += 1
+                    else:
+                        report['unassigned'].append(sched)
+            except Exception:
+                self.journal.rollback(self, mark)
+                raise
+        return report
+
+    def _fill_empty_rooms_randomly(self):
         try:
             self.clear_all_rooms()
             
@@ -379,63 +3261,35 @@ class ScheduleGenerator:
             random.shuffle(schedules_without_room)
             
             for sched in schedules_without_room:
-                is_online = "(online)" in str(sched.get('jam', '')).lower()
-                if is_online:
-                    sched['ruangan'] = 'Online'
+                jam = str(sched.get('jam', ''))
+                if "(online)" in jam.lower() or is_online_marker(jam):
+                    self._set_room(sched, 'Online')
                     continue
                     
                 if not sched.get('jam'):  # Skip jika tidak ada jadwal
                     continue
                     
-                department = sched['kelas'][:2] if isinstance(sched['kelas'], str) and len(sched['kelas']) >= 2 else 'default'
-                try:
-                    jam_parts = sched['jam'].split(' - ')
-                    if len(jam_parts) != 2:
-                        continue
-                    start, end = jam_parts
-                    student_count = sched.get('jumlah_mahasiswa', 0)
-                    
-                    # Try preferred rooms first
-                    room = self.get_available_room(
-                        department, 
-                        sched['hari'], 
-                        start, 
-                        end,
-                        student_count
-                    )
-                    if room:
-                        sched['ruangan'] = room
-                        continue
-                        
-                    # Fallback to any available room
-                    for room in self.available_rooms:
-                        if student_count > room.get('kapasitas', 30):
-                            continue
-                            
-                        available = True
-                        for existing in all_schedules:
-                            if existing.get('ruangan') == room['nama'] and existing['hari'] == sched['hari'] and existing.get('jam'):
-                                try:
-                                    e_jam_parts = existing['jam'].split(' - ')
-                                    if len(e_jam_parts) != 2:
-                                        continue
-                                    e_start, e_end = e_jam_parts
-                                    e_start, _ = self.parse_time(e_start)
-                                    e_end, _ = self.parse_time(e_end)
-                                    current_start, _ = self.parse_time(start)
-                                    current_end, _ = self.parse_time(end)
-                                    
-                                    if self.is_time_overlap(current_start, current_end, e_start, e_end):
-                                        available = False
-                                        break
-                                except:
-                                    continue
-                        if available:
-                            sched['ruangan'] = room['nama']
-                            break
-                except Exception as e:
-                    print(f"Error assigning room: {e}")
+                department = self.department_of(sched['kelas'])
+                start, end = sched['jam'].split(' - ')  # Jam sudah dinormalisasi saat data masuk
+                student_count = sched['jumlah_mahasiswa']
+                
+                # Try preferred rooms first
+                room = self.get_available_room(
+                    department, 
+                    sched['hari'], 
+                    start, 
+                    end,
+                    student_count
+                )
+                if room:
+                    self._set_room(sched, room)
                     continue
+                    
+                # Fallback to any available room
+                room = self.find_free_room(department, sched['hari'], self.jam_mask(sched['jam']),
+                                           student_count, any_floor=True)
+                if room:
+                    self._set_room(sched, room)
             
             return True
         except Exception as e:
@@ -446,36 +3300,72 @@ class ScheduleGenerator:
         try:
             output_path = os.path.join(output_folder, f"Jadwal_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
             wb = load_workbook(template_path)
-            sheet = wb.active
-            
-            sheet.cell(row=3, column=1, value="Hari")
-            sheet.cell(row=3, column=2, value="Mata Kuliah")
-            sheet.cell(row=3, column=3, value="Kelas")
-            sheet.cell(row=3, column=4, value="Ruangan")
-            sheet.cell(row=3, column=5, value="Jam")
-            sheet.cell(row=3, column=6, value="SKS")
-            sheet.cell(row=3, column=7, value="Semester")
-            sheet.cell(row=3, column=8, value="Dosen")
-            sheet.cell(row=3, column=9, value="Jumlah Mahasiswa")
-            
-            row = 4
-            for s in schedules:
-                sheet.cell(row=row, column=1, value=s['hari'])
-                sheet.cell(row=row, column=2, value=s['mata_kuliah'])
-                sheet.cell(row=row, column=3, value=s['kelas'])
-                sheet.cell(row=row, column=4, value=s.get('ruangan', ''))
-                sheet.cell(row=row, column=5, value=s['jam'])
-                sheet.cell(row=row, column=6, value=s['sks'])
-                sheet.cell(row=row, column=7, value=s['semester'])
-                sheet.cell(row=row, column=8, value=s['dosen'])
-                sheet.cell(row=row, column=9, value=s.get('jumlah_mahasiswa', ''))
-                row += 1
+            write_schedule_sheet(wb.active, [export_row(s) for s in schedules])
             wb.save(output_path)
             return output_path
         except Exception as e:
             messagebox.showerror("Error", f"Gagal menyimpan: {str(e)}")
             return None
 
+    def bulk_export(self, template_path, output_folder, group_by='dosen', schedules=None,
+                    as_zip=False, max_workers=None):
+        """Simpan satu file jadwal per dosen (atau per `group_by`: 'kelas', 'ruangan').
+
+        Jadwal dikelompokkan lewat kode kategori SessionTable, template dibaca sekali
+        dan setiap worker memuatnya sekali lalu memakainya ulang untuk semua file.
+        Worker membaca jadwal dari SessionSnapshot di shared memory, jadi yang
+        dikirim per file hanya indeks barisnya. Dengan `as_zip` semua file digabung
+        ke satu arsip .zip. Mengembalikan laporan berisi daftar path, jumlah
+        file/sesi, durasi dan throughput.
+        """
+        started = perf_counter()
+        table = self.build_session_table(schedules, keep_rows=False)
+        codes = table.codes[group_by]
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(table.categories[group_by]) + 1))
+        groups = {
+            name: order[bounds[code]:bounds[code + 1]].astype(np.int32)
+            for code, name in enumerate(table.categories[group_by])
+            if name != '' and bounds[code + 1] > bounds[code]
+        }
+
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        file_names = {name: f"Jadwal_{safe_file_name(name)}_{stamp}.xlsx" for name in groups}
+        with open(template_path, 'rb') as f:
+            template = f.read()
+        jobs = [(None if as_zip else os.path.join(output_folder, file_names[name]), rows)
+                for name, rows in groups.items()]
+
+        snapshot = SessionSnapshot.publish(table)
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_export_worker,
+                                     initargs=(template, snapshot.name)) as pool:
+                results = list(pool.map(_export_group, jobs, chunksize=max(1, len(jobs) // 32)))
+        finally:
+            del table
+            snapshot.close()
+            snapshot.unlink()
+
+        if as_zip:
+            zip_path = os.path.join(output_folder, f"Jadwal_per_{group_by}_{stamp}.zip")
+            with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for name, content in zip(groups, results):
+                    archive.writestr(file_names[name], content)
+            paths = [zip_path]
+        else:
+            paths = results
+
+        elapsed = perf_counter() - started
+        sessions = sum(len(indices) for indices in groups.values())
+        return {
+            'paths': paths,
+            'files': len(groups),
+            'sessions': sessions,
+            'seconds': elapsed,
+            'files_per_second': len(groups) / elapsed if elapsed else 0.0,
+            'sessions_per_second': sessions / elapsed if elapsed else 0.0,
+        }
+
     def update_excel_file(self, schedule, new_schedule):
         """Memperbarui file Excel asli dengan perubahan jadwal"""
         try:
@@ -483,237 +3373,342 @@ class ScheduleGenerator:
                 messagebox.showerror("Error", "Tidak ada file Excel yang dimuat")
                 return False
                 
-            # Buat backup file asli
-            backup_path = self.excel_path.replace(".xlsx", f"_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
-            shutil.copyfile(self.excel_path, backup_path)
-            
-            # Baca file Excel
-            wb = load_workbook(self.excel_path)
-            sheet = wb['Mapping mata kuliah']
-            
-            # Temukan baris yang sesuai (indeks dimulai dari 1)
-            row_index = schedule['excel_index'] + 4  # Skip 2 header + 2 baris kosong
-            
-            # Perbarui nilai di Excel
-            sheet.cell(row=row_index, column=1, value=new_schedule['hari'])  # Kolom Hari
-            sheet.cell(row=row_index, column=8, value=new_schedule['jam'])    # Kolom Jam
-            sheet.cell(row=row_index, column=7, value=new_schedule.get('ruangan', ''))  # Kolom Ruangan
-            # Jika ada perubahan pada data lain, tambahkan di sini
-            
-            # Simpan perubahan
-            wb.save(self.excel_path)
+            self._write_excel_rows({schedule['excel_index']: new_schedule})
             return True
         except Exception as e:
             messagebox.showerror("Error", f"Gagal memperbarui file Excel: {str(e)}")
             return False
 
-    def find_all_conflicts(self):
-        conflicts = {
-            'lecturer': [],
-            'room': [],
-            'class': [],
-            'capacity': [],
-            'empty_room': [],
-            'break_time': []  # Konflik waktu istirahat
+    def _write_excel_rows(self, rows):
+        """Tulis hari/jam/ruangan {excel_index: jadwal} dalam satu simpan workbook (satu backup).
+
+        Setiap baris dicatat di jurnal sebagai delta 'excel' (nilai sel dan hash baris
+        lama/baru) agar undo/redo ikut mengembalikan isi workbook.
+        """
+        # Buat backup file asli
+        backup_path = self.excel_path.replace(".xlsx", f"_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx")
+        shutil.copyfile(self.excel_path, backup_path)
+
+        cells = {
+            excel_index: {
+                1: schedule['hari'],  # Kolom Hari
+                8: schedule['jam'],  # Kolom Jam
+                7: schedule.get('ruangan', ''),  # Kolom Ruangan
+            }
+            for excel_index, schedule in rows.items()
         }
-        
-        all_schedules = self.fixed_schedules + self.generated_schedules
-        
-        for i, sched in enumerate(all_schedules):
-            if not sched.get('jam'):  # Skip jika tidak ada jadwal
-                continue
-                
-            # Lecturer conflicts
-            for j, other in enumerate(all_schedules[i+1:], i+1):
-                if sched['dosen'] == other['dosen'] and sched['hari'] == other['hari'] and other.get('jam'):
-                    try:
-                        s_jam_parts = sched['jam'].split(' - ')
-                        o_jam_parts = other['jam'].split(' - ')
-                        if len(s_jam_parts) != 2 or len(o_jam_parts) != 2:
-                            continue
-                            
-                        s_start, s_end = s_jam_parts
-                        o_start, o_end = o_jam_parts
-                        
-                        s_start, _ = self.parse_time(s_start)
-                        s_end, _ = self.parse_time(s_end)
-                        o_start, _ = self.parse_time(o_start)
-                        o_end, _ = self.parse_time(o_end)
-                        
-                        if not s_start or not s_end or not o_start or not o_end:
-                            continue
-                            
-                        if self.is_time_overlap(s_start, s_end, o_start, o_end):
-                            conflicts['lecturer'].append({
-                                'conflict_type': 'Dosen ganda',
-                                'dosen': sched['dosen'],
-                                'hari': sched['hari'],
-                                'waktu': f"{max(s_start, o_start)}-{min(s_end, o_end)}",
-                                'schedule1': sched,
-                                'schedule2': other
-                            })
-                    except:
+        old_cells = self._write_excel_cells(cells)
+        hashes = self._excel_row_hashes(cells)
+        for excel_index, new_cells in cells.items():
+            old_hash = self.excel_row_hashes.get(excel_index)
+            self.excel_row_hashes[excel_index] = hashes[excel_index]
+            self.journal.record(('excel', excel_index,
+                                 {column: (old_cells[excel_index][column], value) for column, value in new_cells.items()},
+                                 (old_hash, hashes[excel_index])))
+
+    def _write_excel_cells(self, rows):
+        """Tulis {excel_index: {kolom: nilai}} ke sheet mapping; kembalikan nilai lama sel tersebut"""
+        wb = load_workbook(self.excel_path)
+        sheet = wb['Mapping mata kuliah']
+        old = {}
+        for excel_index, cells in rows.items():
+            row_index = excel_index + 4  # Skip 2 header + 2 baris kosong
+            old[excel_index] = {column: sheet.cell(row=row_index, column=column).value for column in cells}
+            for column, value in cells.items():
+                sheet.cell(row=row_index, column=column, value=value)
+        wb.save(self.excel_path)
+        self.excel_mtime = os.path.getmtime(self.excel_path)
+        return old
+
+    def _excel_row_hashes(self, excel_indices):
+        """Hash baris mapping seperti yang dibaca load_data (None bila baris tidak terbaca)"""
+        df = self._read_mapping(self.excel_path)
+        return {idx: self._row_hash(df.loc[idx]) if idx in df.index else None for idx in excel_indices}
+
+    def build_session_table(self, schedules=None, keep_rows=True):
+        """Bangun SessionTable kolumnar dari jadwal (default: semua jadwal)"""
+        if schedules is None:
+            schedules = self.fixed_schedules + self.generated_schedules
+        return SessionTable.from_schedules(schedules, self.jam_interval, keep_rows=keep_rows)
+
+    def _find_all_conflicts_columnar(self):
+        """Versi find_all_conflicts yang berjalan sebagai operasi vektor atas SessionTable"""
+        conflicts = {key: [] for key in ('lecturer', 'room', 'class', 'capacity', 'empty_room', 'break_time')}
+        table = self.build_session_table()
+        to_time = lambda minute: time(int(minute) // 60, int(minute) % 60)
+
+        pair_types = [
+            ('lecturer', 'dosen', 'Dosen ganda'),
+            ('room', 'ruangan', 'Ruangan ganda'),
+            ('class', 'kelas', 'Kelas ganda'),
+        ]
+        for key, field, label in pair_types:
+            first, second = table.overlap_pairs(field)
+            overlap_start = np.maximum(table.start[first], table.start[second])
+            overlap_end = np.minimum(table.end[first], table.end[second])
+            for i, j, o_start, o_end in zip(first, second, overlap_start, overlap_end):
+                sched = table.row(i)
+                conflicts[key].append({
+                    'conflict_type': label,
+                    field: sched[field],
+                    'hari': sched['hari'],
+                    'waktu': f"{to_time(o_start)}-{to_time(o_end)}",
+                    'schedule1': sched,
+                    'schedule2': table.row(j)
+                })
+
+        for i in table.capacity_violations(self.room_capacities):
+            sched = table.row(i)
+            conflicts['capacity'].append({
+                'conflict_type': 'Kapasitas ruangan terlampaui',
+                'ruangan': sched['ruangan'],
+                'kapasitas': self.room_capacities.get(sched['ruangan'], 0),
+                'mahasiswa': sched.get('jumlah_mahasiswa', 0),
+                'schedule': sched
+            })
+
+        break_intervals = [(bt['start'].hour * 60 + bt['start'].minute, bt['end'].hour * 60 + bt['end'].minute)
+                           for bt in self.break_times]
+        for i in table.break_violations(break_intervals):
+            sched = table.row(i)
+            conflicts['break_time'].append({
+                'conflict_type': 'Waktu istirahat',
+                'dosen': sched['dosen'],
+                'hari': sched['hari'],
+                'waktu': sched['jam'],
+                'schedule': sched
+            })
+
+        days = self.time_grid.days
+        slots = self.time_grid.offline_slots()
+        slot_minutes = [self.time_range_minutes(start, end)[:2] for start, end in slots]
+        occupied = table.room_slot_occupancy([room['nama'] for room in self.available_rooms], days, slot_minutes)
+        for room_pos, day_pos, slot_pos in zip(*np.nonzero(~occupied)):
+            room = self.available_rooms[room_pos]
+            start, end = slots[slot_pos]
+            conflicts['empty_room'].append({
+                'conflict_type': 'Ruangan kosong',
+                'ruangan': room['nama'],
+                'hari': days[day_pos],
+                'waktu': f"{start} - {end}",
+                'lantai': room.get('lantai', '?'),
+                'kapasitas': room.get('kapasitas', '?')
+            })
+        return conflicts
+
+    CONFLICT_TYPES = {
+        'lecturer': ('dosen', 'Dosen ganda'),
+        'room': ('ruangan', 'Ruangan ganda'),
+        'class': ('kelas', 'Kelas ganda'),
+        'capacity': ('ruangan', 'Kapasitas ruangan terlampaui'),
+        'empty_room': ('ruangan', 'Ruangan kosong'),
+        'break_time': ('dosen', 'Waktu istirahat'),
+    }
+
+    def _matches(self, schedule, filters):
+        return all(schedule.get(field) == value for field, value in filters.items())
+
+    def _iter_schedules(self, filters):
+        """Jadwal yang cocok dengan filter, memakai indeks okupansi bila bisa"""
+        occupancy = self.get_occupancy()
+        for kind in ('dosen', 'kelas'):
+            if kind in filters:
+                for key in occupancy.keys(kind, filters[kind], filters.get('hari')):
+                    for sched, _ in list(occupancy.members.get(key, {}).values()):
+                        if self._matches(sched, filters):
+                            yield sched
+                return
+        for sched in itertools.chain(self.fixed_schedules, self.generated_schedules):
+            if self._matches(sched, filters):
+                yield sched
+
+    def _iter_pair_conflicts(self, conflict_key, filters):
+        field, label = self.CONFLICT_TYPES[conflict_key]
+        occupancy = self.get_occupancy()
+        to_time = lambda minute: time(minute // 60, minute % 60)
+        for key in occupancy.keys(field, filters.get(field), filters.get('hari')):
+            members = []
+            for sched, _ in occupancy.members.get(key, {}).values():
+                start, end, _ = self.jam_interval(sched['jam'])
+                members.append((start, end, sched))
+            members.sort(key=lambda member: member[0])
+            for i, (s_start, s_end, sched) in enumerate(members):
+                for o_start, o_end, other in members[i + 1:]:
+                    if o_start >= s_end:
+                        break
+                    if filters and not (self._matches(sched, filters) or self._matches(other, filters)):
                         continue
-            
-            # Room conflicts and capacity issues
-            if sched.get('ruangan') and sched['ruangan'] != 'Online' and sched.get('jam'):
-                # Room time conflicts
-                for j, other in enumerate(all_schedules[i+1:], i+1):
-                    if other.get('ruangan') == sched['ruangan'] and other['hari'] == sched['hari'] and other.get('jam'):
-                        try:
-                            s_jam_parts = sched['jam'].split(' - ')
-                            o_jam_parts = other['jam'].split(' - ')
-                            if len(s_jam_parts) != 2 or len(o_jam_parts) != 2:
-                                continue
-                                
-                            s_start, s_end = s_jam_parts
-                            o_start, o_end = o_jam_parts
-                            
-                            s_start, _ = self.parse_time(s_start)
-                            s_end, _ = self.parse_time(s_end)
-                            o_start, _ = self.parse_time(o_start)
-                            o_end, _ = self.parse_time(o_end)
-                            
-                            if not s_start or not s_end or not o_start or not o_end:
-                                continue
-                                
-                            if self.is_time_overlap(s_start, s_end, o_start, o_end):
-                                conflicts['room'].append({
-                                    'conflict_type': 'Ruangan ganda',
-                                    'ruangan': sched['ruangan'],
-                                    'hari': sched['hari'],
-                                    'waktu': f"{max(s_start, o_start)}-{min(s_end, o_end)}",
-                                    'schedule1': sched,
-                                    'schedule2': other
-                                })
-                        except:
-                            continue
-                
-                # Room capacity issues
+                    yield {
+                        'conflict_type': label,
+                        field: sched[field],
+                        'hari': sched['hari'],
+                        'waktu': f"{to_time(max(s_start, o_start))}-{to_time(min(s_end, o_end))}",
+                        'schedule1': sched,
+                        'schedule2': other
+                    }
+
+    def _iter_capacity_conflicts(self, filters):
+        occupancy = self.get_occupancy()
+        for key in occupancy.keys('ruangan', filters.get('ruangan'), filters.get('hari')):
+            for sched, _ in list(occupancy.members.get(key, {}).values()):
                 room_capacity = self.room_capacities.get(sched['ruangan'], 0)
-                if sched.get('jumlah_mahasiswa', 0) > room_capacity:
-                    conflicts['capacity'].append({
+                if sched.get('jumlah_mahasiswa', 0) > room_capacity and self._matches(sched, filters):
+                    yield {
                         'conflict_type': 'Kapasitas ruangan terlampaui',
                         'ruangan': sched['ruangan'],
                         'kapasitas': room_capacity,
                         'mahasiswa': sched.get('jumlah_mahasiswa', 0),
                         'schedule': sched
-                    })
-            
-            # Class conflicts
-            for j, other in enumerate(all_schedules[i+1:], i+1):
-                if sched['kelas'] == other['kelas'] and sched['hari'] == other['hari'] and other.get('jam'):
-                    try:
-                        s_jam_parts = sched['jam'].split(' - ')
-                        o_jam_parts = other['jam'].split(' - ')
-                        if len(s_jam_parts) != 2 or len(o_jam_parts) != 2:
-                            continue
-                            
-                        s_start, s_end = s_jam_parts
-                        o_start, o_end = o_jam_parts
-                        
-                        s_start, _ = self.parse_time(s_start)
-                        s_end, _ = self.parse_time(s_end)
-                        o_start, _ = self.parse_time(o_start)
-                        o_end, _ = self.parse_time(o_end)
-                        
-                        if not s_start or not s_end or not o_start or not o_end:
-                            continue
-                            
-                        if self.is_time_overlap(s_start, s_end, o_start, o_end):
-                            conflicts['class'].append({
-                                'conflict_type': 'Kelas ganda',
-                                'kelas': sched['kelas'],
-                                'hari': sched['hari'],
-                                'waktu': f"{max(s_start, o_start)}-{min(s_end, o_end)}",
-                                'schedule1': sched,
-                                'schedule2': other
-                            })
-                    except:
-                        continue
-            
-            # Break time conflicts
-            if sched.get('ruangan') != 'Online' and sched.get('jam'):
-                try:
-                    jam_parts = sched['jam'].split(' - ')
-                    if len(jam_parts) == 2:
-                        start, end = jam_parts
-                        if self.is_break_time(start, end):
-                            conflicts['break_time'].append({
-                                'conflict_type': 'Waktu istirahat',
-                                'dosen': sched['dosen'],
-                                'hari': sched['hari'],
-                                'waktu': sched['jam'],
-                                'schedule': sched
-                            })
-                except:
-                    pass
-        
-        # Check for empty rooms
-        days = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat']
-        
+                    }
+
+    def _iter_break_conflicts(self, filters):
+        break_mask = self.break_mask()
+        for sched in self._iter_schedules(filters):
+            if sched.get('ruangan') != 'Online' and self.jam_mask(sched.get('jam')) & break_mask:
+                yield {
+                    'conflict_type': 'Waktu istirahat',
+                    'dosen': sched['dosen'],
+                    'hari': sched['hari'],
+                    'waktu': sched['jam'],
+                    'schedule': sched
+                }
+
+    def _iter_empty_rooms(self, filters):
+        occupancy = self.get_occupancy()
+        grid = self.time_grid
+        slots = [position for position in grid.program_slots() if not grid.online[position]]
+        days = grid.days
         for room in self.available_rooms:
             room_name = room['nama']
-            
+            if 'ruangan' in filters and filters['ruangan'] != room_name:
+                continue
             for day in days:
-                for start, end in self.time_slots[:5]:  # Skip online slots
-                    occupied = False
-                    for sched in all_schedules:
-                        if sched.get('ruangan') == room_name and sched['hari'] == day and sched.get('jam'):
-                            try:
-                                s_jam_parts = sched['jam'].split(' - ')
-                                if len(s_jam_parts) != 2:
-                                    continue
-                                s_start, s_end = s_jam_parts
-                                s_start, _ = self.parse_time(s_start)
-                                s_end, _ = self.parse_time(s_end)
-                                current_start, _ = self.parse_time(start)
-                                current_end, _ = self.parse_time(end)
-                                
-                                if not s_start or not s_end:
-                                    continue
-                                    
-                                if self.is_time_overlap(current_start, current_end, s_start, s_end):
-                                    occupied = True
-                                    break
-                            except:
-                                continue
-                    
-                    if not occupied:
-                        conflicts['empty_room'].append({
+                if 'hari' in filters and filters['hari'] != day:
+                    continue
+                occupied = occupancy.mask_for(('ruangan', room_name, day))
+                for position in slots:
+                    start, end = grid.labels[position]
+                    if not occupied & grid.masks[position]:
+                        yield {
                             'conflict_type': 'Ruangan kosong',
                             'ruangan': room_name,
                             'hari': day,
                             'waktu': f"{start} - {end}",
                             'lantai': room.get('lantai', '?'),
                             'kapasitas': room.get('kapasitas', '?')
-                        })
-        
+                        }
+
+    def iter_conflicts(self, types=None, limit=None, filters=None):
+        """Generator konflik yang menghasilkan setiap konflik begitu ditemukan.
+
+        `types` memilih jenis konflik (kunci CONFLICT_TYPES), `limit` menghentikan
+        pencarian setelah sejumlah konflik, dan `filters` (mis. {'dosen': ..., 'hari': ...})
+        membatasi pencarian ke jadwal yang cocok.
+        """
+        filters = filters or {}
+        sources = {
+            'lecturer': lambda: self._iter_pair_conflicts('lecturer', filters),
+            'room': lambda: self._iter_pair_conflicts('room', filters),
+            'class': lambda: self._iter_pair_conflicts('class', filters),
+            'capacity': lambda: self._iter_capacity_conflicts(filters),
+            'empty_room': lambda: self._iter_empty_rooms(filters),
+            'break_time': lambda: self._iter_break_conflicts(filters),
+        }
+        found = 0
+        for conflict_key in types or sources.keys():
+            for conflict in sources[conflict_key]():
+                yield conflict_key, conflict
+                found += 1
+                if limit is not None and found >= limit:
+                    return
+
+    def has_conflict(self, types=None, filters=None):
+        return next(self.iter_conflicts(types, limit=1, filters=filters), None) is not None
+
+    def _conflict_record(self, conflict_key, conflict):
+        """Ringkas konflik menjadi dict datar untuk laporan"""
+        def describe(sched):
+            return {field: sched.get(field) for field in
+                    ('dosen', 'mata_kuliah', 'kelas', 'hari', 'jam', 'ruangan', 'excel_index', 'source')}
+
+        record = {'type': conflict_key}
+        for field, value in conflict.items():
+            if field in ('schedule', 'schedule1', 'schedule2'):
+                record[field] = describe(value)
+            else:
+                record[field] = value
+        return record
+
+    def write_conflict_report(self, path, fmt=None, types=None, filters=None, limit=None):
+        """Tulis laporan konflik secara streaming ke JSONL atau CSV, kembalikan jumlah baris"""
+        fmt = fmt or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        count = 0
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = None
+            if fmt == 'csv':
+                writer = csv.writer(f)
+                writer.writerow(['Tipe', 'Konflik', 'Entitas', 'Hari', 'Waktu', 'Jadwal 1', 'Jadwal 2', 'Detail'])
+            for conflict_key, conflict in self.iter_conflicts(types, limit, filters):
+                record = self._conflict_record(conflict_key, conflict)
+                if writer is None:
+                    f.write(json.dumps(record, default=str, ensure_ascii=False) + "\n")
+                else:
+                    field = self.CONFLICT_TYPES[conflict_key][0]
+                    first = record.get('schedule1') or record.get('schedule') or {}
+                    second = record.get('schedule2') or {}
+                    detail = ''
+                    if conflict_key == 'capacity':
+                        detail = f"Mahasiswa: {record['mahasiswa']} / Kapasitas: {record['kapasitas']}"
+                    elif conflict_key == 'empty_room':
+                        detail = f"Lantai: {record['lantai']} / Kapasitas: {record['kapasitas']}"
+                    writer.writerow([
+                        conflict_key,
+                        record['conflict_type'],
+                        record.get(field, ''),
+                        record.get('hari', first.get('hari', '')),
+                        record.get('waktu', first.get('jam', '')),
+                        f"{first.get('mata_kuliah', '')} ({first.get('kelas', '')})" if first else '',
+                        f"{second.get('mata_kuliah', '')} ({second.get('kelas', '')})" if second else '',
+                        detail
+                    ])
+                count += 1
+        return count
+
+    def room_utilization(self):
+        """Hitung analitik pemakaian ruangan untuk jadwal saat ini"""
+        return RoomUtilization(self)
+
+    def find_all_conflicts(self):
+        if self.use_columnar:
+            return self._find_all_conflicts_columnar()
+            
+        conflicts = {conflict_key: [] for conflict_key in self.CONFLICT_TYPES}
+        for conflict_key, conflict in self.iter_conflicts():
+            conflicts[conflict_key].append(conflict)
         return conflicts
     
     def suggest_conflict_resolutions(self, conflict):
         suggestions = []
         
         if conflict['conflict_type'] == 'Dosen ganda':
-            days = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat']
-            other_days = [d for d in days if d != conflict['hari']]
+            schedule = conflict['schedule1']
+            days = self.days_for(schedule['kelas'])
+            other_days = [(d, schedule['jam'], None) for d in days if d != conflict['hari']]
             
-            for day in other_days:
-                temp_schedule = conflict['schedule1'].copy()
-                temp_schedule['hari'] = day
-                if not self.is_conflict(temp_schedule):
-                    suggestions.append(f"Pindahkan {temp_schedule['mata_kuliah']} ke hari {day}")
-                    break
+            best_day = self.rank_placements(schedule, self.evaluate_placements(schedule, other_days))
+            if best_day:
+                suggestions.append(f"Pindahkan {schedule['mata_kuliah']} ke hari {best_day[0]['hari']}")
             
-            for slot in self.time_slots:
-                temp_schedule = conflict['schedule1'].copy()
-                temp_schedule['jam'] = f"{slot[0]} - {slot[1]}"
-                if not self.is_conflict(temp_schedule):
-                    suggestions.append(f"Ubah jam {temp_schedule['mata_kuliah']} menjadi {slot[0]}-{slot[1]}")
-                    break
+            slots = [(schedule['hari'], slot, None) for slot in self.time_grid.time_slots(self.time_grid.program_of(schedule['kelas']))]
+            best = self.rank_placements(schedule, self.evaluate_placements(schedule, slots))
+            if best:
+                start, end = best[0]['jam'].split(' - ')
+                suggestions.append(f"Ubah jam {schedule['mata_kuliah']} menjadi {start}-{end}")
+            elif not best_day:
+                suggestions.append(self._free_slot_suggestion(schedule, days))
         
         elif conflict['conflict_type'] == 'Ruangan ganda':
-            department = conflict['schedule1']['kelas'][:2] if len(conflict['schedule1']['kelas']) >= 2 else 'default'
+            department = self.department_of(conflict['schedule1']['kelas'])
             jam_parts = conflict['schedule1']['jam'].split(' - ')
             if len(jam_parts) != 2:
                 suggestions.append("Format waktu tidak valid")
@@ -739,48 +3734,26 @@ class ScheduleGenerator:
         elif conflict['conflict_type'] == 'Kelas ganda':
             suggestions.append("Ubah salah satu kelas menjadi online")
             
-            days = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat']
-            other_days = [d for d in days if d != conflict['hari']]
+            schedule = conflict['schedule1']
+            days = self.days_for(schedule['kelas'])
+            other_days = [(d, schedule['jam'], None) for d in days if d != conflict['hari']]
             
-            for day in other_days:
-                temp_schedule = conflict['schedule1'].copy()
-                temp_schedule['hari'] = day
-                if not self.is_conflict(temp_schedule):
-                    suggestions.append(f"Pindahkan {temp_schedule['mata_kuliah']} ke hari {day}")
-                    break
+            best = self.rank_placements(schedule, self.evaluate_placements(schedule, other_days))
+            if best:
+                suggestions.append(f"Pindahkan {schedule['mata_kuliah']} ke hari {best[0]['hari']}")
+            else:
+                suggestions.append(self._free_slot_suggestion(schedule, days))
         
         elif conflict['conflict_type'] == 'Kapasitas ruangan terlampaui':
             required_capacity = conflict['mahasiswa']
             current_room = conflict['ruangan']
             
+            schedule = conflict['schedule']
+            mask = self.jam_mask(schedule.get('jam'))
+            occupancy = self.get_occupancy()
             for room in self.available_rooms:
                 if room['nama'] != current_room and room.get('kapasitas', 0) >= required_capacity:
-                    available = True
-                    for sched in self.fixed_schedules + self.generated_schedules:
-                        if sched.get('ruangan') == room['nama'] and sched['hari'] == conflict['schedule']['hari'] and sched.get('jam'):
-                            try:
-                                s_jam_parts = sched['jam'].split(' - ')
-                                if len(s_jam_parts) != 2:
-                                    continue
-                                s_start, s_end = s_jam_parts
-                                s_start, _ = self.parse_time(s_start)
-                                s_end, _ = self.parse_time(s_end)
-                                c_jam_parts = conflict['schedule']['jam'].split(' - ')
-                                if len(c_jam_parts) != 2:
-                                    continue
-                                c_start, c_end = c_jam_parts
-                                c_start, _ = self.parse_time(c_start)
-                                c_end, _ = self.parse_time(c_end)
-                                
-                                if not s_start or not s_end or not c_start or not c_end:
-                                    continue
-                                    
-                                if self.is_time_overlap(c_start, c_end, s_start, s_end):
-                                    available = False
-                                    break
-                            except:
-                                continue
-                    if available:
+                    if not occupancy.overlaps(('ruangan', room['nama'], schedule['hari']), mask):
                         suggestions.append(f"Ganti ruangan {current_room} dengan {room['nama']} (kapasitas: {room['kapasitas']})")
                         break
             
@@ -803,8 +3776,9 @@ class ScheduleGenerator:
             suggestions.append("Bisa digunakan untuk rapat atau kegiatan lain")
         
         elif conflict['conflict_type'] == 'Waktu istirahat':
-            suggestions.append("Pindahkan ke waktu sebelum pukul 12:00 atau setelah pukul 13:00")
-            suggestions.append("Pindahkan ke waktu sebelum pukul 18:00 atau setelah pukul 19:00")
+            for start, end in self.time_grid.breaks:
+                suggestions.append(f"Pindahkan ke waktu sebelum pukul {start // 60:02d}:{start % 60:02d} "
+                                   f"atau setelah pukul {end // 60:02d}:{end % 60:02d}")
             suggestions.append("Ubah menjadi kelas online")
         
         if not suggestions:
@@ -812,31 +3786,189 @@ class ScheduleGenerator:
         
         return suggestions
 
+    def _free_slot_suggestion(self, schedule, days, limit=3):
+        """Ringkasan slot kosong (dari indeks slot bebas) untuk saran konflik"""
+        options = self.feasible_slots(schedule, days)
+        if not options:
+            return f"Tidak ada slot feasible untuk {schedule['mata_kuliah']}"
+        listed = ", ".join(f"{day} {start}-{end}" for day, start, end in options[:limit])
+        more = f" (+{len(options) - limit} lainnya)" if len(options) > limit else ""
+        return f"Slot kosong untuk {schedule['mata_kuliah']}: {listed}{more}"
+
     def add_manual_schedule(self, schedule):
         # Untuk manual, tambahkan sebagai fixed schedule
         schedule['source'] = 'manual'
-        self.fixed_schedules.append(schedule)
-        
-        # Update lists if new entries
-        if schedule['dosen'] not in self.lecturers:
-            self.lecturers.append(schedule['dosen'])
-        if schedule['mata_kuliah'] not in self.subjects:
-            self.subjects.append(schedule['mata_kuliah'])
-        if schedule['kelas'] not in self.classes:
-            self.classes.append(schedule['kelas'])
+        report = self.ingest_reports.setdefault('manual', IngestReport('manual'))
+        if self._ingest(report, f"{schedule.get('dosen')} / {schedule.get('mata_kuliah')}", schedule) is None:
+            return False
+        index = self.get_schedule_index()
+        entity_lists = (('dosen', self.lecturers), ('mata_kuliah', self.subjects), ('kelas', self.classes))
+        unseen = [(field, names) for field, names in entity_lists if not index.has(field, schedule[field])]
+        self._insert_schedule(schedule, 'fixed_schedules')
+        
+        # Update lists if new entries (hanya nama yang belum ada di indeks yang dicek di daftar)
+        for field, names in unseen:
+            if schedule[field] not in names:
+                names.append(schedule[field])
             
         return True
 
+    IMPORT_COLUMNS = {
+        'Hari': 'hari', 'Mata Kuliah': 'mata_kuliah', 'Kelas': 'kelas', 'Ruangan': 'ruangan',
+        'Jam': 'jam', 'SKS': 'sks', 'Semester': 'semester', 'Dosen': 'dosen', 'Nama Dosen': 'dosen',
+        'Jumlah Mahasiswa': 'jumlah_mahasiswa',
+    }
+    IMPORT_REASONS = {
+        'wajib': 'Dosen, Mata Kuliah, dan Kelas harus diisi',
+        'angka': 'SKS, Semester, atau Jumlah Mahasiswa bukan bilangan bulat',
+        'hari': 'Hari tidak dikenal atau kosong',
+        'format_jam': 'Format jam tidak valid atau mulai >= selesai',
+        'ruangan': 'Ruangan tidak dikenal',
+        'kapasitas': 'Kapasitas ruangan terlampaui',
+        'istirahat': 'Bentrok waktu istirahat',
+        'istirahat_dosen': 'Bentrok waktu istirahat dosen',
+        'dosen': 'Bentrok dengan jadwal dosen',
+        'kelas': 'Bentrok dengan jadwal kelas',
+        'ruangan_bentrok': 'Ruangan sudah terpakai',
+        'gagal_simpan': 'Ditolak saat disimpan (lihat laporan data masuk)',
+    }
+
+    def read_manual_file(self, path):
+        """Baca file CSV/xlsx jadwal manual; header di baris pertama atau baris 3 (format ekspor)"""
+        reader = pd.read_csv if path.lower().endswith('.csv') else pd.read_excel
+        df = reader(path)
+        df.attrs['first_row'] = 2  # Nomor baris data pertama di file, untuk laporan
+        if not {'Mata Kuliah', 'Kelas'} <= set(df.columns):
+            df = reader(path, skiprows=2)
+            df.attrs['first_row'] = 4
+        missing = {'Mata Kuliah', 'Kelas', 'Hari', 'Jam'} - set(df.columns)
+        if missing or not {'Dosen', 'Nama Dosen'} & set(df.columns):
+            raise ValueError(f"Kolom wajib tidak ditemukan: {', '.join(sorted(missing)) or 'Dosen'}")
+        return df
+
+    def validate_manual_frame(self, df):
+        """Validasi semua baris jadwal manual sekaligus.
+
+        Format, hari, angka dan kapasitas dicek dengan operasi kolom; bentrok dosen,
+        kelas dan ruangan dicek lewat mask indeks okupansi ditambah indeks mask baris
+        yang sudah diterima (baris lebih awal menang). Mengembalikan (jadwal yang
+        diterima, DataFrame laporan per baris dengan kolom baris/status/alasan).
+        """
+        first_row = df.attrs.get('first_row', 2)
+        frame = pd.DataFrame({field: df[column] for column, field in self.IMPORT_COLUMNS.items()
+                              if column in df.columns})
+        for field in ('hari', 'mata_kuliah', 'kelas', 'ruangan', 'jam', 'dosen'):
+            values = frame[field] if field in frame else pd.Series('', index=frame.index)
+            frame[field] = values.fillna('').astype(str).str.strip()
+        frame['hari'] = frame['hari'].str.capitalize()
+        frame['jam'] = frame['jam'].map(self.normalize_jam)
+        numbers = {}
+        bad_number = np.zeros(len(frame), dtype=bool)
+        for field in ('sks', 'semester', 'jumlah_mahasiswa'):
+            raw = frame[field] if field in frame else pd.Series(np.nan, index=frame.index)
+            numeric = pd.to_numeric(raw, errors='coerce')
+            bad_number |= (numeric.isna() & raw.notna() & (raw.astype(str).str.strip() != '')).to_numpy()
+            bad_number |= (numeric.notna() & (numeric % 1 != 0)).to_numpy()  # mis. SKS 2.7
+            numbers[field] = numeric.fillna(0).astype(int).to_numpy()
+
+        intervals = frame['jam'].map(lambda jam: parse_jam(jam) if jam else None)
+        marker = frame['jam'].map(is_online_marker).to_numpy(dtype=bool)  # "online" tanpa jam
+        frame.loc[marker, 'jam'] = 'online'
+        has_jam = (frame['jam'] != '').to_numpy() & ~marker
+        bad_jam = has_jam & intervals.isna().to_numpy()
+        online = marker | np.array([bool(interval and interval[2]) for interval in intervals])
+        rooms = frame['ruangan'].where(~online, 'Online').to_numpy(dtype=object)
+        has_room = (rooms != '') & (rooms != 'Online')
+        capacities = np.array([self.room_capacities.get(room, -1) for room in rooms], dtype=np.float64)
+
+        checks = [
+            ('wajib', ((frame['dosen'] == '') | (frame['mata_kuliah'] == '') | (frame['kelas'] == '')).to_numpy()),
+            ('angka', bad_number),
+            ('hari', (has_jam | marker) & ~frame['hari'].isin(WEEKDAYS).to_numpy()),
+            ('format_jam', bad_jam),
+            ('ruangan', has_room & (capacities < 0)),
+            ('kapasitas', has_room & (capacities >= 0) & (numbers['jumlah_mahasiswa'] > capacities)),
+        ]
+        reasons = np.full(len(frame), '', dtype=object)
+        for reason, failed in checks:
+            reasons[(reasons == '') & failed] = reason
+
+        occupancy = self.get_occupancy()
+        break_mask = self.break_mask()
+        batch = defaultdict(int)  # Indeks mask baris yang sudah diterima di batch ini
+        accepted = []
+        for position, row in enumerate(frame.itertuples(index=False)):
+            if reasons[position]:
+                continue
+            schedule = {
+                'dosen': row.dosen, 'mata_kuliah': row.mata_kuliah, 'kelas': row.kelas,
+                'hari': row.hari, 'jam': row.jam,
+                'semester': int(numbers['semester'][position]), 'sks': int(numbers['sks'][position]),
+                'ruangan': rooms[position], 'jumlah_mahasiswa': int(numbers['jumlah_mahasiswa'][position]),
+            }
+            if has_jam[position]:
+                interval = intervals.iat[position]
+                mask = interval_mask(interval[0], interval[1])
+                keys = [('dosen', 'dosen'), ('kelas', 'kelas')]
+                if has_room[position]:
+                    keys.append(('ruangan', 'ruangan_bentrok'))
+                for kind, reason in keys:
+                    key = (kind, schedule[kind], schedule['hari'])
+                    if (occupancy.mask_for(key) | batch[key]) & mask:
+                        reasons[position] = reason
+                        break
+                else:
+                    if not online[position] and mask & break_mask:
+                        reasons[position] = 'istirahat'
+                    elif mask & self.lecturer_break_mask(schedule['dosen'], schedule['hari']):
+                        reasons[position] = 'istirahat_dosen'
+                if reasons[position]:
+                    continue
+                for kind, _ in keys:
+                    batch[(kind, schedule[kind], schedule['hari'])] |= mask
+            accepted.append(schedule)
+
+        report = pd.DataFrame({
+            'baris': np.arange(len(frame)) + first_row,
+            'dosen': frame['dosen'].to_numpy(),
+            'mata_kuliah': frame['mata_kuliah'].to_numpy(),
+            'kelas': frame['kelas'].to_numpy(),
+            'status': np.where(reasons == '', 'diterima', 'ditolak'),
+            'alasan': [self.IMPORT_REASONS.get(reason, '') for reason in reasons],
+        })
+        return accepted, report
+
+    def import_manual_schedules(self, path, dry_run=False):
+        """Impor jadwal manual massal dari CSV/xlsx dalam satu perintah jurnal.
+
+        Mengembalikan (jumlah yang benar-benar ditambahkan, DataFrame laporan per
+        baris); baris yang lolos validasi tetapi gagal disimpan ditandai ditolak.
+        Dengan `dry_run` hanya validasi tanpa menambahkan jadwal.
+        """
+        accepted, report = self.validate_manual_frame(self.read_manual_file(path))
+        if dry_run or not accepted:
+            return len(accepted), report
+        imported = 0
+        rows = report.index[report['status'] == 'diterima']  # Urutannya sama dengan `accepted`
+        with self.journal.command("Impor Manual"):
+            for schedule, row in zip(accepted, rows):
+                if self.add_manual_schedule(schedule):
+                    imported += 1
+                else:
+                    report.at[row, 'status'] = 'ditolak'
+                    report.at[row, 'alasan'] = self.IMPORT_REASONS['gagal_simpan']
+        return imported, report
+
     def remove_schedule(self, schedule):
-        if schedule in self.fixed_schedules:
-            self.fixed_schedules.remove(schedule)
-            return True
-        elif schedule in self.generated_schedules:
-            self.generated_schedules.remove(schedule)
-            return True
-        return False
+        return self._delete_schedule(schedule)
 
     def edit_schedule(self, old_schedule, new_schedule):
+        with self.journal.command("Edit Jadwal"):
+            return self._edit_schedule(old_schedule, new_schedule)
+
+    def _edit_schedule(self, old_schedule, new_schedule):
+        if self.clean_session(new_schedule)[0] == 'quarantined':
+            return False
         # Jika berasal dari Excel, perbarui file Excel
         if old_schedule.get('source') == 'excel':
             if not self.update_excel_file(old_schedule, new_schedule):
@@ -853,7 +3985,7 @@ class ScheduleGenerator:
             
             # Tambahkan jadwal baru
             if new_schedule.get('source') == 'excel':
-                self.fixed_schedules.append(new_schedule)
+                self._insert_schedule(new_schedule, 'fixed_schedules')
             else:
                 self.add_manual_schedule(new_schedule)
                 
@@ -862,30 +3994,124 @@ class ScheduleGenerator:
 
     def auto_resolve_conflicts(self):
         """Fungsi untuk menyelesaikan konflik secara otomatis"""
-        resolved = 0
+        plan = self.plan_conflict_resolution()
+        with self.journal.command("Atasi Konflik"):
+            return plan.commit()
+
+    def plan_conflict_resolution(self):
+        """Susun pemindahan untuk konflik dosen sebagai skenario yang belum diterapkan"""
         conflicts = self.find_all_conflicts()
+        plan = self.scenario('auto_resolve')
         
         # Resolve lecturer conflicts
         for conflict in conflicts['lecturer']:
-            # Coba pindahkan jadwal pertama ke hari lain
-            for day in ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat']:
-                if day == conflict['schedule1']['hari']:
-                    continue
-                    
-                new_schedule = conflict['schedule1'].copy()
-                new_schedule['hari'] = day
-                
-                if not self.is_conflict(new_schedule):
-                    if self.edit_schedule(conflict['schedule1'], new_schedule):
-                        resolved += 1
-                        break
-                        
-        return resolved
+            schedule = conflict['schedule1']
+            if plan.is_changed(schedule):
+                continue
+            # Coba pindahkan jadwal pertama ke hari lain (hari dengan skor terbaik bila use_objective)
+            candidates = [(day, schedule['jam'], None) for day in self.days_for(schedule['kelas'])
+                          if day != schedule['hari']]
+            best = self.rank_placements(schedule, self.evaluate_placements(schedule, candidates, scenario=plan))
+            if best:
+                plan.move(schedule, hari=best[0]['hari'])
+        return plan
 
     def add_lecturer_break(self, lecturer, day, start_time, end_time):
         """Menambahkan waktu istirahat untuk dosen tertentu"""
         key = f"{lecturer}|{day}"
-        self.lecturer_breaks[key].append(f"{start_time} - {end_time}")
+        value = f"{start_time} - {end_time}"
+        self.lecturer_breaks[key].append(value)
+        self.touch_lecturer_break(key)
+        self.journal.record(('break', key, value))
+
+    def touch_lecturer_break(self, key):
+        """Tandai cek konflik dosen pada hari itu usang setelah istirahatnya berubah"""
+        lecturer, _, day = key.rpartition('|')
+        self.decision_cache.bump([('dosen', lecturer, day)])
+
+
+EXPORT_HEADERS = ("Hari", "Mata Kuliah", "Kelas", "Ruangan", "Jam", "SKS", "Semester", "Dosen", "Jumlah Mahasiswa")
+_export_template = None  # Workbook template per proses worker bulk_export
+_export_snapshot = None  # SessionSnapshot yang di-attach worker bulk_export
+
+
+def export_row(schedule):
+    """Nilai satu baris ekspor, urut sesuai EXPORT_HEADERS"""
+    return (schedule['hari'], schedule['mata_kuliah'], schedule['kelas'], schedule.get('ruangan', ''),
+            schedule['jam'], schedule['sks'], schedule['semester'], schedule['dosen'],
+            schedule.get('jumlah_mahasiswa', ''))
+
+
+def write_schedule_sheet(sheet, rows, first_row=4):
+    """Tulis header (baris 3) dan baris jadwal ke sheet template"""
+    for column, header in enumerate(EXPORT_HEADERS, start=1):
+        sheet.cell(row=first_row - 1, column=column, value=header)
+    for row, values in enumerate(rows, start=first_row):
+        for column, value in enumerate(values, start=1):
+            sheet.cell(row=row, column=column, value=value)
+
+
+def safe_file_name(name):
+    return re.sub(r'[^\w\-. ,]+', '_', str(name)).strip() or 'tanpa_nama'
+
+
+def _init_export_worker(template, snapshot_name):
+    global _export_template, _export_snapshot
+    _export_template = load_workbook(BytesIO(template))
+    _export_snapshot = SessionSnapshot.attach(snapshot_name)
+
+
+def _export_cell(value):
+    """Nilai numerik dari snapshot (float32) kembali ke int bila bulat, NaN menjadi kosong"""
+    if isinstance(value, float):
+        if value != value:
+            return None
+        if value.is_integer():
+            return int(value)
+    return value
+
+
+def _export_group(job):
+    """Worker bulk_export: tulis satu file; kembalikan path, atau isi file bila path None"""
+    path, indices = job
+    table = _export_snapshot.table()
+    rows = [tuple(_export_cell(value) for value in export_row(table.row(index))) for index in indices]
+    sheet = _export_template.active
+    write_schedule_sheet(sheet, rows)
+    try:
+        if path is None:
+            buffer = BytesIO()
+            _export_template.save(buffer)
+            return buffer.getvalue()
+        _export_template.save(path)
+        return path
+    finally:
+        if rows:
+            sheet.delete_rows(4, len(rows))
+
+
+def _generate_shard(payload):
+    """Worker generate_sharded: jadwalkan satu departemen pada lantai preferensinya"""
+    generator = ScheduleGenerator()
+    generator.load_time_grid(payload['time_grid'])
+    generator.department_preferences = {'default': payload['floors']}
+    generator.available_rooms = payload['rooms']
+    generator.room_capacities = payload['room_capacities']
+    generator.fixed_schedules = payload['sessions']
+    generator.lecturer_breaks.update(payload['lecturer_breaks'])
+    generator.rng = random.Random(payload['seed'])
+    generator.diagnostics.trace_candidates = payload['trace_candidates']
+    generator.diagnostics.start_run(f"Shard {payload['department']}")
+    days = generator.time_grid.all_days
+
+    placed, failed = [], []
+    for position, course in enumerate(payload['courses']):
+        schedule = generator._place_course(course, days, rng=generator.rng)
+        if schedule:
+            placed.append((position, schedule))
+        else:
+            failed.append(position)
+    return payload['department'], placed, failed, generator.diagnostics.current
 
 
 class ManualInputDialog(tk.Toplevel):
@@ -902,7 +4128,7 @@ class ManualInputDialog(tk.Toplevel):
         # Form fields
         ttk.Label(self, text="Hari:").grid(row=0, column=0, padx=5, pady=5, sticky='e')
         self.hari_var = tk.StringVar()
-        hari_options = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat']
+        hari_options = generator.time_grid.all_days
         ttk.OptionMenu(self, self.hari_var, hari_options[0], *hari_options).grid(row=0, column=1, padx=5, pady=5, sticky='w')
         
         ttk.Label(self, text="Dosen:").grid(row=1, column=0, padx=5, pady=5, sticky='e')
@@ -983,7 +4209,7 @@ class ManualInputDialog(tk.Toplevel):
                 'mata_kuliah': self.matkul_var.get(),
                 'kelas': self.kelas_var.get(),
                 'hari': self.hari_var.get(),
-                'jam': self.jam_var.get(),
+                'jam': self.generator.normalize_jam(self.jam_var.get().strip()),
                 'semester': int(self.semester_var.get() or 0),
                 'sks': int(self.sks_var.get() or 0),
                 'ruangan': self.ruangan_var.get(),
@@ -1014,7 +4240,10 @@ class ManualInputDialog(tk.Toplevel):
                     messagebox.showerror("Error", "Gagal memperbarui jadwal")
             else:
                 # Adding new schedule
-                self.generator.add_manual_schedule(new_schedule)
+                if not self.generator.add_manual_schedule(new_schedule):
+                    issues = self.generator.ingest_reports['manual'].rows[-1][2]
+                    messagebox.showerror("Error", "Jadwal tidak valid: " + "; ".join(issues))
+                    return
                 messagebox.showinfo("Sukses", "Jadwal berhasil ditambahkan!")
             
             self.callback()
@@ -1042,7 +4271,7 @@ class BreakTimeDialog(tk.Toplevel):
         
         ttk.Label(self, text="Hari:").grid(row=1, column=0, padx=5, pady=5, sticky='e')
         self.hari_var = tk.StringVar()
-        hari_options = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat']
+        hari_options = generator.time_grid.all_days
         ttk.OptionMenu(self, self.hari_var, hari_options[0], *hari_options).grid(row=1, column=1, padx=5, pady=5, sticky='w')
         
         ttk.Label(self, text="Waktu Mulai (HH:MM):").grid(row=2, column=0, padx=5, pady=5, sticky='e')
@@ -1091,6 +4320,131 @@ class BreakTimeDialog(tk.Toplevel):
             messagebox.showerror("Error", f"Gagal menambahkan waktu istirahat: {str(e)}")
 
 
+def fill_frame_table(parent, frame):
+    """Tampilkan DataFrame sebagai Treeview (satu kolom per kolom frame) di dalam parent"""
+    columns = list(frame.columns)
+    tree = ttk.Treeview(parent, columns=columns, show='headings')
+    for col in columns:
+        tree.heading(col, text=col)
+        tree.column(col, width=110, anchor='center')
+    for values in frame.itertuples(index=False):
+        tree.insert('', 'end', values=['' if pd.isna(v) else v for v in values])
+    scroll_y = ttk.Scrollbar(parent, orient="vertical", command=tree.yview)
+    scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
+    tree.configure(yscrollcommand=scroll_y.set)
+    tree.pack(fill=tk.BOTH, expand=True)
+
+
+class UtilizationDialog(tk.Toplevel):
+    """Jendela analitik pemakaian ruangan dengan tab heatmap dan ringkasan"""
+    CELL_WIDTH = 90
+    CELL_HEIGHT = 22
+
+    def __init__(self, parent, generator):
+        super().__init__(parent)
+        self.title("Analitik Ruangan")
+        self.geometry("900x600")
+        self.analytics = generator.room_utilization()
+        frames = self.analytics.to_frames()
+
+        notebook = ttk.Notebook(self)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        heatmap_frame = ttk.Frame(notebook)
+        notebook.add(heatmap_frame, text="Heatmap")
+        self.draw_heatmap(heatmap_frame)
+
+        for name in ('Ruangan', 'Lantai', 'Hari', 'Slot'):
+            tab = ttk.Frame(notebook)
+            notebook.add(tab, text=name)
+            fill_frame_table(tab, frames[name])
+
+        ttk.Button(self, text="Ekspor Laporan", command=self.export).pack(side=tk.RIGHT, padx=5, pady=5)
+
+    def draw_heatmap(self, parent):
+        canvas = tk.Canvas(parent, background='white')
+        scroll_y = ttk.Scrollbar(parent, orient="vertical", command=canvas.yview)
+        scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas.configure(yscrollcommand=scroll_y.set)
+        canvas.pack(fill=tk.BOTH, expand=True)
+
+        label_width = 100
+        for col, day in enumerate(self.analytics.days):
+            canvas.create_text(label_width + col * self.CELL_WIDTH + self.CELL_WIDTH / 2, self.CELL_HEIGHT / 2, text=day)
+        for row, room in enumerate(self.analytics.rooms):
+            y = (row + 1) * self.CELL_HEIGHT
+            canvas.create_text(5, y + self.CELL_HEIGHT / 2, text=f"{room['nama']} (Lt.{room.get('lantai', '?')})", anchor='w')
+            for col in range(len(self.analytics.days)):
+                value = float(self.analytics.heatmap[row, col])
+                shade = int(255 - value * 200)
+                x = label_width + col * self.CELL_WIDTH
+                canvas.create_rectangle(x, y, x + self.CELL_WIDTH, y + self.CELL_HEIGHT,
+                                        fill=f"#ff{shade:02x}{shade:02x}", outline='#cccccc')
+                canvas.create_text(x + self.CELL_WIDTH / 2, y + self.CELL_HEIGHT / 2, text=f"{value * 100:.0f}%")
+        canvas.configure(scrollregion=(0, 0, label_width + len(self.analytics.days) * self.CELL_WIDTH,
+                                       (len(self.analytics.rooms) + 1) * self.CELL_HEIGHT))
+
+    def export(self):
+        path = filedialog.asksaveasfilename(title="Simpan Laporan Ruangan",
+                                            defaultextension=".xlsx",
+                                            filetypes=[("Excel Files", "*.xlsx"), ("CSV", "*.csv")])
+        if path:
+            paths = self.analytics.export(path)
+            messagebox.showinfo("Sukses", "Laporan disimpan:\n" + "\n".join(paths))
+
+
+class DiagnosticsDialog(tk.Toplevel):
+    """Jendela diagnostik generate: histogram alasan penolakan per run, dosen dan mata kuliah"""
+
+    def __init__(self, parent, generator):
+        super().__init__(parent)
+        self.title("Diagnostik Generate")
+        self.geometry("900x600")
+        self.diagnostics = generator.diagnostics
+        self.runs = list(self.diagnostics.runs)
+
+        top = ttk.Frame(self)
+        top.pack(fill=tk.X, padx=5, pady=5)
+        ttk.Label(top, text="Run:").pack(side=tk.LEFT)
+        self.run_var = tk.StringVar()
+        run_dropdown = ttk.Combobox(top, textvariable=self.run_var, state='readonly', width=50,
+                                    values=[f"{i + 1}. {run['label']} ({run['started']})" for i, run in enumerate(self.runs)])
+        run_dropdown.pack(side=tk.LEFT, padx=5)
+        run_dropdown.bind("<<ComboboxSelected>>", lambda e: self.show_run(run_dropdown.current()))
+        ttk.Button(top, text="Ekspor JSON", command=self.export).pack(side=tk.RIGHT, padx=5)
+        memo = generator.decision_cache.stats()
+        memo_text = ", ".join(f"{kind}: {memo[kind]['hits']} hit / {memo[kind]['misses']} miss"
+                              for kind in ('is_conflict', 'get_available_room') if kind in memo)
+        ttk.Label(self, text=f"Memo cek: {memo_text or '-'} ({memo['entries']} entri)").pack(anchor='w', padx=5)
+
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.tabs = {}
+        for name in ('Alasan', 'Dosen', 'Mata Kuliah'):
+            tab = ttk.Frame(self.notebook)
+            self.notebook.add(tab, text=name)
+            self.tabs[name] = tab
+
+        if self.runs:
+            run_dropdown.current(len(self.runs) - 1)
+            self.show_run(len(self.runs) - 1)
+
+    def show_run(self, position):
+        frames = self.diagnostics.to_frames(self.runs[position])
+        for name, tab in self.tabs.items():
+            for child in tab.winfo_children():
+                child.destroy()
+            fill_frame_table(tab, frames[name])
+
+    def export(self):
+        path = filedialog.asksaveasfilename(title="Simpan Diagnostik",
+                                            defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")])
+        if path:
+            self.diagnostics.export(path)
+            messagebox.showinfo("Sukses", f"Diagnostik disimpan:\n{path}")
+
+
 class ScheduleApp:
     def __init__(self, root):
         self.root = root
@@ -1098,9 +4452,12 @@ class ScheduleApp:
         self.root.geometry("1000x800")
         self.generator = ScheduleGenerator()
         self.generator.load_rooms("data/rooms.json")
+        if os.path.exists("data/time_grid.json"):
+            self.generator.load_time_grid("data/time_grid.json")
         self.sort_order_hari = 'asc'
         self.current_filter_hari = None
         self.selected_schedule = None
+        self.tree_schedules = {}  # item Treeview -> jadwal yang ditampilkan
         self.create_widgets()
 
     def create_widgets(self):
@@ -1125,7 +4482,7 @@ class ScheduleApp:
         self.hari_var = tk.StringVar()
         self.hari_dropdown = ttk.Combobox(filter_frame, 
                                         textvariable=self.hari_var,
-                                        values=['Semua', 'Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat'],
+                                        values=['Semua'] + self.generator.display_days(),
                                         state='readonly')
         self.hari_dropdown.pack(side=tk.LEFT, padx=5)
         self.hari_dropdown.set('Semua')
@@ -1135,6 +4492,23 @@ class ScheduleApp:
                                       text="Sort Hari (A-Z)", 
                                       command=self.toggle_sort_hari)
         self.sort_hari_btn.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(filter_frame, text="Cari:").pack(side=tk.LEFT, padx=(15, 0))
+        self.search_field_var = tk.StringVar(value='Semua')
+        search_field = ttk.Combobox(filter_frame,
+                                    textvariable=self.search_field_var,
+                                    values=['Semua', 'Dosen', 'Kelas', 'Ruangan', 'Mata Kuliah'],
+                                    state='readonly',
+                                    width=12)
+        search_field.pack(side=tk.LEFT, padx=5)
+        search_field.bind("<<ComboboxSelected>>", lambda e: self.show_lecturer_schedule())
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(filter_frame, textvariable=self.search_var, width=25)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<KeyRelease>", lambda e: self.show_lecturer_schedule())
+        ttk.Button(filter_frame, text="Reset", command=self.clear_search).pack(side=tk.LEFT, padx=5)
+        self.search_status = ttk.Label(filter_frame, text="")
+        self.search_status.pack(side=tk.LEFT, padx=5)
 
         control_frame = ttk.Frame(main_frame)
         control_frame.pack(fill=tk.X, pady=5)
@@ -1147,6 +4521,16 @@ class ScheduleApp:
         self.lecturer_dropdown.pack(side=tk.LEFT, padx=5)
         self.lecturer_dropdown.bind("<<ComboboxSelected>>", self.show_lecturer_schedule)
         
+        self.watch_excel_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame,
+                       text="Pantau Excel",
+                       variable=self.watch_excel_var,
+                       command=self.toggle_watch_excel).pack(side=tk.RIGHT, padx=5)
+        
+        ttk.Button(control_frame,
+                  text="Muat Ulang Perubahan",
+                  command=self.reload_excel_changes).pack(side=tk.RIGHT, padx=5)
+        
         ttk.Button(control_frame, 
                   text="Load Excel", 
                   command=self.load_excel_data).pack(side=tk.RIGHT, padx=5)
@@ -1184,44 +4568,46 @@ class ScheduleApp:
 
         # Bind selection event
         self.schedule_tree.bind('<<TreeviewSelect>>', self.on_schedule_select)
+        self.root.bind('<Control-z>', lambda event: self.undo())
+        self.root.bind('<Control-y>', lambda event: self.redo())
 
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, pady=5)
         
         buttons = [
             ("Generate Dosen Ini", self.generate_for_lecturer),
+            ("Generate Per Departemen", self.generate_sharded),
+            ("Generate Semua", self.generate_all),
+            ("Generate Berbatas Waktu", self.generate_anytime),
+            ("Generate dari Semester Lalu", self.generate_warm_start),
             ("Hapus Ruangan", self.clear_rooms),
             ("Generate Ruangan", self.generate_rooms),
+            ("Perbarui Ruangan", self.reassign_rooms),
             ("Simpan Semua", self.save_schedule_all),
             ("Simpan Dosen Ini", self.save_schedule_for_current_lecturer),
+            ("Ekspor Per Dosen", self.export_per_lecturer),
             ("Cek Konflik", self.show_conflicts),
             ("Tambah Manual", self.show_manual_input),
+            ("Impor Manual", self.import_manual),
             ("Edit Jadwal", self.edit_selected_schedule),
             ("Hapus Jadwal", self.delete_selected_schedule),
             ("Atasi Konflik", self.resolve_conflicts),
             ("Simpan ke Excel Asli", self.save_to_original_excel),
-            ("Tambah Istirahat", self.add_break_time)  # Tombol baru untuk waktu istirahat
+            ("Tambah Istirahat", self.add_break_time),  # Tombol baru untuk waktu istirahat
+            ("Analitik Ruangan", self.show_room_analytics),
+            ("Diagnostik", self.show_diagnostics),
+            ("Undo", self.undo),
+            ("Redo", self.redo)
         ]
         
-        # Create buttons in two rows to avoid overflow
-        top_button_frame = ttk.Frame(button_frame)
-        top_button_frame.pack(fill=tk.X, pady=2)
-        
-        bottom_button_frame = ttk.Frame(button_frame)
-        bottom_button_frame.pack(fill=tk.X, pady=2)
-        
-        top_buttons = buttons[:6]
-        bottom_buttons = buttons[6:]
-        
-        for text, command in top_buttons:
-            ttk.Button(top_button_frame, 
-                      text=text, 
-                      command=command).pack(side=tk.LEFT, padx=2)
-                      
-        for text, command in bottom_buttons:
-            ttk.Button(bottom_button_frame, 
-                      text=text, 
-                      command=command).pack(side=tk.LEFT, padx=2)
+        # Create buttons in rows of 7 to avoid overflow
+        for row_start in range(0, len(buttons), 7):
+            row_frame = ttk.Frame(button_frame)
+            row_frame.pack(fill=tk.X, pady=2)
+            for text, command in buttons[row_start:row_start + 7]:
+                ttk.Button(row_frame, 
+                          text=text, 
+                          command=command).pack(side=tk.LEFT, padx=2)
 
         self.conflict_frame = ttk.Frame(main_frame)
         
@@ -1268,32 +4654,91 @@ class ScheduleApp:
                           variable=self.conflict_filter, 
                           value=value,
                           command=self.refresh_conflicts).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(filter_frame,
+                  text="Ekspor Laporan",
+                  command=self.export_conflict_report).pack(side=tk.RIGHT, padx=5)
 
     def load_excel_data(self):
         path = filedialog.askopenfilename(title="Pilih File Excel", filetypes=[("Excel Files", "*.xlsx")])
         if path and self.generator.load_data(path):
             self.lecturer_dropdown["values"] = self.generator.lecturers
+            self.hari_dropdown["values"] = ['Semua'] + self.generator.display_days()
             if self.generator.lecturers:
                 self.lecturer_var.set(self.generator.lecturers[0])
                 self.show_lecturer_schedule()
             messagebox.showinfo("Sukses", "Data jadwal berhasil dimuat.")
+            self.show_ingest_report('excel')
+
+    def show_ingest_report(self, source):
+        """Tawarkan simpan laporan validasi bila ada baris yang diperbaiki atau dikarantina"""
+        report = self.generator.ingest_reports.get(source)
+        if report is None or not report.rows:
+            return
+        message = f"Validasi data ({source}): {report.summary()}."
+        if report.counts['quarantined']:
+            message += "\nBaris yang dikarantina tidak dimuat."
+        if messagebox.askyesno("Validasi Data", message + "\n\nSimpan laporan per baris?"):
+            path = filedialog.asksaveasfilename(title="Simpan Laporan Validasi", defaultextension=".csv",
+                                                filetypes=[("CSV", "*.csv")])
+            if path:
+                report.to_frame().to_csv(path, index=False)
+
+    def reload_excel_changes(self, silent=False):
+        if not self.generator.excel_path:
+            if not silent:
+                messagebox.showwarning("Peringatan", "Tidak ada file Excel yang dimuat!")
+            return
+        try:
+            report = self.generator.reload_changes()
+        except Exception as e:
+            if not silent:
+                messagebox.showerror("Error", f"Gagal memuat ulang perubahan: {str(e)}")
+            return
+        self.lecturer_dropdown["values"] = self.generator.lecturers
+        self.show_lecturer_schedule()
+        if not silent:
+            messagebox.showinfo("Sukses",
+                                f"Baris baru: {report['inserted']}, diubah: {report['updated']}, "
+                                f"dihapus: {report['deleted']}, bergeser: {report['moved']}\n"
+                                f"Jadwal generated dibuang: {report['dropped_generated']}")
+
+    def toggle_watch_excel(self):
+        if self.watch_excel_var.get():
+            self.root.after(2000, self.poll_excel_changes)
+
+    def poll_excel_changes(self):
+        if not self.watch_excel_var.get():
+            return
+        if self.generator.excel_changed():
+            self.reload_excel_changes(silent=True)
+        self.root.after(2000, self.poll_excel_changes)
 
     def load_room_data_json(self):
         path = filedialog.askopenfilename(title="Pilih File Ruangan (JSON)", filetypes=[("JSON Files", "*.json")])
         if path and self.generator.load_rooms(path):
             messagebox.showinfo("Sukses", "Data ruangan berhasil dimuat.")
+            self.show_ingest_report('ruangan')
 
     def load_room_data_excel(self):
         path = filedialog.askopenfilename(title="Pilih File Ruangan (Excel)", filetypes=[("Excel Files", "*.xlsx")])
         if path and self.generator.load_rooms_from_excel(path):
             messagebox.showinfo("Sukses", "Data ruangan berhasil dimuat.")
+            self.show_ingest_report('ruangan')
 
     def show_lecturer_schedule(self, event=None):
-        lecturer = self.lecturer_var.get()
-        self.schedule_tree.delete(*self.schedule_tree.get_children())
-        
-        all_schedules = self.generator.fixed_schedules + self.generator.generated_schedules
-        filtered_schedules = [s for s in all_schedules if s['dosen'] == lecturer]
+        if event is not None:
+            self.search_var.set('')  # Memilih dosen keluar dari mode pencarian
+        query = self.search_var.get().strip()
+        if query:
+            fields = {'Dosen': 'dosen', 'Kelas': 'kelas', 'Ruangan': 'ruangan', 'Mata Kuliah': 'mata_kuliah'}
+            started = perf_counter()
+            filtered_schedules = self.generator.search_schedules(query, fields.get(self.search_field_var.get()))
+            elapsed = (perf_counter() - started) * 1000
+            self.search_status.config(text=f"{len(filtered_schedules)} jadwal ({elapsed:.1f} ms)")
+        else:
+            filtered_schedules = self.generator.timetable('dosen', self.lecturer_var.get())
+            self.search_status.config(text="")
         
         if self.current_filter_hari and self.current_filter_hari != 'Semua':
             filtered_schedules = [s for s in filtered_schedules if s['hari'] == self.current_filter_hari]
@@ -1303,12 +4748,17 @@ class ScheduleApp:
         else:
             filtered_schedules.sort(key=lambda x: x['hari'], reverse=True)
         
-        for s in filtered_schedules:
+        self.fill_schedule_tree(filtered_schedules)
+
+    def fill_schedule_tree(self, schedules):
+        self.schedule_tree.delete(*self.schedule_tree.get_children())
+        self.tree_schedules = {}
+        for s in schedules:
             room_capacity = ""
             if s.get('ruangan') and s['ruangan'] != 'Online':
                 room_capacity = self.generator.room_capacities.get(s['ruangan'], '?')
             
-            self.schedule_tree.insert('', 'end', values=(
+            item = self.schedule_tree.insert('', 'end', values=(
                 s['hari'],
                 s['mata_kuliah'],
                 s['kelas'],
@@ -1320,6 +4770,11 @@ class ScheduleApp:
                 s['dosen'],
                 s.get('jumlah_mahasiswa', '')
             ))
+            self.tree_schedules[item] = s
+
+    def clear_search(self):
+        self.search_var.set('')
+        self.show_lecturer_schedule()
 
     def apply_filters(self, event=None):
         self.current_filter_hari = self.hari_var.get()
@@ -1345,6 +4800,83 @@ class ScheduleApp:
             messagebox.showinfo("Sukses", f"Jadwal untuk {lecturer} berhasil digenerate.")
         else:
             messagebox.showerror("Gagal", f"Gagal generate jadwal untuk {lecturer}.")
+        if self.generator.unplaceable:
+            lines = [f"{course['mata_kuliah']} ({course['kelas']}): {reason}"
+                     for course, reason in self.generator.unplaceable]
+            messagebox.showwarning("Tidak Terjadwal", "\n".join(lines))
+
+    def generate_sharded(self):
+        if not self.generator.excel_path:
+            messagebox.showwarning("Peringatan", "Tidak ada file Excel yang dimuat!")
+            return
+        try:
+            report = self.generator.generate_sharded()
+        except Exception as e:
+            messagebox.showerror("Gagal", f"Gagal generate per departemen: {str(e)}")
+            return
+        self.show_lecturer_schedule()
+        lines = [
+            f"{department}: {stats['placed']} langsung, {stats['replaced']} ditempatkan ulang, {stats['failed']} gagal"
+            for department, stats in report.items()
+        ]
+        messagebox.showinfo("Sukses", "\n".join(lines) or "Tidak ada jadwal kosong.")
+
+    def generate_all(self, previous=None):
+        if not self.generator.excel_path:
+            messagebox.showwarning("Peringatan", "Tidak ada file Excel yang dimuat!")
+            return
+        try:
+            report = self.generator.generate_all(previous)
+        except Exception as e:
+            messagebox.showerror("Gagal", f"Gagal generate semua jadwal: {str(e)}")
+            return
+        self.show_lecturer_schedule()
+        if not report:
+            messagebox.showinfo("Sukses", "Tidak ada jadwal kosong.")
+            return
+        placed = sum(stats['placed'] for stats in report.values())
+        seeded = sum(stats['seeded'] for stats in report.values())
+        failed = {lecturer: stats for lecturer, stats in report.items() if stats['failed']}
+        lines = [f"{placed} jadwal ditempatkan, {len(failed)} dosen memiliki jadwal gagal"]
+        if previous is not None:
+            lines[0] += f" ({seeded} dari jadwal semester lalu)"
+        lines += [
+            f"{lecturer}: {stats['placed']}/{stats['courses']} berhasil ({stats['seconds']:.2f} detik)"
+            for lecturer, stats in sorted(failed.items())
+        ]
+        messagebox.showinfo("Sukses", "\n".join(lines))
+
+    def generate_warm_start(self):
+        if not self.generator.excel_path:
+            messagebox.showwarning("Peringatan", "Tidak ada file Excel yang dimuat!")
+            return
+        path = filedialog.askopenfilename(title="Pilih Jadwal Semester Lalu",
+                                          filetypes=[("Excel files", "*.xlsx *.xls")])
+        if path:
+            self.generate_all(previous=path)
+
+    def generate_anytime(self):
+        if not self.generator.excel_path:
+            messagebox.showwarning("Peringatan", "Tidak ada file Excel yang dimuat!")
+            return
+        resume = False
+        if self.generator.load_checkpoint() is not None:
+            resume = messagebox.askyesno("Checkpoint", "Ada proses generate yang belum selesai. Lanjutkan dari checkpoint?")
+        budget = simpledialog.askfloat("Generate Berbatas Waktu", "Batas waktu (detik):",
+                                       initialvalue=60.0, minvalue=1.0, parent=self.root)
+        if budget is None:
+            return
+        try:
+            report = self.generator.generate_anytime(budget=budget, resume=resume)
+        except Exception as e:
+            messagebox.showerror("Gagal", f"Gagal generate jadwal: {str(e)}")
+            return
+        self.show_lecturer_schedule()
+        message = (f"{report['placed']} jadwal ditempatkan, {report['failed']} gagal, "
+                   f"{report['rooms']} ruangan diisi ({report['elapsed']:.1f} detik).")
+        if not report['complete']:
+            message += f"\nBatas waktu habis pada fase '{report['phase']}'; proses bisa dilanjutkan dari checkpoint."
+        messagebox.showinfo("Sukses", message)
 
     def clear_rooms(self):
         if self.generator.clear_all_rooms():
@@ -1360,6 +4892,18 @@ class ScheduleApp:
         else:
             messagebox.showerror("Gagal", "Gagal mengacak ruangan")
 
+    def reassign_rooms(self):
+        try:
+            report = self.generator.reassign_rooms()
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal memperbarui ruangan: {str(e)}")
+            return
+        self.show_lecturer_schedule()
+        message = f"{report['reassigned']} jadwal mendapat ruangan baru (dari {report['checked']} diperiksa)."
+        if report['unassigned']:
+            message += f"\n{len(report['unassigned'])} jadwal belum mendapat ruangan."
+        messagebox.showinfo("Sukses", message)
+
     def save_schedule_all(self):
         all_sched = self.generator.fixed_schedules + self.generator.generated_schedules
         folder = filedialog.askdirectory(title="Pilih Folder Output")
@@ -1383,6 +4927,23 @@ class ScheduleApp:
                 messagebox.showinfo("Sukses", f"Jadwal untuk {lecturer} disimpan:\n{out}")
                 os.startfile(folder)
 
+    def export_per_lecturer(self):
+        folder = filedialog.askdirectory(title="Pilih Folder Output")
+        if not folder:
+            return
+        as_zip = messagebox.askyesno("Ekspor Per Dosen", "Gabungkan semua file ke dalam satu arsip ZIP?")
+        try:
+            report = self.generator.bulk_export("templates/schedule_template.xlsx", folder, as_zip=as_zip)
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal mengekspor: {str(e)}")
+            return
+        messagebox.showinfo(
+            "Sukses",
+            f"{report['files']} file ({report['sessions']} sesi) disimpan dalam {report['seconds']:.1f} detik "
+            f"({report['files_per_second']:.1f} file/detik) di:\n{folder}"
+        )
+        os.startfile(folder)
+
     def show_conflicts(self):
         self.conflict_frame.pack(fill=tk.BOTH, expand=True, pady=5)
         self.refresh_conflicts()
@@ -1404,7 +4965,8 @@ class ScheduleApp:
         
         for c_type in conflict_types:
             for conflict in conflicts[c_type]:
-                solutions = self.generator.suggest_conflict_resolutions(conflict)
+                with self.generator.memoized():
+                    solutions = self.generator.suggest_conflict_resolutions(conflict)
                 solution_text = solutions[0] if solutions else "Perlu penyesuaian manual"
                 
                 if c_type == 'lecturer':
@@ -1468,30 +5030,49 @@ class ScheduleApp:
                         solution_text
                     ))
 
+    def export_conflict_report(self):
+        path = filedialog.asksaveasfilename(title="Simpan Laporan Konflik",
+                                            defaultextension=".jsonl",
+                                            filetypes=[("JSON Lines", "*.jsonl"), ("CSV", "*.csv")])
+        if not path:
+            return
+        filter_type = self.conflict_filter.get()
+        types = None if filter_type == 'Semua' else [filter_type]
+        try:
+            count = self.generator.write_conflict_report(path, types=types)
+            messagebox.showinfo("Sukses", f"{count} konflik ditulis ke:\n{path}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal menulis laporan: {str(e)}")
+
     def show_manual_input(self):
         ManualInputDialog(self.root, self.generator, self.show_lecturer_schedule)
 
+    def import_manual(self):
+        path = filedialog.askopenfilename(title="Pilih File Jadwal Manual",
+                                          filetypes=[("Excel/CSV", "*.xlsx *.xls *.csv")])
+        if not path:
+            return
+        try:
+            accepted, report = self.generator.import_manual_schedules(path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Gagal mengimpor jadwal: {str(e)}")
+            return
+        self.show_lecturer_schedule()
+        rejected = int((report['status'] == 'ditolak').sum())
+        message = f"{accepted} jadwal ditambahkan, {rejected} baris ditolak."
+        if rejected and messagebox.askyesno("Impor Manual", message + "\n\nSimpan laporan per baris?"):
+            out = filedialog.asksaveasfilename(title="Simpan Laporan Impor", defaultextension=".csv",
+                                               filetypes=[("CSV", "*.csv")])
+            if out:
+                report.to_csv(out, index=False)
+        else:
+            messagebox.showinfo("Impor Manual", message)
+
     def on_schedule_select(self, event):
         selected = self.schedule_tree.selection()
         if selected:
-            item = self.schedule_tree.item(selected[0])
-            values = item['values']
-            
-            # Find the corresponding schedule in the generator
-            lecturer = self.lecturer_var.get()
-            all_schedules = self.generator.fixed_schedules + self.generator.generated_schedules
-            for s in all_schedules:
-                if (s['dosen'] == lecturer and 
-                    s['hari'] == values[0] and
-                    s['mata_kuliah'] == values[1] and
-                    s['kelas'] == values[2] and
-                    s.get('ruangan', '') == values[3] and
-                    s['jam'] == values[5] and
-                    s['sks'] == values[6] and
-                    s['semester'] == values[7] and
-                    s.get('jumlah_mahasiswa', '') == values[9]):
-                    self.selected_schedule = s
-                    break
+            # Jadwal yang ditampilkan dipetakan langsung dari item Treeview
+            self.selected_schedule = self.tree_schedules.get(selected[0])
         else:
             self.selected_schedule = None
 
@@ -1552,6 +5133,34 @@ class ScheduleApp:
         else:
             messagebox.showerror("Gagal", "Gagal menyimpan ke file Excel asli")
     
+    def show_room_analytics(self):
+        if not self.generator.available_rooms:
+            messagebox.showwarning("Peringatan", "Data ruangan belum dimuat!")
+            return
+        UtilizationDialog(self.root, self.generator)
+
+    def show_diagnostics(self):
+        if not self.generator.diagnostics.runs:
+            messagebox.showinfo("Info", "Belum ada proses generate yang tercatat.")
+            return
+        DiagnosticsDialog(self.root, self.generator)
+
+    def undo(self):
+        label = self.generator.undo()
+        if label is None:
+            messagebox.showinfo("Info", "Tidak ada perubahan yang bisa dibatalkan")
+            return
+        self.selected_schedule = None
+        self.show_lecturer_schedule()
+
+    def redo(self):
+        label = self.generator.redo()
+        if label is None:
+            messagebox.showinfo("Info", "Tidak ada perubahan yang bisa diulang")
+            return
+        self.selected_schedule = None
+        self.show_lecturer_schedule()
+
     def add_break_time(self):
         """Menampilkan dialog untuk menambahkan waktu istirahat dosen"""
         BreakTimeDialog(self.root, self.generator, self.refresh_conflicts)
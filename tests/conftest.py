@@ -0,0 +1,50 @@
+import json
+import os
+import sys
+
+import openpyxl
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app  # noqa: E402
+
+HEADERS = ('No', 'Nama Dosen', 'Mata Kuliah', 'Semester', 'SKS', 'Kelas', 'Hari', 'Jam', 'Jumlah Mahasiswa')
+
+ROWS = [
+    ('Dosen A', 'Algoritma', 3, 3, 'TI-3A', 'Senin', '08:00 - 09:40', 30),
+    ('Dosen A', 'Basis Data', 3, 3, 'TI-3B', 'Selasa', '10:00 - 11:40', 35),
+    ('Dosen B', 'Jaringan', 5, 2, 'TI-5A', 'Senin', '10:00 - 11:40', 25),
+    ('Dosen B', 'Statistika', 1, 2, 'SI-1A', '', '', 40),
+    ('Dosen C', 'Desain Grafis', 1, 3, 'DKV-1A', '', '', 20),
+    ('Dosen C', 'Tipografi', 3, 2, 'DKV-3A', 'Rabu', '13:00 - 14:40', 20),
+    ('Dosen D', 'Etika Profesi', 7, 2, 'TI-7A', 'Kamis', 'online', 50),
+]
+
+ROOMS = [
+    {'nama': '3.01', 'lantai': 3, 'kapasitas': 35},
+    {'nama': '3.02', 'lantai': 3, 'kapasitas': 60},
+    {'nama': '4.01', 'lantai': 4, 'kapasitas': 45},
+    {'nama': '5.01', 'lantai': 5, 'kapasitas': 30},
+]
+
+
+@pytest.fixture
+def generator(tmp_path):
+    """ScheduleGenerator dengan Mapping.xlsx kecil dan empat ruangan"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = 'Mapping mata kuliah'
+    sheet.append(HEADERS)
+    sheet.insert_rows(1, 2)
+    for number, row in enumerate(ROWS, 1):
+        sheet.append((number,) + row)
+    excel_path = tmp_path / 'Mapping.xlsx'
+    workbook.save(excel_path)
+    rooms_path = tmp_path / 'rooms.json'
+    rooms_path.write_text(json.dumps(ROOMS))
+
+    gen = app.ScheduleGenerator()
+    assert gen.load_rooms(str(rooms_path))
+    assert gen.load_data(str(excel_path))
+    return gen
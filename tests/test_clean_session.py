@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+
+def session(**fields):
+    base = {'dosen': 'Dosen A', 'mata_kuliah': 'Algoritma', 'kelas': 'TI-3A', 'hari': 'Senin',
+            'jam': '08:00 - 09:40', 'ruangan': '3.01', 'semester': 3, 'sks': 3, 'jumlah_mahasiswa': 30}
+    base.update(fields)
+    return base
+
+
+def test_clean_session_valid(generator):
+    assert generator.clean_session(session()) == ('valid', [])
+
+
+def test_whole_number_floats_are_valid(generator):
+    data = session(sks=3.0, semester=np.float64(5.0), jumlah_mahasiswa=np.int64(30))
+    assert generator.clean_session(data) == ('valid', [])
+    assert (data['sks'], data['semester'], data['jumlah_mahasiswa']) == (3, 5, 30)
+    assert all(type(data[field]) is int for field in ('sks', 'semester', 'jumlah_mahasiswa'))
+
+
+def test_saturday_is_a_valid_day(generator):
+    data = session(hari='Sabtu')
+    assert generator.clean_session(data) == ('valid', [])
+    assert data['jam'] == '08:00 - 09:40'
+
+
+@pytest.mark.parametrize('jam', ['online', 'Online', ' ONLINE '])
+def test_online_marker_becomes_timeless_online_session(generator, jam):
+    data = session(jam=jam, ruangan='3.01')
+    status, _ = generator.clean_session(data)
+    assert status == 'repairable'
+    assert (data['hari'], data['jam'], data['ruangan']) == ('Senin', 'online', 'Online')
+    assert generator.jam_mask(data['jam']) == 0
+
+
+def test_online_time_range_moves_room_to_online(generator):
+    data = session(jam='17:40 (online) - 19:20 (online)', ruangan='3.01')
+    assert generator.clean_session(data)[0] == 'repairable'
+    assert data['ruangan'] == 'Online'
+
+
+def test_unknown_day_clears_jam(generator):
+    data = session(hari='Minggu depan')
+    status, issues = generator.clean_session(data)
+    assert status == 'repairable'
+    assert (data['hari'], data['jam']) == ('', '')
+    assert any('tidak dikenal' in issue for issue in issues)
+
+
+def test_jam_without_day_is_unscheduled(generator):
+    data = session(hari=None)
+    assert generator.clean_session(data)[0] == 'repairable'
+    assert (data['hari'], data['jam']) == ('', '')
+
+
+def test_text_and_fractional_numbers_are_repaired(generator):
+    data = session(sks=2.7, semester=float('nan'), jumlah_mahasiswa='tiga puluh', dosen='  Dosen A ')
+    status, issues = generator.clean_session(data)
+    assert status == 'repairable'
+    assert (data['sks'], data['semester'], data['jumlah_mahasiswa'], data['dosen']) == (2, 0, 0, 'Dosen A')
+    assert len(issues) == 4
+
+
+def test_whole_number_text_is_accepted(generator):
+    data = session(sks='3')
+    assert generator.clean_session(data) == ('valid', [])
+    assert data['sks'] == 3
+
+
+@pytest.mark.parametrize('fields', [{'jam': 'abc'}, {'jam': '10:00 - 09:00'}, {'dosen': None},
+                                    {'kelas': float('nan')}, {'mata_kuliah': '  '}])
+def test_quarantined(generator, fields):
+    assert generator.clean_session(session(**fields))[0] == 'quarantined'
+
+
+def test_load_data_reports_online_row(generator):
+    report = generator.ingest_reports['excel']
+    assert report.counts['quarantined'] == 0
+    online = next(sched for sched in generator.fixed_schedules if sched['mata_kuliah'] == 'Etika Profesi')
+    assert (online['jam'], online['ruangan']) == ('online', 'Online')
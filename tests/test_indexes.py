@@ -0,0 +1,93 @@
+import random
+
+import app
+
+SLOTS = ['08:00 - 09:40', '10:00 - 11:40', '13:00 - 14:40', '15:00 - 16:40', '08:30 - 10:10', 'online', '']
+DAYS = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu']
+ROOMS = ['3.01', '3.02', '4.01', '5.01', 'Online', '']
+
+
+def rebuilt_occupancy(gen):
+    occupancy = app.OccupancyIndex()
+    for sched in gen.fixed_schedules + gen.generated_schedules:
+        occupancy.add(sched, gen.jam_mask(sched.get('jam')))
+    return occupancy
+
+
+def timetables(index):
+    """Isi timetable per field tanpa nomor urut (urutan sisipan boleh berbeda untuk hari/jam yang sama)"""
+    result = {}
+    for field, values in index.timetables.items():
+        for value, timetable in values.items():
+            keys = [key[:2] for key, _ in timetable]
+            assert keys == sorted(keys), (field, value)
+            result[(field, value)] = sorted((key[:2], id(sched)) for key, sched in timetable)
+    return result
+
+
+def assert_matches_rebuild(gen):
+    occupancy = rebuilt_occupancy(gen)
+    assert {key: mask for key, mask in gen.get_occupancy().masks.items() if mask} == \
+        {key: mask for key, mask in occupancy.masks.items() if mask}
+    free_slots = app.FreeSlotIndex(occupancy, gen.time_grid.all_days, gen.time_grid)
+    assert gen.get_free_slots().busy == free_slots.busy
+    rebuilt = app.ScheduleIndex(gen.jam_interval, gen.fixed_schedules + gen.generated_schedules)
+    assert timetables(gen.get_schedule_index()) == timetables(rebuilt)
+
+
+def random_schedule(rng, number):
+    return {
+        'source': 'generated', 'dosen': rng.choice(['Dosen A', 'Dosen B', 'Dosen E']),
+        'mata_kuliah': f'MK {number}', 'kelas': rng.choice(['TI-3A', 'TI-5A', 'SI-1A']),
+        'hari': rng.choice(DAYS), 'jam': rng.choice(SLOTS), 'ruangan': rng.choice(ROOMS),
+        'semester': 1, 'sks': 2, 'jumlah_mahasiswa': 20,
+    }
+
+
+def test_incremental_indexes_match_full_rebuild(generator):
+    rng = random.Random(7)
+    generator.get_free_slots()
+    generator.get_schedule_index()
+    for step in range(300):
+        schedules = generator.fixed_schedules + generator.generated_schedules
+        action = rng.random()
+        if action < 0.3 or not schedules:
+            generator._insert_schedule(random_schedule(rng, step))
+        elif action < 0.45:
+            generator._delete_schedule(rng.choice(schedules))
+        elif action < 0.6:
+            generator._set_room(rng.choice(schedules), rng.choice(ROOMS))
+        elif action < 0.8:
+            generator._update_schedule(rng.choice(schedules), hari=rng.choice(DAYS), jam=rng.choice(SLOTS))
+        elif action < 0.9:
+            generator.undo()
+        else:
+            generator.redo()
+        if step % 25 == 0:
+            assert_matches_rebuild(generator)
+    assert_matches_rebuild(generator)
+
+
+def test_indexes_follow_command_rollback(generator):
+    generator.get_free_slots()
+    generator.get_schedule_index()
+    target = generator.fixed_schedules[0]
+    with generator.journal.command("Uji"):
+        mark = generator.journal.mark()
+        generator._set_room(target, '3.01')
+        generator._update_schedule(target, hari='Jumat', jam='15:00 - 16:40')
+        generator._insert_schedule(random_schedule(random.Random(1), 0))
+        generator.journal.rollback(generator, mark)
+    assert target['hari'] == 'Senin' and target['ruangan'] == ''
+    assert not generator.generated_schedules
+    assert not generator.journal.can_undo()
+    assert_matches_rebuild(generator)
+
+
+def test_timetable_is_ordered_by_day_and_start(generator):
+    generator._insert_schedule(dict(generator.fixed_schedules[0], hari='Senin', jam='13:00 - 14:40',
+                                    mata_kuliah='Kecerdasan Buatan', source='manual'))
+    generator._insert_schedule(dict(generator.fixed_schedules[0], hari='Senin', jam='10:00 - 11:40',
+                                    mata_kuliah='Pemrograman Web', source='manual'))
+    subjects = [sched['mata_kuliah'] for sched in generator.timetable('dosen', 'Dosen A')]
+    assert subjects == ['Algoritma', 'Pemrograman Web', 'Kecerdasan Buatan', 'Basis Data']
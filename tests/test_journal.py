@@ -0,0 +1,78 @@
+import openpyxl
+
+
+def state(gen):
+    return ([dict(sched) for sched in gen.fixed_schedules], [dict(sched) for sched in gen.generated_schedules],
+            {key: list(values) for key, values in gen.lecturer_breaks.items()})
+
+
+def workbook_values(path):
+    sheet = openpyxl.load_workbook(path)['Mapping mata kuliah']
+    return [[cell.value for cell in row] for row in sheet.iter_rows()]
+
+
+def test_undo_redo_restores_each_command(generator):
+    snapshots = [state(generator)]
+    generator.add_manual_schedule({'dosen': 'Dosen E', 'mata_kuliah': 'Kalkulus', 'kelas': 'TI-1A', 'hari': 'Jumat',
+                                   'jam': '08:00 - 09:40', 'ruangan': '3.02', 'semester': 1, 'sks': 3,
+                                   'jumlah_mahasiswa': 40})
+    snapshots.append(state(generator))
+    with generator.journal.command("Pindah"):
+        generator._set_room(generator.fixed_schedules[0], '3.01')
+        generator._update_schedule(generator.fixed_schedules[1], hari='Kamis', catatan='dipindah')
+    snapshots.append(state(generator))
+    generator.remove_schedule(generator.fixed_schedules[2])
+    snapshots.append(state(generator))
+    generator.add_lecturer_break('Dosen A', 'Senin', '10:00', '11:00')
+    snapshots.append(state(generator))
+
+    for expected in reversed(snapshots[:-1]):
+        assert generator.undo() is not None
+        assert state(generator) == expected
+    assert generator.undo() is None
+    for expected in snapshots[1:]:
+        assert generator.redo() is not None
+        assert state(generator) == expected
+    assert generator.redo() is None
+
+
+def test_new_command_clears_redo(generator):
+    generator._set_room(generator.fixed_schedules[0], '3.01')
+    generator.undo()
+    assert generator.journal.can_redo()
+    generator._set_room(generator.fixed_schedules[1], '3.02')
+    assert not generator.journal.can_redo()
+    assert generator.undo() is not None and generator.fixed_schedules[1]['ruangan'] == ''
+
+
+def test_rollback_keeps_earlier_deltas(generator):
+    first, second = generator.fixed_schedules[:2]
+    with generator.journal.command("Sebagian"):
+        generator._set_room(first, '3.01')
+        mark = generator.journal.mark()
+        generator._set_room(second, '3.02')
+        generator._delete_schedule(first)
+        generator.journal.rollback(generator, mark)
+    assert first in generator.fixed_schedules and first['ruangan'] == '3.01'
+    assert second['ruangan'] == ''
+    generator.undo()
+    assert first['ruangan'] == ''
+    assert not generator.journal.can_undo()
+
+
+def test_undo_excel_edit_restores_workbook_and_hashes(generator):
+    before_cells = workbook_values(generator.excel_path)
+    before_hashes = dict(generator.excel_row_hashes)
+    old = generator.fixed_schedules[0]
+    new = dict(old, hari='Rabu', jam='15:00 - 16:40')
+    assert generator.edit_schedule(old, new)
+    after_cells = workbook_values(generator.excel_path)
+    assert after_cells != before_cells
+
+    generator.undo()
+    assert workbook_values(generator.excel_path) == before_cells
+    assert generator.excel_row_hashes == before_hashes
+    assert generator.fixed_schedules[0] is old and old['hari'] == 'Senin'
+
+    generator.redo()
+    assert workbook_values(generator.excel_path) == after_cells
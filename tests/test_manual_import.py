@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+
+def row(**fields):
+    base = {'Dosen': 'Dosen E', 'Mata Kuliah': 'Kalkulus', 'Kelas': 'TI-1A', 'Hari': 'Jumat',
+            'Jam': '08:00 - 09:40', 'Ruangan': '3.02', 'SKS': 3, 'Semester': 1, 'Jumlah Mahasiswa': 40}
+    base.update(fields)
+    return base
+
+
+def validate(generator, *rows):
+    accepted, report = generator.validate_manual_frame(pd.DataFrame(list(rows)))
+    reasons = {reason: key for key, reason in generator.IMPORT_REASONS.items()}
+    return accepted, [reasons.get(reason, '') for reason in report['alasan']]
+
+
+def test_valid_row_is_accepted(generator):
+    accepted, reasons = validate(generator, row())
+    assert reasons == ['']
+    assert accepted[0]['sks'] == 3 and accepted[0]['ruangan'] == '3.02'
+
+
+@pytest.mark.parametrize('fields, reason', [
+    ({'SKS': 2.7}, 'angka'),
+    ({'Semester': 'satu'}, 'angka'),
+    ({'Dosen': ''}, 'wajib'),
+    ({'Hari': 'Libur'}, 'hari'),
+    ({'Jam': '25:00 - 26:00'}, 'format_jam'),
+    ({'Ruangan': '9.99'}, 'ruangan'),
+    ({'Jumlah Mahasiswa': 61}, 'kapasitas'),
+    ({'Jam': '11:30 - 13:10'}, 'istirahat'),
+    ({'Dosen': 'Dosen A', 'Hari': 'Senin', 'Jam': '08:30 - 10:10'}, 'dosen'),
+    ({'Kelas': 'TI-5A', 'Hari': 'Senin', 'Jam': '10:00 - 11:40'}, 'kelas'),
+])
+def test_rejection_reasons(generator, fields, reason):
+    accepted, reasons = validate(generator, row(**fields))
+    assert reasons == [reason]
+    assert accepted == []
+
+
+def test_lecturer_break(generator):
+    generator.add_lecturer_break('Dosen E', 'Jumat', '09:00', '10:00')
+    assert validate(generator, row())[1] == ['istirahat_dosen']
+    assert validate(generator, row(Jam='10:00 - 11:40'))[1] == ['']
+
+
+def test_online_rows_skip_room_and_break_checks(generator):
+    accepted, reasons = validate(generator, row(Jam='online', Ruangan='9.99'),
+                                 row(Jam='17:40 (online) - 19:20 (online)', Ruangan='', Kelas='TI-1B'))
+    assert reasons == ['', '']
+    assert [sched['ruangan'] for sched in accepted] == ['Online', 'Online']
+
+
+def test_batch_clashes_first_row_wins(generator):
+    accepted, reasons = validate(
+        generator,
+        row(),
+        row(Dosen='Dosen F', Kelas='TI-1B', Jam='09:00 - 10:40'),  # ruangan 3.02 sudah diambil baris pertama
+        row(Ruangan='4.01', Kelas='TI-1C', Jam='09:00 - 10:40'),  # dosen sama dengan baris pertama
+        row(Dosen='Dosen G', Ruangan='5.01', Jam='09:00 - 10:40', **{'Jumlah Mahasiswa': 20}),  # kelas sama
+        row(Dosen='Dosen H', Kelas='TI-1D', Ruangan='3.02', Jam='10:00 - 11:40'),
+    )
+    assert reasons == ['', 'ruangan_bentrok', 'dosen', 'kelas', '']
+    assert [sched['dosen'] for sched in accepted] == ['Dosen E', 'Dosen H']
+
+
+def test_import_adds_accepted_rows_as_one_command(generator, tmp_path):
+    path = tmp_path / 'manual.csv'
+    pd.DataFrame([row(), row(SKS=2.7, Kelas='TI-1B'), row(Dosen='Dosen H', Kelas='TI-1D', Jam='10:00 - 11:40')]) \
+        .to_csv(path, index=False)
+    before = len(generator.fixed_schedules)
+    imported, report = generator.import_manual_schedules(str(path))
+    assert imported == 2
+    assert list(report['status']) == ['diterima', 'ditolak', 'diterima']
+    assert list(report['baris']) == [2, 3, 4]
+    assert len(generator.fixed_schedules) == before + 2
+    generator.undo()
+    assert len(generator.fixed_schedules) == before